@@ -1,5 +1,7 @@
 import streamlit as st
 
+from twin.data import BENCHES_GJSON
+
 st.set_page_config(page_title="Concept prototype for a DT for Ede–Veldhuizen")
 
 # ---------- CSS for colored blocks ----------
@@ -122,9 +124,12 @@ st.info(
     "and CBS **Nabijheid voorzieningen 2022** (neighbourhood/municipality level). "
     "Health indicators are filtered to age **65+**."
 )
+missing_vars = "detailed community participation, micro-safety" if BENCHES_GJSON.exists() else \
+    "benches, detailed community participation, micro-safety"
 st.warning(
     "This is an **early prototype**. Indicators are **static** and **selected** (not exhaustive); "
-    "some relevant variables (e.g., benches, detailed community participation, micro-safety) are not yet available. "
+    f"some relevant variables (e.g., {missing_vars}) are not yet available. "
+    "Local point data such as benches can be added with `python -m twin.points`. "
     "The **Scenarios** page uses simplified mock relationships for communication only."
 )
 
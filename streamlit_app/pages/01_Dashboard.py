@@ -1,5 +1,4 @@
 # pages/01_Dashboard.py
-import json
 from pathlib import Path
 
 import numpy as np
@@ -8,6 +7,17 @@ import streamlit as st
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 
+from twin import cached
+from twin.charts import COL_A, COL_AVG, COL_B, draw_bar_comparison
+from twin.clustering import TYPE_COLORS, type_label
+from twin.data import content_key, snapshot_key
+from twin.fragments import page_run, rerun_stats_panel, tracked
+from twin.margins import FLAG_LABELS
+from twin.memwatch import memory_panel
+from twin.render_cache import RENDER_CACHE
+from twin.similarity import SimilarityIndex
+from twin.validate import page_gate
+
 # ---------- Paths ----------
 APP_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = APP_ROOT / "data"
@@ -16,53 +26,35 @@ CATALOG = DATA_DIR / "variables_catalog.csv"
 NEIGH_GJSON = DATA_DIR / "neighbourhoods_veld.geojson"
 MUNI_GJSON  = DATA_DIR / "municipality_ede.geojson"
 
-st.set_page_config(page_title="Dashboard • Veldhuizen vs Ede", layout="wide")
+LARGE_N = 150   # above this many neighbourhoods the Dashboard opens in large-n mode
 
-# ---------- Color constants ----------
-COL_A   = "#E24B35"   # Veldhuizen A
-COL_B   = "#F6A18A"   # Veldhuizen B 
-COL_AVG = "#006400"   # Ede average 
+st.set_page_config(page_title="Dashboard • Veldhuizen vs Ede", layout="wide")
+page_run("Dashboard")
 
 # ---------- Helpers ----------
-def geojson_to_table(path: Path) -> pd.DataFrame:
-    """Read a GeoJSON and return a pandas DataFrame of feature properties."""
-    with open(path, "r", encoding="utf-8") as f:
-        gj = json.load(f)
-    props = [feat.get("properties", {}) for feat in gj.get("features", [])]
-    return pd.DataFrame(props)
-
-@st.cache_data(show_spinner=False)
-def load_catalog(path: Path) -> pd.DataFrame:
-    cat = pd.read_csv(path)
-    required = {"dimension", "label", "column", "unit"}
-    missing = required - set(cat.columns)
-    if missing:
-        raise ValueError(f"variables_catalog.csv missing columns: {missing}")
-    return cat
-
-@st.cache_data(show_spinner=False)
-def load_tables() -> tuple[pd.DataFrame, pd.DataFrame]:
-    neigh_df = geojson_to_table(NEIGH_GJSON)
-    muni_df  = geojson_to_table(MUNI_GJSON)
-    return neigh_df, muni_df
+def load_tables(snapshot: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Shared per process (memory-mapped when a data plane is published); treat as read-only
+    return cached.neighbourhoods(snapshot), cached.municipality(snapshot)
+
+@st.cache_resource(show_spinner=False)
+def similarity_index(snapshot: str) -> SimilarityIndex:
+    # `snapshot` changes with the data files, so the index is rebuilt only then
+    neigh_df, _ = load_tables(snapshot)
+    cat = cached.catalog(snapshot)
+    key_col = "buurtcode" if "buurtcode" in neigh_df.columns else neigh_df.columns[0]
+    return SimilarityIndex(neigh_df, cat["column"].tolist(), key_col=key_col, name_col="buurtnaam")
 
 # ---------- Load ----------
-try:
-    cat = load_catalog(CATALOG)
-    neigh_df, muni_df = load_tables()
-except Exception as e:
-    st.error(f"Failed to load data.\n\n{e}")
-    st.stop()
-
-# Identify neighbourhood name column
-name_col = "buurtnaam" if "buurtnaam" in neigh_df.columns else neigh_df.columns[0]
-if name_col not in neigh_df.columns:
-    st.error("Expected a neighbourhood name column (e.g., 'buurtnaam').")
-    st.stop()
+# Files, catalog coverage, value ranges and codes are validated once per data snapshot (twin.validate)
+snapshot = snapshot_key(CATALOG, NEIGH_GJSON, MUNI_GJSON)
+page_gate(cached.quality(snapshot))
+cat = cached.catalog(snapshot)
+neigh_df, muni_df = load_tables(snapshot)
+name_col = "buurtnaam"
 
 # ---------- Sidebar ----------
 st.sidebar.header("Choose indicators")
-dims = sorted(cat["dimension"].dropna().unique().tolist())
+dims = sorted(cat["dimension"].unique().tolist())
 sel_dim = st.sidebar.selectbox("Dimension", dims)
 
 subset = cat[cat["dimension"] == sel_dim].copy()
@@ -76,6 +68,23 @@ unit    = str(sel_row["unit"]).strip()
 st.sidebar.markdown("---")
 sort_order  = st.sidebar.radio("Sort by", ["Descending", "Ascending", "Alphabetical"], horizontal=True)
 show_labels = st.sidebar.checkbox("Show value labels on bars", value=True)
+show_ci     = st.sidebar.checkbox("Show 95% intervals and significance", value=True)
+
+st.sidebar.markdown("---")
+large_n = st.sidebar.toggle("Large-n mode", value=len(neigh_df) > LARGE_N,
+                            help="Top/bottom-N and distribution views with a paginated table, for many regions")
+if large_n:
+    ln_view = st.sidebar.radio("View", ["Top / bottom N", "Distribution"], horizontal=True)
+    if ln_view.startswith("Top"):
+        ln_end = st.sidebar.radio("Show", ["Highest", "Lowest"], horizontal=True)
+        ln_n = st.sidebar.slider("N", 5, 50, 20)
+
+st.sidebar.markdown("---")
+group_mode = st.sidebar.radio("Colour by", ["Veldhuizen A/B", "Typology (k-means)"])
+use_types = group_mode.startswith("Typology") and "buurtcode" in neigh_df.columns and len(neigh_df) > 2
+if use_types:
+    type_scope = st.sidebar.radio("Cluster on", ["All indicators", "Selected dimension"], horizontal=True)
+    n_types = st.sidebar.slider("Number of types", 2, min(len(TYPE_COLORS), len(neigh_df) - 1), 3)
 
 # Small info line
 bits = [f"**Variable:** {sel_label}"]
@@ -85,17 +94,28 @@ bits.append(f"**Dimension:** {sel_dim}")
 st.markdown("  •  ".join(bits))
 
 # ---------- Data prep ----------
-if var_col not in neigh_df.columns:
-    st.error(f"Column `{var_col}` not found in neighbourhoods table.")
-    st.stop()
-
 df = neigh_df[[name_col, var_col]].copy()
 df[name_col] = df[name_col].astype(str)
 df[var_col]  = pd.to_numeric(df[var_col], errors="coerce")
+no_value = df.loc[df[var_col].isna(), name_col].tolist()
 df = df.dropna(subset=[var_col])
-if df.empty:
-    st.warning("All values are missing for this indicator.")
-    st.stop()
+if no_value:
+    st.caption(f"No value for {', '.join(no_value)}.")
+
+# Intervals and significance vs Ede (precomputed per data snapshot, see twin.margins)
+if "buurtcode" in neigh_df.columns:
+    mg = cached.margins(snapshot)
+    mg = mg[mg["column"] == var_col].set_index("code")
+    mg = mg.reindex(neigh_df.loc[df.index, "buurtcode"].astype(str))
+    df["lower"], df["upper"] = mg["lower"].to_numpy(), mg["upper"].to_numpy()
+    df["flag"] = mg["flag"].fillna(0).astype(int).to_numpy()
+    df["interval"] = mg["interval"].fillna("missing").to_numpy()
+else:
+    df["lower"], df["upper"], df["flag"], df["interval"] = df[var_col], df[var_col], 0, "missing"
+has_ci = show_ci and bool((df["interval"].isin(["published", "approx"])).any())
+df["Significance"] = df["flag"].map(FLAG_LABELS)
+df["CI"] = [f"{lo:,.1f}–{hi:,.1f}" if k in ("published", "approx") else ""
+            for lo, hi, k in zip(df["lower"], df["upper"], df["interval"])]
 
 # --- Tag Veldhuizen A/B ---
 _a_names = {"de horsten", "de burgen"}
@@ -103,6 +123,17 @@ name_norm = df[name_col].str.strip().str.casefold()
 df["is_A"] = name_norm.isin(_a_names)
 df["Group"] = np.where(df["is_A"], "Veldhuizen A", "Veldhuizen B")
 df["LabelName"] = df[name_col] + np.where(df["is_A"], " (A)", " (B)")
+group_colors = {"Veldhuizen A": COL_A, "Veldhuizen B": COL_B}
+
+# --- Or: data-driven typology (cached per indicator set and k) ---
+if use_types:
+    type_cols = cat["column"] if type_scope == "All indicators" else subset["column"]
+    types = cached.typology(snapshot, tuple(type_cols), n_types)
+    codes = neigh_df.loc[df.index, "buurtcode"].astype(str)
+    df["Group"] = codes.map(dict(zip(types["buurtcode"], types["Type"]))).fillna("Unassigned")
+    df["LabelName"] = df[name_col] + " (" + df["Group"].str.replace("Type ", "T", regex=False) + ")"
+    group_colors = {type_label(i): c for i, c in enumerate(TYPE_COLORS[:n_types])}
+    group_colors["Unassigned"] = "#cccccc"
 
 # Municipal average 
 muni_value = np.nan
@@ -127,162 +158,276 @@ xlabel = f"{sel_label}" + (f" [{unit}]" if unit else "")
 
 HEIGHT_SCALE = 0.90  
 
-# Axis bounds with headroom 
-cands  = [vmax]
-if np.isfinite(muni_value):
-    cands.append(float(muni_value))
-xmax    = max(cands)
-pad     = 0.08 * xmax if xmax > 0 else 1.0
-x_upper = xmax + pad
+# Axis lower bound (the static chart computes its own headroom)
 x_lower = min(0.0, vmin, float(muni_value) if np.isfinite(muni_value) else 0.0)
 
-# ---------- Try interactive Plotly, else Matplotlib ----------
-rendered_interactive = False
-try:
-    import plotly.express as px
-
-    height_px = int(max(3.6, 0.48 * n + 1.2) * 140 * HEIGHT_SCALE)
-
-    pldf = df.rename(columns={"LabelName": "Neighbourhood", var_col: "Value"})[
-        ["Neighbourhood", "Value", "Group"]
-    ].astype({"Value": float})
-    # Pre-format labels to avoid trace misalignment
-    pldf["ValueText"] = [fmt.format(v) for v in pldf["Value"].values]
-
-    fig = px.bar(
-        pldf,
-        x="Value",
-        y="Neighbourhood",
-        color="Group",
-        text="ValueText",
-        hover_data={"ValueText": False, "Group": True},
-        orientation="h",
-        category_orders={"Neighbourhood": pldf["Neighbourhood"].tolist()},
-        template="plotly_white",
-        color_discrete_map={
-            "Veldhuizen A": COL_A,
-            "Veldhuizen B": COL_B,
-        },
-    )
-    fig.update_xaxes(title_text=xlabel, zeroline=False, fixedrange=True)
-    fig.update_yaxes(title_text="", automargin=True, fixedrange=True)
-
-    # Clean hover
-    hover_tmpl = f"%{{y}}<br>{xlabel}: %{{x:.{dec}f}}<extra></extra>"
-    fig.update_traces(hovertemplate=hover_tmpl)
-
-    _xmax = float(np.nanmax(pldf["Value"]))
-    if np.isfinite(muni_value):
-        _xmax = max(_xmax, float(muni_value))
-    _pad_factor = 0.15 if show_labels else 0.08
-    _xpad = _pad_factor * _xmax if _xmax > 0 else 1.0
-    fig.update_xaxes(range=[x_lower, _xmax + _xpad])
-
-    if show_labels:
-        fig.update_traces(textposition="outside", cliponaxis=False)
+# ---------- Large-n mode: selections come from the precomputed rank index ----------
+if large_n:
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    ranks = cached.rank_index(snapshot)
+    ln_muni = float(muni_value) if np.isfinite(muni_value) else None
+
+    if ln_view.startswith("Top"):
+        rows = ranks.top(var_col, ln_n, ascending=(ln_end == "Lowest"))
+        sel = df.loc[neigh_df.index[rows]]
+        fig = go.Figure()
+        for g, part in sel.groupby("Group", sort=False):
+            err = dict(type="data", symmetric=False, color="#555555", thickness=1,
+                       array=(part["upper"] - part[var_col]).to_numpy(),
+                       arrayminus=(part[var_col] - part["lower"]).to_numpy()) if has_ci else None
+            fig.add_trace(go.Scattergl(
+                x=part[var_col], y=part["LabelName"], mode="markers", name=g, error_x=err,
+                marker=dict(color=group_colors.get(g, "#888888"), size=10, line=dict(width=1, color="#333333"),
+                            symbol=np.where(has_ci & (part["flag"] != 0), "diamond", "circle")),
+                customdata=part[["CI", "Significance"]].to_numpy(),
+                hovertemplate=f"%{{y}}<br>{xlabel}: %{{x:.{dec}f}}"
+                + ("<br>95% interval: %{customdata[0]}<br>%{customdata[1]} from Ede" if has_ci else "")
+                + "<extra></extra>",
+            ))
+        fig.update_yaxes(categoryorder="array", categoryarray=sel["LabelName"].tolist(),
+                         autorange="reversed", title_text="", automargin=True)
+        fig.update_xaxes(title_text=xlabel)
+        fig.update_layout(height=int(120 + 22 * len(sel)))
     else:
-        fig.update_traces(text=None)
-
-    if np.isfinite(muni_value):
-        xavg = float(muni_value)
-        fig.add_vline(x=xavg, line_width=2, line_color=COL_AVG)
+        counts, edges = ranks.histogram(var_col)
+        ex, ep = ranks.ecdf(var_col)
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
+        fig.add_trace(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                             marker_color=COL_B, name="Neighbourhoods"), secondary_y=False)
+        fig.add_trace(go.Scattergl(x=ex, y=ep, mode="lines", line=dict(color=COL_A, width=2),
+                                   name="Cumulative share"), secondary_y=True)
+        fig.update_yaxes(title_text="Neighbourhoods", secondary_y=False)
+        fig.update_yaxes(title_text="Cumulative share", range=[0, 1], tickformat=".0%", secondary_y=True)
+        fig.update_xaxes(title_text=xlabel)
+        fig.update_layout(height=460, bargap=0.02)
+
+    if ln_muni is not None:
+        below = ranks.share_below(var_col, ln_muni)
+        fig.add_vline(x=ln_muni, line_width=2, line_color=COL_AVG)
         fig.add_annotation(
-            x=xavg, y=1, xref="x", yref="paper",
-            text=f"Ede average: {fmt.format(xavg)}",
-            showarrow=False, xanchor="left", yanchor="bottom", xshift=6,
+            x=ln_muni, y=1, xref="x", yref="paper", showarrow=False, xanchor="left", yanchor="bottom", xshift=6,
+            text=f"Ede average: {fmt.format(ln_muni)}" + (f" ({below:.0%} of neighbourhoods below)" if np.isfinite(below) else ""),
             font=dict(color=COL_AVG),
         )
-
-    fig.update_layout(
-        height=height_px,
-        margin=dict(l=160, r=180, t=30, b=50), 
-        showlegend=True,
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1.0,
-            xanchor="left",
-            x=1.02,  
-            bgcolor="rgba(255,255,255,0.9)",
-        ),
-        legend_title_text="",
-    )
-
+    fig.update_layout(template="plotly_white", margin=dict(l=160, r=40, t=30, b=50),
+                      legend=dict(orientation="h", yanchor="bottom", y=1.06, x=0))
     st.plotly_chart(fig, use_container_width=True, theme=None, config=dict(displayModeBar=False))
 
-    table_df = pldf.rename(columns={"Neighbourhood": "Neighbourhood", "Value": xlabel})
-    table_df = table_df[["Neighbourhood", "Group", xlabel]]
-    st.dataframe(table_df, use_container_width=True, hide_index=True)
-
-    rendered_interactive = True  
-except Exception:
+    # Paginated table, sorted server-side (fragment: paging reruns only the table)
+    @tracked("Dashboard: table")
+    def ranked_table():
+        t1, t2, t3 = st.columns([2, 1, 1])
+        tbl_order = t1.radio("Table order", ["Descending", "Ascending"], horizontal=True)
+        page_size = t2.selectbox("Rows per page", [25, 50, 100], index=1)
+        n_pages = max(1, -(-len(ranks) // page_size))
+        page = int(t3.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1)) - 1
+        rows = ranks.page(var_col, page, page_size, ascending=(tbl_order == "Ascending"))
+        page_df = df.reindex(neigh_df.index[rows])
+        tbl = pd.DataFrame({
+            "Rank": np.arange(page * page_size + 1, page * page_size + len(rows) + 1),
+            "Neighbourhood": neigh_df[name_col].iloc[rows].astype(str).to_numpy(),
+            xlabel: pd.to_numeric(neigh_df[var_col].iloc[rows], errors="coerce").to_numpy(),
+        })
+        if has_ci:
+            tbl["95% interval"] = page_df["CI"].to_numpy()
+            tbl["vs Ede"] = page_df["Significance"].to_numpy()
+        st.dataframe(tbl, use_container_width=True, hide_index=True)
+        st.caption(f"Large-n mode: {len(ranks):,} neighbourhoods. Charts and table pages are sliced from a "
+                   "precomputed ordering and binned distribution per indicator."
+                   + (" Diamonds mark significant differences from Ede." if has_ci and ln_view.startswith("Top") else ""))
+
+    ranked_table()
+else:
+    # ---------- Try interactive Plotly, else Matplotlib ----------
     rendered_interactive = False
-
-# ---------- Static chart fallback ----------
-if not rendered_interactive:
-    plt.style.use("default")
-    row_h     = 0.48
-    fig_h     = max(3.6, row_h * n + 1.2) * HEIGHT_SCALE
-    left_mar  = min(0.35, 0.08 + 0.012 * max(len(s) for s in names))
-
-    fig, ax = plt.subplots(figsize=(11.5, fig_h), dpi=140)
-    ypos = np.arange(n)
-    bar_colors = np.where(df["is_A"].to_numpy(), COL_A, COL_B)
-    ax.barh(ypos, vals, height=0.62, color=bar_colors)
-
-    ax.set_yticks(ypos)
-    ax.set_yticklabels(names)
-    ax.invert_yaxis()
-    ax.set_xlabel(xlabel)
-    ax.set_ylabel("")
-    ax.set_xlim(x_lower, x_upper)
-    ax.grid(axis="x", linestyle=":", linewidth=0.8, alpha=0.6)
-    ax.spines["top"].set_visible(False); ax.spines["right"].set_visible(False)
-
-    if show_labels:
-        span = (x_upper - x_lower); thr = 0.15 * span
-        for y, v in zip(ypos, vals):
-            text = fmt.format(v)
-            if v - x_lower > thr:
-                ax.text(v - 0.01*span, y, text, va="center", ha="right",
-                        color="white", fontsize=9, fontweight="semibold")
+    try:
+        import plotly.express as px
+        import plotly.io as pio
+
+        height_px = int(max(3.6, 0.48 * n + 1.2) * 140 * HEIGHT_SCALE)
+
+        pldf = df.rename(columns={"LabelName": "Neighbourhood", var_col: "Value"})[
+            ["Neighbourhood", "Value", "Group", "lower", "upper", "Significance", "CI"]
+        ].astype({"Value": float})
+        # Pre-format labels to avoid trace misalignment
+        pldf["ValueText"] = [fmt.format(v) for v in pldf["Value"].values]
+        pldf["err_plus"] = (pldf["upper"] - pldf["Value"]).where(pldf["upper"] > pldf["lower"])
+        pldf["err_minus"] = (pldf["Value"] - pldf["lower"]).where(pldf["upper"] > pldf["lower"])
+
+        # Figure JSON is cached on disk per data content and view settings (shared across sessions)
+        chart_key = RENDER_CACHE.key(
+            content_key(CATALOG, NEIGH_GJSON, MUNI_GJSON), "dashboard-bar",
+            var_col=var_col, sort_order=sort_order, show_labels=show_labels,
+            types=(type_scope, n_types) if use_types else None, ci=has_ci,
+        )
+        fig_json = RENDER_CACHE.get(chart_key)
+        if fig_json is not None:
+            fig = pio.from_json(fig_json)
+        else:
+            # Bars that differ significantly from Ede are hatched; whiskers show the 95% interval
+            ci_args = dict(
+                error_x="err_plus", error_x_minus="err_minus", pattern_shape="Significance",
+                pattern_shape_map={FLAG_LABELS[-1]: "/", FLAG_LABELS[0]: "", FLAG_LABELS[1]: "/"},
+            ) if has_ci else {}
+            fig = px.bar(
+                pldf,
+                x="Value",
+                y="Neighbourhood",
+                color="Group",
+                text="ValueText",
+                hover_data={"ValueText": False, "Group": True},
+                orientation="h",
+                category_orders={"Neighbourhood": pldf["Neighbourhood"].tolist()},
+                template="plotly_white",
+                color_discrete_map=group_colors,
+                custom_data=["CI", "Significance"],
+                **ci_args,
+            )
+            fig.update_xaxes(title_text=xlabel, zeroline=False, fixedrange=True)
+            fig.update_yaxes(title_text="", automargin=True, fixedrange=True)
+
+            # Clean hover
+            hover_tmpl = f"%{{y}}<br>{xlabel}: %{{x:.{dec}f}}"
+            if has_ci:
+                hover_tmpl += "<br>95% interval: %{customdata[0]}<br>%{customdata[1]} from Ede"
+            hover_tmpl += "<extra></extra>"
+            fig.update_traces(hovertemplate=hover_tmpl)
+
+            _xmax = float(np.nanmax(pldf["upper"] if has_ci else pldf["Value"]))
+            if np.isfinite(muni_value):
+                _xmax = max(_xmax, float(muni_value))
+            _pad_factor = 0.15 if show_labels else 0.08
+            _xpad = _pad_factor * _xmax if _xmax > 0 else 1.0
+            fig.update_xaxes(range=[x_lower, _xmax + _xpad])
+
+            if show_labels:
+                fig.update_traces(textposition="outside", cliponaxis=False)
             else:
-                ax.text(v + 0.01*span, y, text, va="center", ha="left", color="#222", fontsize=9)
-
+                fig.update_traces(text=None)
+
+            if np.isfinite(muni_value):
+                xavg = float(muni_value)
+                fig.add_vline(x=xavg, line_width=2, line_color=COL_AVG)
+                fig.add_annotation(
+                    x=xavg, y=1, xref="x", yref="paper",
+                    text=f"Ede average: {fmt.format(xavg)}",
+                    showarrow=False, xanchor="left", yanchor="bottom", xshift=6,
+                    font=dict(color=COL_AVG),
+                )
+
+            fig.update_layout(
+                height=height_px,
+                margin=dict(l=160, r=180, t=30, b=50), 
+                showlegend=True,
+                legend=dict(
+                    orientation="v",
+                    yanchor="top",
+                    y=1.0,
+                    xanchor="left",
+                    x=1.02,  
+                    bgcolor="rgba(255,255,255,0.9)",
+                ),
+                legend_title_text="",
+            )
+            RENDER_CACHE.put(chart_key, fig.to_json())
+
+        st.plotly_chart(fig, use_container_width=True, theme=None, config=dict(displayModeBar=False))
+
+        table_df = pldf.rename(columns={"Neighbourhood": "Neighbourhood", "Value": xlabel,
+                                        "CI": "95% interval", "Significance": "vs Ede"})
+        table_df = table_df[["Neighbourhood", "Group", xlabel] + (["95% interval", "vs Ede"] if has_ci else [])]
+        st.dataframe(table_df, use_container_width=True, hide_index=True)
+
+        rendered_interactive = True  
+    except Exception:
+        rendered_interactive = False
+
+    # ---------- Static chart fallback ----------
+    if not rendered_interactive:
+        plt.style.use("default")
+        row_h     = 0.48
+        fig_h     = max(3.6, row_h * n + 1.2) * HEIGHT_SCALE
+        left_mar  = min(0.35, 0.08 + 0.012 * max(len(s) for s in names))
+
+        fig, ax = plt.subplots(figsize=(11.5, fig_h), dpi=140)
+        bar_colors = df["Group"].map(group_colors).to_numpy()
+        draw_bar_comparison(ax, names, vals, bar_colors, muni_value, xlabel, show_labels, fmt,
+                            *((df["lower"], df["upper"], df["flag"] != 0) if has_ci else ()))
+
+        # Legend for the display groups (Veldhuizen A/B or typology)
+        present = set(df["Group"])
+        legend_handles = [
+            Patch(facecolor=c, edgecolor=c, label=g) for g, c in group_colors.items() if g in present
+        ]
+        ax.legend(handles=legend_handles, title="", loc="lower right", frameon=False)
+
+        fig.subplots_adjust(left=left_mar, right=0.97, top=0.92, bottom=0.12)
+        st.pyplot(fig)
+
+        # Table
+        tbl = df.rename(columns={"LabelName": "Neighbourhood", var_col: xlabel})[
+            ["LabelName", "Group", var_col] + (["CI", "Significance"] if has_ci else [])
+        ].rename(columns={"LabelName": "Neighbourhood", var_col: xlabel, "CI": "95% interval", "Significance": "vs Ede"})
+        st.dataframe(tbl, use_container_width=True, hide_index=True)
+
+    # ---------- Caption ----------
     if np.isfinite(muni_value):
-        xavg = float(muni_value)
-        ax.axvline(x=xavg, color=COL_AVG, linewidth=2)
-        ax.text(xavg, -0.7, f"Ede average: {fmt.format(xavg)}",
-                color=COL_AVG, ha="left", va="bottom", fontsize=10,
-                bbox=dict(facecolor="white", alpha=0.85, edgecolor="none", pad=1.5))
-
-    # Legend for Veldhuizen A/B
-    legend_handles = [
-        Patch(facecolor=COL_A, edgecolor=COL_A, label="Veldhuizen A"),
-        Patch(facecolor=COL_B, edgecolor=COL_B, label="Veldhuizen B"),
-    ]
-    ax.legend(handles=legend_handles, title="", loc="lower right", frameon=False)
-
-    fig.subplots_adjust(left=left_mar, right=0.97, top=0.92, bottom=0.12)
-    st.pyplot(fig)
-
-    # Table
-    tbl = df.rename(columns={"LabelName": "Neighbourhood", var_col: xlabel})[
-        ["LabelName", "Group", var_col]
-    ].rename(columns={"LabelName": "Neighbourhood", var_col: xlabel})
-    st.dataframe(tbl, use_container_width=True, hide_index=True)
-
-# ---------- Caption ----------
-if np.isfinite(muni_value):
-    st.caption(f"Tip: the dark green line marks the Ede municipal average (≈ {fmt.format(float(muni_value))}).")
-else:
-    st.caption("Tip: the dark green line marks the Ede municipal average.")
+        st.caption(f"Tip: the dark green line marks the Ede municipal average (≈ {fmt.format(float(muni_value))}).")
+    else:
+        st.caption("Tip: the dark green line marks the Ede municipal average.")
+    if has_ci:
+        approx = (df["interval"] == "approx").any()
+        st.caption("Whiskers show 95% intervals; hatched bars differ significantly from Ede."
+                   + (" Intervals are approximate (binomial, nominal survey size) where RIVM bounds are not in the data."
+                      if approx else ""))
+
+# ---------- Typology diagnostics ----------
+if use_types:
+    with st.expander("Typology diagnostics", expanded=False):
+        diag = cached.typology_sweep(snapshot, tuple(type_cols), len(TYPE_COLORS))
+        st.dataframe(
+            diag.rename(columns={"k": "Types (k)", "inertia": "Inertia",
+                                 "seconds": "Run time (s)", "iterations": "Iterations"}),
+            use_container_width=True, hide_index=True,
+        )
+        st.caption("K-means on standardized indicators; missing values are filled with the indicator mean.")
+
+# ---------- Similar neighbourhoods (fragment) ----------
+st.divider()
+@tracked("Dashboard: similar neighbourhoods")
+def similar_panel():
+    with st.expander("Similar neighbourhoods", expanded=False):
+        try:
+            index = similarity_index(snapshot)
+        except Exception as e:
+            index = None
+            st.warning(f"Similarity index unavailable.\n\n{e}")
+        if index is not None and len(index) > 1:
+            s1, s2, s3 = st.columns([2, 1, 1])
+            ref_name = s1.selectbox("Neighbourhood", sorted(set(index.names)))
+            k_sim = s2.slider("How many", 1, min(25, len(index) - 1), min(5, len(index) - 1))
+            by_dim = s3.checkbox(f"Only '{sel_dim}'", value=False)
+            ref_key = index.keys[list(index.names).index(ref_name)]
+            dim_cols = subset["column"].tolist() if by_dim else None
+            sim = index.query(ref_key, k=k_sim, columns=dim_cols)
+            sim = sim.rename(columns={"code": "Code", "name": "Neighbourhood",
+                                      "distance": "Distance", "shared": "Indicators compared"})
+            st.dataframe(sim, use_container_width=True, hide_index=True)
+            st.caption("Distance is computed on standardized catalog indicators (missing values skipped); smaller is more similar.")
+
+
+similar_panel()
 
 # ---------- Collapsible notes ----------
 st.divider()
 with st.expander("Notes", expanded=False):
     st.markdown(
         """
-**What this view demonstrates.** A single indicator (selected from the catalog) is compared across all neighbourhoods in Veldhuizen, with the Ede municipal value shown as a reference line for context. Neighbourhoods are coloured by a simple display grouping: **Veldhuizen A** (De Horsten, De Burgen) versus **Veldhuizen B** (all others). The grouping affects colour and labels only.
+**What this view demonstrates.** A single indicator (selected from the catalog) is compared across all neighbourhoods in Veldhuizen, with the Ede municipal value shown as a reference line for context. Neighbourhoods are coloured by a simple display grouping: **Veldhuizen A** (De Horsten, De Burgen) versus **Veldhuizen B** (all others). The grouping affects colour and labels only. Alternatively, **Colour by → Typology** groups neighbourhoods into data-driven types (k-means on the standardized catalog indicators). For large region sets, **Large-n mode** replaces the full bar chart with top/bottom-N and distribution views and a paginated table.
 """
     )
+
+rerun_stats_panel()
+memory_panel("Dashboard")
@@ -2,14 +2,32 @@
 from __future__ import annotations
 from pathlib import Path
 import json
+import time
 import numpy as np
 import pandas as pd
 import streamlit as st
 import folium
-from branca.colormap import LinearColormap, StepColormap
 from branca.element import Element
 from folium.features import DivIcon
+from folium.plugins import Draw, StripePattern
 import streamlit.components.v1 as components
+from streamlit_folium import st_folium
+
+from twin import cached
+from twin.areal import WEIGHTINGS, aggregate, circle, drawn_geometry
+from twin.clustering import TYPE_COLORS, type_label
+from twin.compare import MAP_CLASSES, MAP_CLASSIFICATIONS, MAP_COLOR_MODES, map_colormap
+from twin.data import AMENITIES_GJSON, BENCHES_GJSON, STREETS_GJSON, content_key, snapshot_key
+from twin.dataplane import PLANE
+from twin.fragments import page_run, rerun_stats_panel, tracked
+from twin.geometry import polygons_of
+from twin.margins import FLAG_LABELS
+from twin.memwatch import memory_panel
+from twin.overlay import overlay
+from twin.points import CLUSTER_PX, cluster, point_layers
+from twin.render_cache import RENDER_CACHE
+from twin.validate import page_gate
+from twin.walking import AMENITY_COLUMNS
 
 # -------------------- Paths --------------------
 APP_ROOT = Path(__file__).resolve().parents[1]
@@ -22,10 +40,6 @@ GJ_WIJK  = DATA_DIR / "wijkenbuurtenwijken.geojson"
 GJ_VELD  = DATA_DIR / "wijk_boundary_veld.geojson"       
 
 MAP_HEIGHTS = {"Half-page": 460, "Normal": 700, "Full-page": 1000}
-PALETTE_RED = [
-    "#fff5f0","#fcbba1","#fc9272","#fb6a4a",
-    "#ef3b2c","#cb181d","#99000d","#67000d","#3b0008"
-]
 
 # -------------------- Helpers --------------------
 def load_geojson(p: Path) -> dict:
@@ -36,6 +50,17 @@ def load_geojson(p: Path) -> dict:
     gj.setdefault("features", [])
     return gj
 
+@st.cache_resource(show_spinner=False)
+def base_layer(p: Path, snapshot: str, level: str | None = None) -> dict:
+    # Loaded once per process and shared by all sessions: never modify, use twin.overlay.
+    # Region layers come from the shared data plane when one is published (twin.dataplane)
+    if level and PLANE.refresh():
+        try:
+            return PLANE.features(level)
+        except KeyError:
+            pass
+    return load_geojson(p)
+
 def feats(gj: dict):
     return gj.get("features", [])
 
@@ -43,16 +68,10 @@ def get_prop(f: dict, key: str, default=None):
     return f.get("properties", {}).get(key, default)
 
 def extract_ring_points(geom: dict, out_list: list):
-    if not geom: return
-    t, c = geom.get("type"), geom.get("coordinates")
-    if t == "Polygon" and c and c[0]:
-        for pt in c[0]:
-            if isinstance(pt, (list, tuple)) and len(pt) >= 2:
-                out_list.append((float(pt[0]), float(pt[1])))  # (lon, lat)
-    elif t == "MultiPolygon" and c and c[0] and c[0][0]:
-        for pt in c[0][0]:
-            if isinstance(pt, (list, tuple)) and len(pt) >= 2:
-                out_list.append((float(pt[0]), float(pt[1])))
+    # Outer ring of the first polygon; rings may be lists or (data plane) arrays
+    polys = polygons_of(geom)
+    if polys:
+        out_list.extend(map(tuple, polys[0][0].tolist()))  # (lon, lat)
 
 def bounds_of(gj: dict):
     pts = []
@@ -73,15 +92,6 @@ def top_label_point(gj: dict):
     lon, lat = max(pts, key=lambda xy: xy[1])
     return (lat, lon)
 
-def combined_min_max(values):
-    arr = np.array([v for v in values if v is not None and np.isfinite(v)], dtype=float)
-    if arr.size == 0:
-        return 0.0, 1.0
-    vmin, vmax = float(arr.min()), float(arr.max())
-    if vmin == vmax:
-        vmin -= 0.5; vmax += 0.5
-    return vmin, vmax
-
 def color_for_value(x, cmap):
     try:
         xx = float(x)
@@ -102,12 +112,13 @@ def add_outline(gj: dict, fmap, name, color="#111", weight=1.2, pane=None):
         "interactive": False
     }
     folium.GeoJson(
-        data=gj, name=name, pane=pane,
+        data=overlay(gj), name=name, pane=pane,
         style_function=lambda f: style
     ).add_to(fmap)
 
 # -------------------- UI --------------------
 st.set_page_config(page_title="Map • Veldhuizen vs Ede", layout="wide")
+page_run("Map")
 
 # Kill any iframe border/focus ring Streamlit might add
 st.markdown(
@@ -115,25 +126,19 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-missing = [p for p in [CATALOG_CSV, GJ_NEIGH, GJ_MUNI] if not p.exists()]
-if missing:
-    st.error("Missing required files: " + ", ".join(p.name for p in missing))
-    st.stop()
-
-catalog = pd.read_csv(CATALOG_CSV)
-need = {"dimension","label","column","unit"}
-miss = need - set(catalog.columns)
-if miss:
-    st.error(f"variables_catalog.csv missing columns: {miss}")
-    st.stop()
+# Files, catalog coverage, codes and geometry are validated once per data snapshot (twin.validate)
+data_snapshot = snapshot_key(CATALOG_CSV, GJ_NEIGH, GJ_MUNI)
+page_gate(cached.quality(data_snapshot))
+catalog = cached.catalog(data_snapshot)
 
-neigh_gj = load_geojson(GJ_NEIGH)
-muni_gj  = load_geojson(GJ_MUNI)
-wijk_gj  = load_geojson(GJ_WIJK) if GJ_WIJK.exists() else {"type":"FeatureCollection","features":[]}
-veld_gj  = load_geojson(GJ_VELD) if GJ_VELD.exists() else {"type":"FeatureCollection","features":[]}
+layers_snapshot = snapshot_key(GJ_NEIGH, GJ_MUNI, GJ_WIJK, GJ_VELD)
+neigh_gj = base_layer(GJ_NEIGH, layers_snapshot, "buurt")
+muni_gj  = base_layer(GJ_MUNI, layers_snapshot, "gemeente")
+wijk_gj  = base_layer(GJ_WIJK, layers_snapshot, "wijk") if GJ_WIJK.exists() else {"type":"FeatureCollection","features":[]}
+veld_gj  = base_layer(GJ_VELD, layers_snapshot) if GJ_VELD.exists() else {"type":"FeatureCollection","features":[]}
 
 st.sidebar.header("Choose indicator")
-dimensions = sorted(pd.Series(catalog["dimension"]).dropna().unique().tolist())
+dimensions = sorted(catalog["dimension"].unique().tolist())
 sel_dim = st.sidebar.selectbox("Dimension", dimensions, index=0)
 
 subset = catalog[catalog["dimension"] == sel_dim].copy()
@@ -144,19 +149,17 @@ row = subset[subset["label"] == sel_label].iloc[0]
 var_col = str(row["column"])
 unit    = str(row.get("unit","")).strip()
 
-color_mode = st.sidebar.radio("Color mode", ["Continuous gradient", "Discrete classes"], index=0)
+color_mode = st.sidebar.radio("Color mode", MAP_COLOR_MODES, index=0)
 if color_mode == "Discrete classes":
-    classes = st.sidebar.selectbox("Classification", ["Equal interval","Quantile"], index=0)
-    k = st.sidebar.slider("Number of classes", 5, 9, 7)
+    classes = st.sidebar.selectbox("Classification", MAP_CLASSIFICATIONS, index=0)
+    k = st.sidebar.slider("Number of classes", MAP_CLASSES[0], MAP_CLASSES[-1], 7)
 else:
     classes, k = "Equal interval", 7
 
 st.sidebar.markdown("---")
-show_wijk = st.sidebar.checkbox("Show district (wijk) boundaries", True)
-show_muni_outline = st.sidebar.checkbox("Show municipality outline", True)
-show_veld_outline = st.sidebar.checkbox("Highlight Veldhuizen outline", True)
-size = st.sidebar.radio("Map size", list(MAP_HEIGHTS.keys()), index=0, horizontal=True)
-map_height = MAP_HEIGHTS[size]
+show_types = st.sidebar.checkbox("Colour neighbourhoods by typology", False)
+if show_types:
+    n_types = st.sidebar.slider("Number of types", 2, max(2, min(len(TYPE_COLORS), len(feats(neigh_gj)) - 1)), 3)
 
 # -------------------- Values & colormap --------------------
 neigh_vals = []
@@ -178,33 +181,34 @@ for f in feats(muni_gj):
 # Use a single municipality value if any; combine for vmin/vmax
 muni_val = next((v for v in muni_vals if v is not None and np.isfinite(v)), None)
 combined = neigh_vals + ([muni_val] if muni_val is not None else [])
-vmin, vmax = combined_min_max(combined)
-
-if color_mode == "Continuous gradient":
-    cmap = LinearColormap(colors=PALETTE_RED, vmin=vmin, vmax=vmax)
-else:
-    finite_vals = [x for x in combined if x is not None and np.isfinite(x)]
-    if classes.lower().startswith("quantile") and len(finite_vals) >= k:
-        qs = np.linspace(0, 1, k + 1)
-        bins = list(np.quantile(finite_vals, qs))
-        for i in range(1, len(bins)):
-            if bins[i] <= bins[i-1]:
-                bins[i] = bins[i-1] + 1e-9
-    else:
-        bins = list(np.linspace(vmin, vmax, k + 1))
-    rng = abs(bins[-1]-bins[0])
-    if rng >= 100:  bins = [round(b,0) for b in bins]
-    elif rng >= 10: bins = [round(b,1) for b in bins]
-    else:           bins = [round(b,2) for b in bins]
-    cmap = StepColormap(colors=PALETTE_RED[:k], index=bins, vmin=bins[0], vmax=bins[-1])
+cmap = map_colormap(combined, color_mode, classes, k)
+
+# -------------------- Typology layer --------------------
+type_by_code = {}
+if show_types and len(feats(neigh_gj)) > 2:
+    types = cached.typology(data_snapshot, tuple(catalog["column"]), n_types)
+    type_by_code = dict(zip(types["buurtcode"], types["type_id"]))
+
+# -------------------- Significance vs Ede --------------------
+# Intervals and flags are precomputed per data snapshot (twin.margins); only survey-based
+# indicators are hatched, registrations have no sampling error
+neigh_codes = [str(get_prop(f, "buurtcode", "")) for f in feats(neigh_gj)]
+margins = cached.margins(data_snapshot)
+margins = margins[margins["column"] == var_col].set_index("code").reindex(neigh_codes)
+sampled = margins["interval"].isin(["published", "approx"]).to_numpy()
+neigh_flags = np.where(sampled, margins["flag"].fillna(0).to_numpy(), 0).astype(int)
+
+def type_color(feat) -> str:
+    t = type_by_code.get(str(get_prop(feat, "buurtcode", "")))
+    return TYPE_COLORS[t] if t is not None else "#cccccc"
 
 # -------------------- Tooltip fields --------------------
-# Normalise name field
-for f in feats(neigh_gj):
-    p = f.setdefault("properties", {})
-    p["buurtnaam"] = (
-        p.get("buurtnaam") or p.get("Buurtnaam") or p.get("name") or p.get("NAAM") or "Unknown"
-    )
+# Per-render attribute columns, merged into a copy of the layers in render_map()
+# (the cached base layers are shared by all sessions and stay untouched)
+neigh_names = [
+    get_prop(f, "buurtnaam") or get_prop(f, "Buurtnaam") or get_prop(f, "name") or get_prop(f, "NAAM") or "Unknown"
+    for f in feats(neigh_gj)
+]
 
 vals_clean = [v for v in neigh_vals if v is not None and np.isfinite(v)]
 maxv = max(vals_clean) if vals_clean else None
@@ -214,45 +218,54 @@ def fmt_unit_label(label: str, unit: str) -> str:
     u = (f" ({unit})" if unit and unit != "-" else "")
     return f"{label}{u}"
 
-# Per-neighbourhood: format values + extra lines
-for f in feats(neigh_gj):
-    p = f.setdefault("properties", {})
+def value_text(v) -> str:
     try:
-        val = float(p.get(var_col, None))
+        val = float(v)
         if not np.isfinite(val):
             raise ValueError
-        p["_valtxt"] = f"{val:,.{decimals}f}"
+        return f"{val:,.{decimals}f}"
     except Exception:
-        p["_valtxt"] = "n/a"
-    p["_subtitle"] = "Neighbourhood in Ede-Veldhuizen"
-    p["_valpair"]  = f"{fmt_unit_label(sel_label, unit)}: {p['_valtxt']}"
+        return "n/a"
+
+# Per-neighbourhood: format values + extra lines
+neigh_valtxt = [value_text(get_prop(f, var_col, None)) for f in feats(neigh_gj)]
+neigh_types = [type_by_code.get(str(get_prop(f, "buurtcode", ""))) for f in feats(neigh_gj)]
+neigh_fields = {
+    "buurtnaam": neigh_names,
+    "_valtxt": neigh_valtxt,
+    "_subtitle": ["Neighbourhood in Ede-Veldhuizen"] * len(neigh_names),
+    "_valpair": [f"{fmt_unit_label(sel_label, unit)}: {t}" for t in neigh_valtxt],
+    "_type": [f"Typology: {type_label(t)}" if t is not None else "" for t in neigh_types],
+    "_ci": [
+        f"95% interval: {lo:,.1f}–{hi:,.1f} • {FLAG_LABELS[fl].lower()} from Ede" if ok else ""
+        for lo, hi, fl, ok in zip(margins["lower"], margins["upper"], neigh_flags, sampled)
+    ],
+}
 
 # Per-municipality feature
-for f in feats(muni_gj):
-    p = f.setdefault("properties", {})
-    try:
-        mval = float(p.get(var_col, None))
-        if not np.isfinite(mval):
-            raise ValueError
-        p["_valtxt"] = f"{mval:,.{decimals}f}"
-    except Exception:
-        p["_valtxt"] = "n/a"
-    p["_muniname"] = p.get("gemeentenaam", "Ede (municipality)")
-    p["_title"]    = "Ede (municipality)"
-    p["_valpair"]  = f"{fmt_unit_label(sel_label, unit)}: {p['_valtxt']}"
+muni_valtxt = [value_text(get_prop(f, var_col, None)) for f in feats(muni_gj)]
+muni_fields = {
+    "_valtxt": muni_valtxt,
+    "_muniname": [get_prop(f, "gemeentenaam", "Ede (municipality)") for f in feats(muni_gj)],
+    "_title": ["Ede (municipality)"] * len(muni_valtxt),
+    "_valpair": [f"{fmt_unit_label(sel_label, unit)}: {t}" for t in muni_valtxt],
+}
 
 # -------------------- Map --------------------
-m = folium.Map(
-    location=[52.04, 5.66],  
-    zoom_start=11,
-    tiles="cartodbpositron",
-    control_scale=False,
-    scrollWheelZoom=True,
-    doubleClickZoom=True,
-    zoom_control=True,
-)
+def render_map(show_wijk: bool, show_muni_outline: bool, show_veld_outline: bool, show_sig: bool) -> str:
+    """Build the folium map for the current sidebar state and display options and return its HTML."""
+    hatch_mask = show_sig & (neigh_flags != 0)
+    m = folium.Map(
+        location=[52.04, 5.66],  
+        zoom_start=11,
+        tiles="cartodbpositron",
+        control_scale=False,
+        scrollWheelZoom=True,
+        doubleClickZoom=True,
+        zoom_control=True,
+    )
 
-m.get_root().header.add_child(Element("""
+    m.get_root().header.add_child(Element("""
 <style>
 .nohit-outline { pointer-events: none !important; }
 .leaflet-control-attribution { display:none !important; }
@@ -274,73 +287,108 @@ m.get_root().header.add_child(Element("""
 </style>
 """))
 
-# Layer panes
-folium.map.CustomPane("municipality-pane", z_index=300).add_to(m)
-folium.map.CustomPane("neighbourhoods-pane", z_index=400).add_to(m)
-folium.map.CustomPane("outline-pane", z_index=500).add_to(m)
-folium.map.CustomPane("label-pane", z_index=550).add_to(m)
-
-# Municipality
-folium.GeoJson(
-    data=muni_gj,
-    name=f"Ede (municipality) – {sel_label}",
-    pane="municipality-pane",
-    style_function=lambda feat: {
-        "fillOpacity": 0.55,
-        "fillColor": color_for_value(get_prop(feat, var_col, None), cmap),
-        "color": "#555555",
-        "weight": 0.7,
-        "interactive": True,
-    },
-    tooltip=folium.GeoJsonTooltip(
-        fields=["_title", "_valpair"],
-        aliases=["", ""],
-        sticky=True, labels=False, localize=False
-    ),
-).add_to(m)
-
-# Neighbourhoods
-folium.GeoJson(
-    data=neigh_gj,
-    name=f"Veldhuizen neighbourhoods – {sel_label}",
-    pane="neighbourhoods-pane",
-    style_function=lambda feat: {
-        "fillOpacity": 0.85,
-        "fillColor": color_for_value(get_prop(feat, var_col, None), cmap),
-        "color": "#333333",
-        "weight": 0.6,
-    },
-    highlight_function=lambda feat: {"fillOpacity": 0.92, "weight": 2.0, "color": "#222222"},
-    tooltip=folium.GeoJsonTooltip(
-        fields=["buurtnaam", "_subtitle", "_valpair"],
-        aliases=["", "", ""],
-        sticky=True, labels=False, localize=False
-    ),
-).add_to(m)
-
-if show_wijk and feats(wijk_gj):
-    add_outline(wijk_gj, m, "Wijk boundaries", color="#222", weight=1.0, pane="outline-pane")
-if show_muni_outline:
-    add_outline(muni_gj, m, "Municipality outline", color="#000", weight=1.6, pane="outline-pane")
-if show_veld_outline and feats(veld_gj):
-    add_outline(veld_gj, m, "Veldhuizen outline", color="#1f77b4", weight=2.2, pane="outline-pane")
-
-# Perimeter label
-tp = top_label_point(veld_gj) if feats(veld_gj) else None
-if tp:
-    lat, lon = tp
-    folium.Marker(
-        location=[lat, lon],
-        icon=DivIcon(class_name="map-perimeter-label", html="Ede–Veldhuizen"),
-        pane="label-pane",
+    # Layer panes
+    folium.map.CustomPane("municipality-pane", z_index=300).add_to(m)
+    folium.map.CustomPane("neighbourhoods-pane", z_index=400).add_to(m)
+    folium.map.CustomPane("hatch-pane", z_index=450).add_to(m)
+    folium.map.CustomPane("outline-pane", z_index=500).add_to(m)
+    folium.map.CustomPane("label-pane", z_index=550).add_to(m)
+
+    # Municipality
+    folium.GeoJson(
+        data=overlay(muni_gj, muni_fields),
+        name=f"Ede (municipality) – {sel_label}",
+        pane="municipality-pane",
+        style_function=lambda feat: {
+            "fillOpacity": 0.55,
+            "fillColor": color_for_value(get_prop(feat, var_col, None), cmap),
+            "color": "#555555",
+            "weight": 0.7,
+            "interactive": True,
+        },
+        tooltip=folium.GeoJsonTooltip(
+            fields=["_title", "_valpair"],
+            aliases=["", ""],
+            sticky=True, labels=False, localize=False
+        ),
     ).add_to(m)
 
-# Legend (shared scale)
-cmap.caption = f"{sel_label}" + (f"  [{unit}]" if unit and unit != "-" else "")
-cmap.add_to(m)
+    # Neighbourhoods
+    folium.GeoJson(
+        data=overlay(neigh_gj, neigh_fields),
+        name=f"Veldhuizen neighbourhoods – {sel_label}",
+        pane="neighbourhoods-pane",
+        style_function=lambda feat: {
+            "fillOpacity": 0.85,
+            "fillColor": type_color(feat) if type_by_code else color_for_value(get_prop(feat, var_col, None), cmap),
+            "color": "#333333",
+            "weight": 0.6,
+        },
+        highlight_function=lambda feat: {"fillOpacity": 0.92, "weight": 2.0, "color": "#222222"},
+        tooltip=folium.GeoJsonTooltip(
+            fields=["buurtnaam", "_subtitle", "_valpair", "_ci", "_type"],
+            aliases=["", "", "", "", ""],
+            sticky=True, labels=False, localize=False
+        ),
+    ).add_to(m)
 
-# Fit to municipality bounds
-m.fit_bounds(bounds_of(muni_gj))
+    # Hatching over neighbourhoods that differ significantly from Ede
+    if hatch_mask.any():
+        stripes = StripePattern(angle=-45, weight=2, space_weight=6, color="#222222",
+                                opacity=0.7, space_opacity=0.0)
+        stripes.add_to(m)
+        hatched = {"type": "FeatureCollection",
+                   "features": [f for f, h in zip(feats(neigh_gj), hatch_mask) if h]}
+        folium.GeoJson(
+            data=overlay(hatched), name="Significant vs Ede", pane="hatch-pane",
+            style_function=lambda f: {"fillPattern": stripes, "fillOpacity": 1.0, "weight": 0,
+                                      "className": "nohit-outline", "interactive": False},
+        ).add_to(m)
+
+    if show_wijk and feats(wijk_gj):
+        add_outline(wijk_gj, m, "Wijk boundaries", color="#222", weight=1.0, pane="outline-pane")
+    if show_muni_outline:
+        add_outline(muni_gj, m, "Municipality outline", color="#000", weight=1.6, pane="outline-pane")
+    if show_veld_outline and feats(veld_gj):
+        add_outline(veld_gj, m, "Veldhuizen outline", color="#1f77b4", weight=2.2, pane="outline-pane")
+
+    # Perimeter label
+    tp = top_label_point(veld_gj) if feats(veld_gj) else None
+    if tp:
+        lat, lon = tp
+        folium.Marker(
+            location=[lat, lon],
+            icon=DivIcon(class_name="map-perimeter-label", html="Ede–Veldhuizen"),
+            pane="label-pane",
+        ).add_to(m)
+
+    # Legend (shared scale)
+    cmap.caption = f"{sel_label}" + (f"  [{unit}]" if unit and unit != "-" else "")
+    cmap.add_to(m)
+
+    # Typology legend (categorical)
+    if type_by_code:
+        rows = "".join(
+            f"<div><span style='display:inline-block;width:12px;height:12px;margin-right:6px;background:{TYPE_COLORS[i]}'></span>{type_label(i)}</div>"
+            for i in sorted(set(type_by_code.values()))
+        )
+        m.get_root().html.add_child(Element(
+            "<div style='position:absolute;bottom:24px;left:12px;z-index:10060;background:rgba(255,255,255,0.9);"
+            f"padding:6px 10px;border-radius:6px;font:12px sans-serif;'><b>Neighbourhood typology</b>{rows}</div>"
+        ))
+
+    if hatch_mask.any():
+        m.get_root().html.add_child(Element(
+            "<div style='position:absolute;bottom:24px;right:12px;z-index:10060;background:rgba(255,255,255,0.9);"
+            "padding:6px 10px;border-radius:6px;font:12px sans-serif;'>"
+            "<span style='display:inline-block;width:12px;height:12px;margin-right:6px;vertical-align:middle;"
+            "background:repeating-linear-gradient(-45deg,#222 0 2px,transparent 2px 6px)'></span>"
+            "Differs significantly from Ede (95%)</div>"
+        ))
+
+    # Fit to municipality bounds
+    m.fit_bounds(bounds_of(muni_gj))
+    return m.get_root().render()
 
 # Info line in Streamlit
 mode_str = "gradient" if color_mode == "Continuous gradient" else f"{classes.lower()}, k={k}"
@@ -350,12 +398,215 @@ st.markdown(
     + f"  •  **Color mode:** {mode_str}"
 )
 
-# -------------------- Render --------------------
+# -------------------- Render (fragment: display options rerun only the map) --------------------
 TOP_SPACER_PX = 40
-html = m.get_root().render()
-html_wrapped = f"<div style='height:{TOP_SPACER_PX}px'></div>{html}"
-components.html(html_wrapped, height=map_height + TOP_SPACER_PX, scrolling=False)
-st.caption("Basemap: CARTO Positron • © OpenStreetMap contributors")
+
+@tracked("Map: map")
+def map_view():
+    o1, o2, o3, o4, o5 = st.columns([1, 1, 1, 1, 1.3])
+    show_wijk = o1.checkbox("Show district (wijk) boundaries", True)
+    show_muni_outline = o2.checkbox("Show municipality outline", True)
+    show_veld_outline = o3.checkbox("Highlight Veldhuizen outline", True)
+    show_sig = o4.checkbox("Hatch significant differences from Ede", True)
+    size = o5.radio("Map size", list(MAP_HEIGHTS.keys()), index=0, horizontal=True)
+    map_height = MAP_HEIGHTS[size]
+
+    # Rendered HTML is cached on disk per data content and map settings (shared across sessions)
+    map_key = RENDER_CACHE.key(
+        content_key(CATALOG_CSV, GJ_NEIGH, GJ_MUNI, GJ_WIJK, GJ_VELD), "map",
+        var_col=var_col, color_mode=color_mode,
+        classes=(classes, k) if color_mode != "Continuous gradient" else None,
+        outlines=(show_wijk, show_muni_outline, show_veld_outline),
+        types=n_types if show_types else None, hatch=show_sig,
+    )
+    html = RENDER_CACHE.get_or_render(
+        map_key, lambda: render_map(show_wijk, show_muni_outline, show_veld_outline, show_sig))
+    html_wrapped = f"<div style='height:{TOP_SPACER_PX}px'></div>{html}"
+    components.html(html_wrapped, height=map_height + TOP_SPACER_PX, scrolling=False)
+    st.caption("Basemap: CARTO Positron • © OpenStreetMap contributors")
+
+
+map_view()
+
+# -------------------- Accessibility what-if (fragment) --------------------
+@tracked("Map: accessibility what-if")
+def accessibility_panel():
+    with st.expander("Accessibility what-if (network distance)", expanded=False):
+        if not (STREETS_GJSON.exists() and AMENITIES_GJSON.exists()):
+            st.info(f"Add `data/{STREETS_GJSON.name}` (street/footpath lines) and `data/{AMENITIES_GJSON.name}` "
+                    "(amenity points with a `class` property) to compute walking distances to services.")
+        else:
+            acc_snapshot = snapshot_key(GJ_NEIGH, STREETS_GJSON, AMENITIES_GJSON)
+            a1, a2, a3, a4 = st.columns([2, 1, 1, 1])
+            acc_label = a1.selectbox("Amenity", [c.replace("_", " ") for c in AMENITY_COLUMNS])
+            acc_cls = acc_label.replace(" ", "_")
+            acc_action = a2.radio("Change", ["add", "remove nearest"], horizontal=False)
+            centre = bounds_of(veld_gj) if feats(veld_gj) else bounds_of(neigh_gj)
+            acc_lat = a3.number_input("Latitude", value=round((centre[0][0] + centre[1][0]) / 2, 5), format="%.5f")
+            acc_lon = a4.number_input("Longitude", value=round((centre[0][1] + centre[1][1]) / 2, 5), format="%.5f")
+
+            with st.spinner("Computing network distances…"):
+                model = cached.accessibility_model(acc_snapshot)
+                after = cached.accessibility_whatif(acc_snapshot, acc_cls, acc_action.split()[0], acc_lon, acc_lat)
+            col = AMENITY_COLUMNS[acc_cls]
+            names = {str(get_prop(f, "buurtcode")): nm for f, nm in zip(feats(neigh_gj), neigh_names)}
+            cbs = {str(get_prop(f, "buurtcode")): get_prop(f, col) for f in feats(neigh_gj)}
+            acc_tbl = pd.DataFrame({
+                "Neighbourhood": [names.get(c, c) for c in after.index],
+                "CBS average (km)": [cbs.get(c) for c in after.index],
+                "Network model (km)": model["baseline"].reindex(after.index)[col].to_numpy(),
+                "What-if (km)": after[col].to_numpy(),
+            })
+            acc_tbl["Change (km)"] = acc_tbl["What-if (km)"] - acc_tbl["Network model (km)"]
+            st.dataframe(acc_tbl.round(2), use_container_width=True, hide_index=True)
+            st.caption("Average shortest walking-network distance from a 50 m grid over each neighbourhood. "
+                       "Changes are applied incrementally to the cached distance field.")
+
+
+accessibility_panel()
+
+# -------------------- Ad-hoc area (fragment) --------------------
+def draw_map(height: int) -> dict | None:
+    """Neighbourhood outlines with drawing tools; returns the drawings (st_folium)."""
+    m = folium.Map(tiles="cartodbpositron", control_scale=False, zoom_control=True)
+    folium.GeoJson(
+        data=overlay(neigh_gj, {"buurtnaam": neigh_names}), name="Neighbourhoods",
+        style_function=lambda f: {"fillOpacity": 0.05, "color": "#333333", "weight": 1.0},
+        tooltip=folium.GeoJsonTooltip(fields=["buurtnaam"], labels=False),
+    ).add_to(m)
+    Draw(draw_options={"polyline": False, "marker": False, "circlemarker": False,
+                       "polygon": {"allowIntersection": False}, "rectangle": True, "circle": True},
+         edit_options={"edit": False}).add_to(m)
+    m.fit_bounds(bounds_of(veld_gj) if feats(veld_gj) else bounds_of(neigh_gj))
+    return st_folium(m, height=height, use_container_width=True, returned_objects=["all_drawings"], key="area_draw")
+
+
+@tracked("Map: ad-hoc area")
+def area_panel():
+    with st.expander("Ad-hoc area (draw a polygon or circle)", expanded=False):
+        d1, d2 = st.columns([1.5, 1])
+        with d1:
+            drawings = (draw_map(420) or {}).get("all_drawings") or []
+        geom = drawn_geometry(drawings[-1]) if drawings else None
+        with d2:
+            weighting = st.radio("Weight neighbourhoods by", list(WEIGHTINGS), horizontal=True)
+            if geom is None:
+                st.caption("Draw a polygon, rectangle or circle on the map (the last drawing is used). "
+                           "Until then, a circle around a point:")
+                centre = bounds_of(veld_gj) if feats(veld_gj) else bounds_of(neigh_gj)
+                c1, c2 = st.columns(2)
+                area_lat = c1.number_input("Latitude", value=round((centre[0][0] + centre[1][0]) / 2, 5),
+                                           format="%.5f", key="area_lat")
+                area_lon = c2.number_input("Longitude", value=round((centre[0][1] + centre[1][1]) / 2, 5),
+                                           format="%.5f", key="area_lon")
+                radius = st.slider("Radius (m)", 100, 3000, 500, step=50)
+                geom = circle(area_lon, area_lat, radius)
+
+        # Overlaps with every buurt from the cached spatial index (twin.areal), weighted per indicator
+        tbl, info = aggregate(cached.area_index(layers_snapshot), geom, cached.neighbourhoods(data_snapshot),
+                              catalog, WEIGHTINGS[weighting])
+        with d2:
+            m1, m2 = st.columns(2)
+            m1.metric("Drawn area", f"{info['drawn_km2']:.2f} km²")
+            m2.metric("Covered by neighbourhoods", f"{info['covered_km2']:.2f} km²",
+                      f"{info['covered_km2'] / info['drawn_km2']:.0%} of the area" if info["drawn_km2"] > 0 else None,
+                      delta_color="off")
+            m1.metric("Estimated residents", f"{info['residents']:,.0f}")
+            m2.metric("Neighbourhoods", len(info["regions"]))
+        if not len(info["regions"]):
+            st.info("The area does not overlap any neighbourhood.")
+            return
+
+        muni = cached.municipality(data_snapshot)
+        ede = pd.to_numeric(muni.iloc[0].reindex(catalog["column"]), errors="coerce").to_numpy() if len(muni) else np.nan
+        st.dataframe(pd.DataFrame({
+            "Dimension": catalog["dimension"].to_numpy(),
+            "Indicator": catalog["label"].to_numpy(),
+            "Unit": catalog["unit"].to_numpy(),
+            "Drawn area": tbl["value"].to_numpy(),
+            "Ede": ede,
+            "Difference": tbl["value"].to_numpy() - ede,
+            "Coverage": (100 * tbl["coverage"]).to_numpy(),
+        }).round(2), use_container_width=True, hide_index=True,
+            column_config={"Coverage": st.column_config.ProgressColumn("Coverage", format="%.0f%%", min_value=0, max_value=100)})
+        names = dict(zip(neigh_codes, neigh_names))
+        parts = info["regions"]
+        st.dataframe(pd.DataFrame({
+            "Neighbourhood": [names.get(c, c) for c in parts["code"]],
+            "Overlap (km²)": parts["overlap_km2"],
+            "Share of neighbourhood": 100 * parts["share_of_region"],
+            "Estimated residents": parts["residents"],
+        }).round(2), use_container_width=True, hide_index=True)
+        st.caption(f"{weighting}-weighted averages of the overlapping neighbourhoods "
+                   "(densities are always area-weighted; residents = density × overlap). "
+                   "Coverage is the share of the weight with a value for the indicator. "
+                   f"Computed in {info['seconds'] * 1000:.0f} ms.")
+
+
+area_panel()
+
+# -------------------- Point layers (fragment) --------------------
+POINT_COLORS = ["#d62728", "#1f77b4", "#2ca02c", "#9467bd", "#ff7f0e"]
+POINTS_ZOOM = 14
+
+def available_point_layers() -> dict[str, Path]:
+    """Point layers in data/: benches/amenities files plus every layer ingested with twin.points."""
+    found = {p.stem.removesuffix("_veld"): p for p in (BENCHES_GJSON, AMENITIES_GJSON) if p.exists()}
+    return {**found, **point_layers(catalog)}
+
+
+@tracked("Map: point layers")
+def points_panel():
+    with st.expander("Point layers (benches, amenities, ...)", expanded=False):
+        layers = available_point_layers()
+        if not layers:
+            st.info("Add a point layer (CSV or GeoJSON of benches, toilets, bus stops, ...) with "
+                    "`python -m twin.points <file> --layer benches`: it is joined to the neighbourhoods "
+                    "as new catalog indicators and shown here.")
+            return
+        shown = st.multiselect("Layers", list(layers), default=list(layers)[:1],
+                               format_func=lambda k: k.replace("_", " ").capitalize())
+
+        # Points are clustered on the server for the view the map reported last (st_folium state),
+        # so only the markers in view at this zoom reach the browser
+        view = st.session_state.get("points_map") or {}
+        zoom = int(round(view.get("zoom") or POINTS_ZOOM))
+        sw, ne = ((view.get("bounds") or {}).get(k) or {} for k in ("_southWest", "_northEast"))
+        if sw.get("lat") is not None and ne.get("lat") is not None:
+            box = (sw["lng"], sw["lat"], ne["lng"], ne["lat"])
+        else:
+            (s, w), (n, e) = bounds_of(veld_gj) if feats(veld_gj) else bounds_of(neigh_gj)
+            box = (w, s, e, n)
+        fg = folium.FeatureGroup(name="Points")
+        total, markers, t0 = 0, 0, time.perf_counter()
+        for i, name in enumerate(shown):
+            pts = cached.point_layer(snapshot_key(layers[name]), str(layers[name]))
+            clusters = cluster(pts["lon"], pts["lat"], pts["mx"], pts["my"], zoom, box)
+            color, label = POINT_COLORS[i % len(POINT_COLORS)], name.replace("_", " ")
+            for lon, lat, count, k in clusters.itertuples(index=False):
+                if count == 1:
+                    folium.CircleMarker([lat, lon], radius=4, color=color, weight=1, fill=True, fill_opacity=0.9,
+                                        tooltip=pts["labels"][k] or label).add_to(fg)
+                    continue
+                size = int(22 + 6 * np.log10(count))
+                folium.Marker([lat, lon], tooltip=f"{count:,} {label}", icon=DivIcon(
+                    icon_size=(size, size), icon_anchor=(size // 2, size // 2),
+                    html=f"<div style='width:{size}px;height:{size}px;border-radius:50%;background:{color};opacity:.85;"
+                         f"color:#fff;font:600 11px sans-serif;display:flex;align-items:center;justify-content:center'>"
+                         f"{count:,}</div>")).add_to(fg)
+            total, markers = total + len(pts["lon"]), markers + len(clusters)
+        ms = (time.perf_counter() - t0) * 1000
+
+        m = folium.Map(tiles="cartodbpositron", control_scale=False, zoom_control=True)
+        add_outline(neigh_gj, m, "Neighbourhoods", color="#333", weight=1.0)
+        st_folium(m, center=[(box[1] + box[3]) / 2, (box[0] + box[2]) / 2], zoom=zoom, feature_group_to_add=fg,
+                  returned_objects=["zoom", "bounds"], key="points_map", height=460, use_container_width=True)
+        st.caption(f"{total:,} points shown as {markers:,} markers at zoom {zoom} "
+                   f"(clustered on the server per {CLUSTER_PX} px cell in {ms:.0f} ms). "
+                   "Counts and densities per neighbourhood are catalog indicators of the layer.")
+
+
+points_panel()
 
 # -------------------- Notes (collapsible) --------------------
 st.divider()
@@ -365,7 +616,19 @@ with st.expander("Notes", expanded=False):
 **What this view demonstrates.** A choropleth for a single indicator selected from the catalog,
 rendered for all neighbourhoods in Ede–Veldhuizen with a municipality layer for context.
 The legend uses a shared scale computed from the combined neighbourhood and municipal values.
+With *Colour neighbourhoods by typology*, neighbourhoods are instead coloured by data-driven types
+(k-means on all standardized catalog indicators, shared with the Dashboard).
+
+**Ad-hoc areas.** Draw a polygon, rectangle or circle (for example, the streets around a health centre)
+to get every catalog indicator for that area. The values combine the neighbourhoods it overlaps,
+weighted by the overlapping area or by the estimated residents in it, and are compared with Ede.
+Neighbourhood values are assumed to be uniform inside each neighbourhood.
+
+**Point layers.** Local point data (benches, toilets, bus stops, ...) added with `python -m twin.points`
+is counted per neighbourhood (count, per km² and per 1,000 residents aged 65+, as catalog indicators)
+and drawn as clusters that are recomputed on the server for the current view and zoom.
 """
     )
 
-
+rerun_stats_panel()
+memory_panel("Map")
@@ -1,9 +1,23 @@
 # pages/04_Scenarios.py
+import functools
+
 import streamlit as st
 import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 
+from twin import cached, scenario, sensitivity
+from twin.data import (
+    AMENITIES_GJSON, BENCH_CANDIDATES_GJSON, BENCHES_GJSON, CATALOG_CSV, MUNI_GJSON, NEIGH_GJSON, STREETS_GJSON,
+    snapshot_key,
+)
+from twin.dynamics import DRIVERS
+from twin.fragments import page_run, rerun_stats_panel, tracked
+from twin.memwatch import memory_panel
+from twin.scenario import BASE_QOL, BENCH_EFFECTS, DIMENSIONS, PARAM_NAMES, QOL_WEIGHTS
+
 st.set_page_config(layout="wide", page_title="Simulation of interventions • Veldhuizen")
+page_run("Scenarios")
 
 # Header
 st.subheader("Concept demo - Simulation of interventions")
@@ -21,39 +35,23 @@ def set_b(v: int): st.session_state.b = clamp(v)
 def inc_b(): st.session_state.b = clamp(st.session_state.get("b", 0) + 1)
 def dec_b(): st.session_state.b = clamp(st.session_state.get("b", 0) - 1)
 
-# ---------------- Controls ----------------
-left_spacer, col_minus5, col_base, col_plus5, right_spacer = st.columns([1, 1, 1, 1, 1])
-with col_minus5:
-    st.button("-5 Benches", on_click=set_b, args=(-5,), use_container_width=True)
-with col_base:
-    st.button("Baseline (0)", on_click=set_b, args=(0,), use_container_width=True)
-with col_plus5:
-    st.button("+5 Benches", on_click=set_b, args=(+5,), use_container_width=True)
-
-cm, cs, cp = st.columns([1, 8, 1])
-with cm:
-    st.button("−", on_click=dec_b, use_container_width=True)
-with cs:
-    st.slider("Benches (add/remove)", BMIN, BMAX, step=1, key="b")
-with cp:
-    st.button("＋", on_click=inc_b, use_container_width=True)
-
-b = int(st.session_state.b)
-
-# ---------------- Logic ----------------
-# Linear mock effects of benches on each dimension
-d_social   =  2 * b
-d_physical =  1 * b
-d_safety   = -1 * b
-d_psych    =  1 * b
-
-# Simple composite QoL weights
-W_SOC, W_PHY, W_ENV, W_PSY = 2, 1, 2, 1
-q_social   = W_SOC * d_social
-q_physical = W_PHY * d_physical
-q_env      = W_ENV * d_safety
-q_psych    = W_PSY * d_psych
-q_total    = q_social + q_physical + q_env + q_psych
+@st.cache_data(show_spinner=False)
+def sensitivity_indices(method: str, n: int, spread: float, benches: int, n_evals: int) -> pd.DataFrame:
+    # Uniform ranges of ±spread around each mock coefficient/weight
+    nom = scenario.nominal_params()
+    lo, hi = nom - spread * np.abs(nom), nom + spread * np.abs(nom)
+    bounds = np.column_stack([lo, hi])
+    func = functools.partial(scenario.q_total, b=float(benches))
+    # The progress bar is created here so that cache hits (from any session) can replay it
+    bar = st.progress(0.0, text=f"Evaluating {n_evals:,} model runs…")
+    run = sensitivity.run_sobol if method == "Sobol" else sensitivity.run_morris
+    res = run(func, bounds, PARAM_NAMES, n, progress=lambda done, total: bar.progress(done / total))
+    bar.empty()
+    return res
+
+WALK_FILES = [STREETS_GJSON, AMENITIES_GJSON, BENCH_CANDIDATES_GJSON]
+WALK_AGENTS = 10_000
+walk_available = all(p.exists() for p in WALK_FILES)
 
 # ---------------- Layout parameters ----------------
 ARROW_W_X1 = 3.0
@@ -116,7 +114,8 @@ ENV_BADGE_Y = ENV_Y + ENV_CY + BADGE_DY
 PSY_BADGE_Y = PSY_Y + PSY_CY + BADGE_DY
 
 # ---------------- SVG ----------------
-svg = f'''
+def diagram_svg(b, d_social, d_physical, d_safety, d_psych, q_social, q_physical, q_env, q_psych, q_total) -> str:
+    return f'''
 <svg viewBox="0 0 960 520" xmlns="http://www.w3.org/2000/svg"
      style="width:100%;height:auto;display:block;background:#ffffff;">
 
@@ -272,34 +271,200 @@ svg = f'''
 </svg>
 '''
 
-st.components.v1.html(svg, height=520, scrolling=False)
-
-# ---------------- KPIs + gauge ----------------
-c1, c2, c3, c4 = st.columns(4)
-c1.metric("Δ Social interactions",  sgn(d_social))
-c2.metric("Δ Physical activity",    sgn(d_physical))
-c3.metric("Δ Safety",               sgn(d_safety))
-c4.metric("Δ QoL (composite)",      sgn(q_total))
-
-BASE_QOL = 350
-qol_after = float(np.clip(BASE_QOL + q_total, 0, 500))
-
-g = go.Figure(go.Indicator(
-    mode="gauge+number+delta",
-    value=qol_after,
-    number={"suffix": " / 500"},
-    delta={"reference": BASE_QOL,
-           "increasing": {"color": "#27ae60"},
-           "decreasing": {"color": "#c0392b"}},
-    gauge={"axis": {"range": [0, 500]},
-           "bar": {"color": "#34495e"},
-           "steps": [{"range": [0, 200]},
-                     {"range": [200, 350]},
-                     {"range": [350, 500]}]},
-    title={"text": "QoL index (mock)", "font": {"size": 16}}
-))
-g.update_layout(height=210, margin=dict(l=10, r=10, t=40, b=10), template="plotly_white")
-st.plotly_chart(g, use_container_width=True)
+# ---------------- Controls (full rerun: everything below depends on the bench count) ----------------
+left_spacer, col_minus5, col_base, col_plus5, right_spacer = st.columns([1, 1, 1, 1, 1])
+with col_minus5:
+    st.button("-5 Benches", on_click=set_b, args=(-5,), use_container_width=True)
+with col_base:
+    st.button("Baseline (0)", on_click=set_b, args=(0,), use_container_width=True)
+with col_plus5:
+    st.button("+5 Benches", on_click=set_b, args=(+5,), use_container_width=True)
+
+cm, cs, cp = st.columns([1, 8, 1])
+with cm:
+    st.button("−", on_click=dec_b, use_container_width=True)
+with cs:
+    st.slider("Benches (add/remove)", BMIN, BMAX, step=1, key="b")
+with cp:
+    st.button("＋", on_click=inc_b, use_container_width=True)
+
+b = int(st.session_state.b)
+
+# ---------------- Intervention (fragment: the walking toggle reruns only this part) ----------------
+@tracked("Scenarios: intervention")
+def intervention(b: int):
+    use_walk = st.toggle(
+        "Use spatial walking simulation for Social, Physical and Psychological",
+        value=False, disabled=not walk_available,
+        help="Simulates 65+ residents walking on the local street network; benches act as rest points.",
+    )
+
+    # ---------------- Logic ----------------
+    # Linear mock effects of benches on each dimension
+    d_social   = BENCH_EFFECTS["social"] * b
+    d_physical = BENCH_EFFECTS["physical"] * b
+    d_safety   = BENCH_EFFECTS["environmental"] * b
+    d_psych    = BENCH_EFFECTS["psychological"] * b
+
+    # Or: percentage-point change in residents able to reach amenities on foot
+    walk_change = None
+    if use_walk:
+        walk_snapshot = snapshot_key(NEIGH_GJSON, BENCHES_GJSON, *WALK_FILES)
+        with st.spinner("Simulating walks…"):
+            walk_deltas, walk_change = cached.walking_deltas(walk_snapshot, WALK_AGENTS, b)
+        d_social   = int(round(walk_deltas["social"]))
+        d_physical = int(round(walk_deltas["physical"]))
+        d_psych    = int(round(walk_deltas["psychological"]))
+
+    # Simple composite QoL weights
+    W_SOC, W_PHY, W_ENV, W_PSY = (QOL_WEIGHTS[d] for d in DIMENSIONS)
+    q_social   = W_SOC * d_social
+    q_physical = W_PHY * d_physical
+    q_env      = W_ENV * d_safety
+    q_psych    = W_PSY * d_psych
+    q_total    = q_social + q_physical + q_env + q_psych
+
+    svg = diagram_svg(b, d_social, d_physical, d_safety, d_psych, q_social, q_physical, q_env, q_psych, q_total)
+    st.components.v1.html(svg, height=520, scrolling=False)
+
+    # ---------------- KPIs + gauge ----------------
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Δ Social interactions",  sgn(d_social))
+    c2.metric("Δ Physical activity",    sgn(d_physical))
+    c3.metric("Δ Safety",               sgn(d_safety))
+    c4.metric("Δ QoL (composite)",      sgn(q_total))
+
+    qol_after = float(np.clip(BASE_QOL + q_total, 0, 500))
+
+    g = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=qol_after,
+        number={"suffix": " / 500"},
+        delta={"reference": BASE_QOL,
+               "increasing": {"color": "#27ae60"},
+               "decreasing": {"color": "#c0392b"}},
+        gauge={"axis": {"range": [0, 500]},
+               "bar": {"color": "#34495e"},
+               "steps": [{"range": [0, 200]},
+                         {"range": [200, 350]},
+                         {"range": [350, 500]}]},
+        title={"text": "QoL index (mock)", "font": {"size": 16}}
+    ))
+    g.update_layout(height=210, margin=dict(l=10, r=10, t=40, b=10), template="plotly_white")
+    st.plotly_chart(g, use_container_width=True)
+
+    # ---------------- Walking simulation ----------------
+    with st.expander("Spatial walking simulation", expanded=False):
+        if not walk_available:
+            st.info(
+                "Add a street network and amenity points to enable this mode: "
+                + ", ".join(f"`data/{p.name}`" for p in WALK_FILES)
+                + f" (and optionally `data/{BENCHES_GJSON.name}` with existing benches). "
+                "Amenity points need a `class` property (gp_practice, pharmacy, cafe, library, …)."
+            )
+        elif walk_change is None:
+            st.caption("Switch on the walking simulation above to see reachability changes per neighbourhood.")
+        else:
+            st.dataframe((walk_change.round(1)).reset_index().rename(columns={"buurtnaam": "Neighbourhood"}),
+                         use_container_width=True, hide_index=True)
+            st.caption(f"Change in % of {WALK_AGENTS:,} simulated 65+ residents who can reach each amenity type "
+                       "without exceeding their personal walking distance between rest points.")
+
+
+intervention(b)
+
+# ---------------- Sensitivity analysis (fragment: its settings rerun only this part) ----------------
+@tracked("Scenarios: sensitivity")
+def sensitivity_panel(b: int):
+    with st.expander("Sensitivity analysis of the mock coefficients", expanded=False):
+        sa1, sa2, sa3 = st.columns(3)
+        sa_method = sa1.radio("Method", ["Sobol", "Morris"], horizontal=True)
+        if sa_method == "Sobol":
+            sa_n = sa2.select_slider("Base samples (N)", [1_000, 10_000, 50_000, 100_000], value=10_000)
+            n_evals = sa_n * (len(PARAM_NAMES) + 2)
+        else:
+            sa_n = sa2.select_slider("Trajectories (r)", [100, 1_000, 10_000, 100_000], value=1_000)
+            n_evals = sa_n * (len(PARAM_NAMES) + 1)
+        sa_spread = sa3.slider("Range around mock value (±%)", 10, 100, 50, step=10) / 100
+        b_eval = b if b != 0 else 1
+
+        res = sensitivity_indices(sa_method, sa_n, sa_spread, b_eval, n_evals)
+
+        if sa_method == "Sobol":
+            ys = [("S1", "First-order (S1)", "#5f8f75"), ("ST", "Total-order (ST)", "#34495e")]
+        else:
+            ys = [("mu_star", "μ* (mean |effect|)", "#5f8f75"), ("sigma", "σ (interactions)", "#34495e")]
+        sfig = go.Figure([go.Bar(x=res["parameter"], y=res[c], name=lbl, marker_color=col) for c, lbl, col in ys])
+        sfig.update_layout(barmode="group", height=320, template="plotly_white",
+                           margin=dict(l=10, r=10, t=30, b=10), legend=dict(orientation="h", y=1.1))
+        st.plotly_chart(sfig, use_container_width=True, theme=None, config=dict(displayModeBar=False))
+        st.dataframe(res.round(3), use_container_width=True, hide_index=True)
+        st.caption(f"{n_evals:,} evaluations of Δ QoL at {b_eval:+d} benches. "
+                   "Results are cached per method, sample size, range and bench count.")
+
+
+sensitivity_panel(b)
+
+# ---------------- Feedback dynamics (fragment: horizon and coupling rerun only this part) ----------------
+DYN_COLORS = {"social": "#ff69b4", "physical": "#B39DDB", "environmental": "#27ae60", "psychological": "#f39c12",
+              "QoL (weighted)": "#34495e"}
+DYN_LINES = 30    # up to this many neighbourhoods are drawn as lines, above as a p10-p90 band
+
+@tracked("Scenarios: dynamics")
+def dynamics_panel(b: int):
+    with st.expander("Feedback dynamics over time (driver network)", expanded=False):
+        f1, f2, f3 = st.columns(3)
+        months = f1.slider("Horizon (months)", 12, 120, 60, step=12)
+        coupling = f2.slider("Feedback strength (× arrow weights)", 0.0, 2.5, 1.0, step=0.25)
+        driver = f3.selectbox("Driver per neighbourhood", list(DRIVERS), index=list(DRIVERS).index("PA"),
+                              format_func=lambda k: DRIVERS[k][0])
+        snapshot = snapshot_key(CATALOG_CSV, NEIGH_GJSON, MUNI_GJSON)
+        res = cached.driver_dynamics(snapshot, b, months, coupling)
+        if b == 0:
+            st.caption("Add or remove benches above to start an intervention; without one the baseline stays put.")
+
+        dims = res["dimensions"]
+        fig = go.Figure()
+        for (series, mode), part in dims.groupby(["series", "mode"], sort=False):
+            fig.add_trace(go.Scatter(
+                x=part["month"], y=part["change"], name=f"{series} ({mode})", legendgroup=series,
+                line=dict(color=DYN_COLORS.get(series), dash="solid" if mode == "feedback" else "dot",
+                          width=3 if series.startswith("QoL") else 2),
+            ))
+        fig.update_layout(height=340, template="plotly_white", margin=dict(l=10, r=10, t=30, b=10),
+                          xaxis_title="Months", yaxis_title="Change (index points)",
+                          title=dict(text="Average over neighbourhoods (dotted: without the social → environment arc)",
+                                     font=dict(size=13)))
+        st.plotly_chart(fig, use_container_width=True, theme=None, config=dict(displayModeBar=False))
+
+        j = res["names"].index(driver)
+        traj = res["drivers"][:, :, j]                     # (months, neighbourhoods)
+        t = dims["month"].unique()
+        fig = go.Figure()
+        if traj.shape[1] <= DYN_LINES:
+            names = cached.neighbourhoods(snapshot)["buurtnaam"].astype(str).tolist()
+            for i, name in enumerate(names):
+                fig.add_trace(go.Scatter(x=t, y=traj[:, i], name=name, mode="lines"))
+        else:
+            p10, p50, p90 = np.percentile(traj, [10, 50, 90], axis=1)
+            fig.add_trace(go.Scatter(x=t, y=p90, line=dict(width=0), showlegend=False))
+            fig.add_trace(go.Scatter(x=t, y=p10, fill="tonexty", line=dict(width=0), name="p10–p90"))
+            fig.add_trace(go.Scatter(x=t, y=p50, name="median", line=dict(color="#34495e")))
+        fig.update_layout(height=300, template="plotly_white", margin=dict(l=10, r=10, t=30, b=10),
+                          xaxis_title="Months", yaxis_title="Change (index points)",
+                          title=dict(text=f"{DRIVERS[driver][0]} per neighbourhood", font=dict(size=13)))
+        st.plotly_chart(fig, use_container_width=True, theme=None, config=dict(displayModeBar=False))
+
+        gain = res["loop_gain"]
+        if gain >= 1:
+            st.warning(f"Loop gain {gain:.2f} ≥ 1: the feedback loops amplify instead of settling, "
+                       "so drivers run to the bounds of their index.")
+        st.caption(f"The arrows of the Drivers diagram as a dynamical system integrated month by month for every "
+                   f"neighbourhood (loop gain {gain:.2f}). Benches act on mobility, social infrastructure and safety "
+                   "and spread along the arrows; mock weights and time constants, not estimates.")
+
+
+dynamics_panel(b)
 
 # ---------------- Notes (collapsible) ----------------
 st.divider()
@@ -322,10 +487,15 @@ dimensions count twice as much as the **physical** and **psychological** ones.
 The combined QoL score is shown on a gauge ranging from **0 to 500**, with a baseline value of **350**.
 The diagram and gauge update automatically as benches are added or removed.
 
+**Feedback dynamics.** The expander above turns the arrows of the Drivers diagram into a time-stepped
+model: each driver moves toward its baseline plus the weighted changes of the drivers pointing at it, so
+effects build up over months and feed back through the social → environment arc.
+
 **Why it matters.** This is a **concept-only prototype**, not a predictive model. The relationships are
 illustrative, designed to show how the effects of interventions could be visualised and discussed in an
 interactive local digital twin.
 """
     )
 
-
+rerun_stats_panel()
+memory_panel("Scenarios")
@@ -1,8 +1,27 @@
+import pandas as pd
 import streamlit as st
 
+from twin import cached
+from twin.data import CATALOG_CSV, MUNI_GJSON, NEIGH_GJSON, snapshot_key
+from twin.points import point_layers
+
 st.title("Sources")
 st.write("Centraal Bureau voor de Statistiek. (2025, March 27). Kerncijfers wijken en buurten 2024. Centraal Bureau Voor de Statistiek. https://www.cbs.nl/nl-nl/cijfers/detail/85984NED ")
 st.write("Centraal Bureau voor de Statistiek. (2025, March 28). Nabijheid voorzieningen; afstand locatie, wijk- en buurtcijfers 2022. Centraal Bureau Voor de Statistiek. https://www.cbs.nl/nl-nl/cijfers/detail/85560NED")
 st.write("Rijksinstituut voor Volksgezondheid en Milieu (RIVM). (2025, December 10). Gezondheid per wijk en buurt; 2012/2016/2020/2022 (indeling 2022). Overheid. https://data.overheid.nl/en/dataset/42936-gezondheid-per-wijk-en-buurt--2012-2016-2020-2022--indeling-2022- ")
 
+snapshot = snapshot_key(CATALOG_CSV, NEIGH_GJSON, MUNI_GJSON)
+layers = point_layers(cached.catalog(snapshot))
+if layers:
+    st.write("Local point layers, counted per neighbourhood with `python -m twin.points`: "
+             + ", ".join(f"`{p.name}`" for p in layers.values()))
 
+st.subheader("Data quality")
+report = cached.quality(snapshot)
+st.caption(f"Catalog and layers checked for coverage, value ranges per unit, missing values, duplicate codes "
+           f"and geometry: {report['errors']} errors, {report['warnings']} warnings.")
+if report["issues"]:
+    issues = pd.DataFrame(report["issues"])
+    issues["regions"] = issues["regions"].str.join(", ")
+    st.dataframe(issues[["severity", "check", "layer", "column", "detail", "count", "regions"]],
+                 use_container_width=True, hide_index=True)
@@ -0,0 +1,96 @@
+# pages/06_QoL index.py
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from twin import cached
+from twin.data import CATALOG_CSV, MUNI_GJSON, NEIGH_GJSON, snapshot_key
+from twin.qol_index import total_scores
+from twin.validate import page_gate
+
+st.set_page_config(page_title="QoL index • Veldhuizen vs Ede", layout="wide")
+
+st.subheader("Composite QoL index")
+st.caption("Indicators from the catalog are normalized, grouped by dimension and combined with adjustable weights.")
+
+DIM_COLORS = {
+    "social relationships and community": "#ff80bf",
+    "physical health": "#B39DDB",
+    "psychological health": "#ff9800",
+    "environment and living conditions": "#00b894",
+}
+
+# ---------- Load ----------
+snapshot = snapshot_key(CATALOG_CSV, NEIGH_GJSON, MUNI_GJSON)
+page_gate(cached.quality(snapshot))
+
+# ---------- Sidebar ----------
+st.sidebar.header("Index settings")
+method = st.sidebar.radio("Normalization", ["Min-max (0–100)", "Z-score"], index=0)
+method_key = "zscore" if method == "Z-score" else "minmax"
+
+scores = cached.qol_dimension_scores(snapshot, method_key)
+dims = [c for c in scores.columns if c not in ("Region", "level")]
+
+st.sidebar.markdown("---")
+st.sidebar.caption("Dimension weights")
+weights = np.array([st.sidebar.slider(d.capitalize(), 0, 5, 1, key=f"w_{d}") for d in dims], dtype=float)
+if weights.sum() == 0:
+    st.warning("Set at least one dimension weight above zero.")
+    st.stop()
+
+# ---------- Scores ----------
+scale = 100.0 if method_key == "minmax" else 1.0
+S = scores[dims].to_numpy(float)
+table = scores[["Region", "level"]].copy()
+table["QoL index"] = total_scores(S, weights) * scale
+for j, d in enumerate(dims):
+    table[d.capitalize()] = S[:, j] * scale
+table = table.sort_values("QoL index", ascending=False, kind="mergesort")
+
+fig = go.Figure()
+for j, d in enumerate(dims):
+    share = weights[j] / weights.sum()
+    fig.add_trace(go.Bar(
+        y=table["Region"], x=table[d.capitalize()] * share, orientation="h",
+        name=d.capitalize(), marker_color=DIM_COLORS.get(d, "#888"),
+        hovertemplate="%{y}<br>" + d.capitalize() + ": %{customdata:.1f}<extra></extra>",
+        customdata=table[d.capitalize()],
+    ))
+fig.update_layout(
+    barmode="relative", template="plotly_white",
+    height=int(max(3.6, 0.48 * len(table) + 1.2) * 126),
+    margin=dict(l=160, r=40, t=30, b=50),
+    legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0),
+    yaxis=dict(categoryorder="array", categoryarray=table["Region"].tolist()[::-1]),
+    xaxis_title="Weighted contribution to QoL index",
+)
+st.plotly_chart(fig, use_container_width=True, theme=None, config=dict(displayModeBar=False))
+st.dataframe(table.round(2), use_container_width=True, hide_index=True)
+
+# ---------- Weight sensitivity ----------
+st.divider()
+with st.expander("Weight sensitivity", expanded=False):
+    n_draws = st.select_slider("Random weight vectors", [500, 1000, 5000, 10000], value=5000)
+    summary = cached.qol_sweep(snapshot, method_key, n_draws)
+    for c in ("Mean score", "P5", "P95"):
+        summary[c] = summary[c] * scale
+    st.dataframe(summary.round(2), use_container_width=True, hide_index=True)
+    st.caption("Weights are drawn uniformly over all combinations (Dirichlet) and evaluated in one batch; "
+               "a narrow rank range means the ordering does not depend much on the chosen weights.")
+
+# ---------- Notes ----------
+st.divider()
+with st.expander("Notes", expanded=False):
+    st.markdown(
+        """
+**What this view shows.** A composite index built from the catalog indicators of the four QoL dimensions
+(social, physical, psychological, environmental). Each indicator is normalized across all regions shown,
+flipped where **lower is better** (the `direction` column of `variables_catalog.csv`, e.g. loneliness or
+distances to services), averaged within its dimension, and the dimensions are combined with the weights
+in the sidebar. Missing indicators are skipped rather than counted as zero.
+
+**Caveat.** Scores are relative to the regions in view, so they are not comparable between data refreshes.
+"""
+    )
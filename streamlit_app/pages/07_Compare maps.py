@@ -0,0 +1,118 @@
+# pages/07_Compare maps.py
+from pathlib import Path
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+
+from twin import cached
+from twin.compare import (
+    bivariate_classes, bivariate_colors, bivariate_counts, bivariate_legend,
+    compare_html, geometry_payload, ramp_colors, ramp_legend,
+)
+from twin.data import CATALOG_CSV, NEIGH_GJSON, WIJK_GJSON, snapshot_key
+from twin.etl import CBS_SECRET
+from twin.geometry import bbox
+from twin.validate import page_gate
+
+# Region set -> (table loader, geometry file, name column, catalog field holding the layer's column name)
+REGION_SETS = {
+    "Veldhuizen neighbourhoods": (cached.neighbourhoods, NEIGH_GJSON, "buurtnaam", "column"),
+    "Ede districts (wijken)": (cached.wijken, WIJK_GJSON, "wijknaam", "source_column"),
+}
+MAP_HEIGHT = 520
+
+st.set_page_config(page_title="Compare maps • Veldhuizen vs Ede", layout="wide")
+
+# -------------------- Helpers --------------------
+@st.cache_resource(show_spinner=False)
+def geometry(path: Path, snapshot: str) -> tuple[str, list]:
+    """Serialized geometry (once per data snapshot, shared by all panels and sessions) and bounds."""
+    with path.open("r", encoding="utf-8") as f:
+        gj = json.load(f)
+    boxes = np.array([bbox(ft.get("geometry")) for ft in gj.get("features", [])], dtype=float).reshape(-1, 4)
+    bounds = [[float(np.nanmin(boxes[:, 1])), float(np.nanmin(boxes[:, 0]))],
+              [float(np.nanmax(boxes[:, 3])), float(np.nanmax(boxes[:, 2]))]]
+    return geometry_payload(gj), bounds
+
+def value_labels(label: str, unit: str, v: np.ndarray) -> list[str]:
+    u = f" {unit}" if unit and unit != "-" else ""
+    return [f"{label}: {x:,.2f}{u}" if np.isfinite(x) else f"{label}: n/a" for x in v]
+
+# -------------------- Load --------------------
+st.title("Compare maps")
+
+region_set = st.sidebar.radio("Regions", list(REGION_SETS))
+loader, geo_path, name_col, field = REGION_SETS[region_set]
+if not geo_path.exists():
+    st.error(f"Missing required file: {geo_path.name}")
+    st.stop()
+
+snapshot = snapshot_key(CATALOG_CSV, geo_path)
+page_gate(cached.quality(snapshot))
+table = loader(snapshot)
+catalog = cached.catalog(snapshot)
+catalog = catalog[catalog[field].isin(table.columns)] if field in catalog.columns else catalog.iloc[:0]
+if len(catalog) < 2:
+    st.info("This region set has fewer than two catalog indicators to compare.")
+    st.stop()
+
+labels = catalog["label"].tolist()
+mode = st.sidebar.radio("Mode", ["Side by side", "Bivariate (3×3)"])
+label_a = st.sidebar.selectbox("Indicator A", labels, index=0)
+label_b = st.sidebar.selectbox("Indicator B", labels, index=1)
+
+def indicator(label: str) -> tuple[np.ndarray, str]:
+    row = catalog[catalog["label"] == label].iloc[0]
+    v = pd.to_numeric(table[row[field]], errors="coerce").to_numpy(dtype=float)
+    return np.where(v > CBS_SECRET, v, np.nan), str(row.get("unit", "")).strip()
+
+va, unit_a = indicator(label_a)
+vb, unit_b = indicator(label_b)
+names = table[name_col].astype(str).tolist() if name_col in table.columns else [str(i) for i in range(len(table))]
+geo, bounds = geometry(geo_path, snapshot)
+
+# -------------------- Panels --------------------
+if mode == "Side by side":
+    panels = []
+    for label, unit, v in ((label_a, unit_a, va), (label_b, unit_b, vb)):
+        colors, vmin, vmax = ramp_colors(v)
+        panels.append({"title": label, "colors": colors, "labels": value_labels(label, unit, v),
+                       "legend": ramp_legend(label + (f" [{unit}]" if unit else ""), vmin, vmax)})
+else:
+    classes = bivariate_classes(va, vb)
+    text_a, text_b = value_labels(label_a, unit_a, va), value_labels(label_b, unit_b, vb)
+    panels = [{"title": f"{label_a} × {label_b}", "colors": bivariate_colors(classes),
+               "labels": [f"{a}<br>{b}" for a, b in zip(text_a, text_b)],
+               "legend": bivariate_legend(label_a, label_b)}]
+
+html = compare_html(geo, names, panels, bounds, MAP_HEIGHT)
+components.html(html, height=MAP_HEIGHT + 40, scrolling=False)
+st.caption(f"Geometry sent once ({len(geo) / 1024:,.0f} KB); indicator colours and tooltips "
+           f"{(len(html) - len(geo)) / 1024:,.0f} KB. Panning or zooming one panel moves the other. "
+           "Basemap: CARTO Positron • © OpenStreetMap contributors")
+
+if mode != "Side by side":
+    counts = bivariate_counts(classes)
+    st.dataframe(
+        pd.DataFrame(counts[::-1], index=[f"{label_b}: high", "middle", "low"],
+                     columns=[f"{label_a}: low", "middle", "high"]),
+        use_container_width=True,
+    )
+    ok = np.isfinite(va) & np.isfinite(vb)
+    if ok.sum() > 2:
+        st.caption(f"Regions per tercile class. Correlation between the indicators: r = {np.corrcoef(va[ok], vb[ok])[0, 1]:.2f}.")
+
+# -------------------- Notes --------------------
+st.divider()
+with st.expander("Notes", expanded=False):
+    st.markdown(
+        """
+**What this view demonstrates.** Two indicators side by side on synchronized maps, or combined in one
+bivariate map where each region is coloured by the terciles of both indicators (3×3 classes).
+With few regions the terciles are coarse; the class counts table shows how regions are spread.
+Ede districts (wijken) offer the CBS kerncijfers indicators that are available at that level.
+"""
+    )
@@ -0,0 +1 @@
+"""Shared data layer and analysis engines used by the Streamlit pages and tools."""
@@ -0,0 +1,171 @@
+# twin/accessibility.py
+"""Network-distance accessibility to amenities, aggregated to buurt averages.
+
+For each amenity class one multi-source Dijkstra gives, for every graph node, the
+distance to the nearest amenity and which amenity that is (`owner`). These fields are
+kept, so adding an amenity only re-expands the nodes it gets closer to, and removing
+one only re-solves the nodes it owned, seeded from their neighbours. Origins (grid
+cells or address points) are snapped to nodes once; aggregating to buurt averages is
+then a gather plus a bincount, in km like the prox_dist_* catalog columns.
+"""
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .geometry import bbox, haversine_m, points_in_geometry, to_local_km
+from .graph import StreetGraph
+
+
+@dataclass
+class ClassField:
+    sources: list[int]                              # amenity nodes
+    dist: np.ndarray = field(default=None)          # (n_nodes,) metres to nearest source
+    owner: np.ndarray = field(default=None)         # (n_nodes,) index into sources, -1 if unreachable
+
+    def copy(self) -> "ClassField":
+        return ClassField(list(self.sources), self.dist.copy(), self.owner.copy())
+
+
+@dataclass
+class Origins:
+    node: np.ndarray      # (m,) nearest graph node
+    offset_m: np.ndarray  # (m,) straight-line distance from the origin to that node
+    group: np.ndarray     # (m,) region code (e.g. buurtcode)
+    weight: np.ndarray    # (m,) e.g. addresses per cell
+
+
+def _search(graph: StreetGraph, heap: list, dist: list, owner: list) -> None:
+    """Dijkstra continuing from `heap` entries (d, node, owner); updates dist/owner in place."""
+    ptr, nbr, w = graph._ptr, graph._nbr, graph._w
+    heapq.heapify(heap)
+    while heap:
+        d, u, o = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for e in range(ptr[u], ptr[u + 1]):
+            v, nd = nbr[e], d + w[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                owner[v] = o
+                heapq.heappush(heap, (nd, v, o))
+
+
+class AccessibilityEngine:
+    def __init__(self, graph: StreetGraph, amenity_nodes: dict[str, np.ndarray]):
+        self.graph = graph
+        self.fields = {c: self._solve(list(map(int, nodes))) for c, nodes in amenity_nodes.items()}
+
+    def _solve(self, sources: list[int]) -> ClassField:
+        n = self.graph.n_nodes
+        dist, owner = [np.inf] * n, [-1] * n
+        heap = []
+        for i, s in enumerate(sources):
+            if dist[s] > 0.0:
+                dist[s], owner[s] = 0.0, i
+                heap.append((0.0, s, i))
+        _search(self.graph, heap, dist, owner)
+        return ClassField(sources, np.asarray(dist), np.asarray(owner, dtype=np.int64))
+
+    def copy(self) -> "AccessibilityEngine":
+        new = object.__new__(AccessibilityEngine)
+        new.graph = self.graph
+        new.fields = {c: f.copy() for c, f in self.fields.items()}
+        return new
+
+    # ---------- Incremental updates ----------
+    def add(self, cls: str, node: int) -> int:
+        """Add an amenity at `node`; returns the number of nodes whose distance improved."""
+        f = self.fields.setdefault(cls, self._solve([]))
+        f.sources.append(int(node))
+        dist, owner = f.dist.tolist(), f.owner.tolist()
+        before = f.dist.copy()
+        if dist[node] > 0.0:
+            dist[node], owner[node] = 0.0, len(f.sources) - 1
+            _search(self.graph, [(0.0, int(node), len(f.sources) - 1)], dist, owner)
+        f.dist, f.owner = np.asarray(dist), np.asarray(owner, dtype=np.int64)
+        return int((f.dist < before).sum())
+
+    def remove(self, cls: str, node: int) -> int:
+        """Remove the amenity at `node`; returns the number of nodes that were re-solved."""
+        f = self.fields[cls]
+        idx = f.sources.index(int(node))
+        affected = np.flatnonzero(f.owner == idx)
+        f.sources[idx] = -1                          # keep indices of the other sources stable
+        dist, owner = f.dist.copy(), f.owner.copy()
+        dist[affected], owner[affected] = np.inf, -1
+        # Seed from unaffected neighbours of the affected region, plus any duplicate source
+        ptr, nbr, w = self.graph.indptr, self.graph.indices, self.graph.weights
+        heap = []
+        for u in affected.tolist():
+            for e in range(ptr[u], ptr[u + 1]):
+                v = nbr[e]
+                if np.isfinite(dist[v]):
+                    heap.append((dist[v] + w[e], u, int(owner[v])))
+        for i, s in enumerate(f.sources):
+            if s == int(node):
+                heap.append((0.0, s, i))
+        dist_l, owner_l = dist.tolist(), owner.tolist()
+        seeded = []
+        for d, u, o in heap:
+            if d < dist_l[u]:
+                dist_l[u], owner_l[u] = d, o
+                seeded.append((d, u, o))
+        _search(self.graph, seeded, dist_l, owner_l)
+        f.dist, f.owner = np.asarray(dist_l), np.asarray(owner_l, dtype=np.int64)
+        return len(affected)
+
+    # ---------- Aggregation ----------
+    def origin_km(self, cls: str, origins: Origins) -> np.ndarray:
+        return (self.fields[cls].dist[origins.node] + origins.offset_m) / 1000.0
+
+    def region_averages(self, origins: Origins, columns: dict[str, str]) -> pd.DataFrame:
+        """Weighted mean distance (km) per origin group for each class -> catalog column."""
+        codes, inv = np.unique(origins.group, return_inverse=True)
+        wsum = np.bincount(inv, weights=origins.weight, minlength=len(codes))
+        out = {}
+        for cls, col in columns.items():
+            if cls not in self.fields:
+                continue
+            km = self.origin_km(cls, origins)
+            ok = np.isfinite(km)
+            num = np.bincount(inv[ok], weights=(km * origins.weight)[ok], minlength=len(codes))
+            den = np.bincount(inv[ok], weights=origins.weight[ok], minlength=len(codes))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[col] = np.where(den > 0, num / den, np.nan)
+        return pd.DataFrame(out, index=pd.Index(codes, name="code")).assign(weight=wsum)
+
+
+def grid_origins(graph: StreetGraph, regions: list[tuple[str, dict]], spacing_m: float = 50.0) -> Origins:
+    """Regular grid cells inside each region polygon, snapped to the graph."""
+    lons, lats, groups = [], [], []
+    for code, geom in regions:
+        x0, y0, x1, y1 = bbox(geom)
+        if not np.isfinite(x0):
+            continue
+        lat0 = 0.5 * (y0 + y1)
+        kx, ky = to_local_km(1.0, 1.0, lat0)
+        gx = np.arange(x0, x1, spacing_m / 1000.0 / kx)
+        gy = np.arange(y0, y1, spacing_m / 1000.0 / ky)
+        lo, la = (a.ravel() for a in np.meshgrid(gx, gy))
+        keep = points_in_geometry(lo, la, geom)
+        lons.append(lo[keep]); lats.append(la[keep]); groups.append(np.full(int(keep.sum()), code, dtype=object))
+    return point_origins(graph, np.concatenate(lons), np.concatenate(lats), np.concatenate(groups))
+
+
+def point_origins(graph: StreetGraph, lon: np.ndarray, lat: np.ndarray, group: np.ndarray,
+                  weight: np.ndarray | None = None) -> Origins:
+    """Origins from explicit points, e.g. address locations with their buurtcode.
+
+    Points without finite coordinates cannot be snapped and are left out.
+    """
+    lon, lat = np.asarray(lon, float), np.asarray(lat, float)
+    node = graph.nearest_node(lon, lat)
+    w = np.ones(len(lon)) if weight is None else np.asarray(weight, float)
+    ok = node >= 0
+    lon, lat, node, group, w = lon[ok], lat[ok], node[ok], np.asarray(group)[ok], w[ok]
+    offset = haversine_m(lon, lat, graph.lon[node], graph.lat[node])
+    return Origins(node, offset, group, w)
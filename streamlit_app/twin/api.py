@@ -0,0 +1,186 @@
+# twin/api.py
+"""Headless JSON API over the indicator store.
+
+Run next to the app (from streamlit_app/):
+
+    python -m twin.api --port 8600
+
+Endpoints:
+    GET /api/health
+    GET /api/catalog
+    GET /api/indicators/<column>?level=buurt|wijk|gemeente
+    GET /api/reference/<column>
+    GET /api/scenario?benches=<int>
+
+Responses carry an ETag (conditional requests get 304), are kept in an LRU cache
+keyed by the data snapshot, and are gzip-compressed when the client accepts it.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from . import scenario
+from .store import LEVELS, STORE
+
+GZIP_MIN_BYTES = 512
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _clean(v):
+    return None if isinstance(v, float) and not math.isfinite(v) else v
+
+
+def route(path: str, query: dict) -> dict | list:
+    parts = [p for p in path.split("/") if p]
+    if parts[:1] != ["api"] or len(parts) < 2:
+        raise ApiError(404, "not found")
+    what, rest = parts[1], parts[2:]
+
+    if what == "health" and not rest:
+        return {"status": "ok", "snapshot": STORE.snapshot}
+    if what == "catalog" and not rest:
+        cat = STORE.catalog()
+        return [{k: _clean(v) for k, v in row.items()} for row in cat.to_dict(orient="records")]
+    if what == "indicators" and len(rest) == 1:
+        level = query.get("level", ["buurt"])[0]
+        if level not in LEVELS:
+            raise ApiError(400, f"level must be one of {sorted(LEVELS)}")
+        try:
+            df = STORE.values(rest[0], level)
+        except KeyError as e:
+            raise ApiError(404, str(e.args[0]))
+        try:
+            ref = _clean(STORE.reference(rest[0]))
+        except KeyError:
+            ref = None       # buurt-only columns (e.g. buurtcode) have no gemeente value
+        return {"column": rest[0], "level": level, "reference": ref,
+                "regions": [{"code": c, "name": n, "value": _clean(float(v))}
+                            for c, n, v in zip(df["code"], df["name"], df["value"])]}
+    if what == "reference" and len(rest) == 1:
+        try:
+            return {"column": rest[0], "value": _clean(STORE.reference(rest[0]))}
+        except KeyError as e:
+            raise ApiError(404, str(e.args[0]))
+    if what == "scenario" and not rest:
+        try:
+            b = int(query.get("benches", ["0"])[0])
+        except ValueError:
+            raise ApiError(400, "benches must be an integer")
+        return scenario.evaluate(b)
+    raise ApiError(404, "not found")
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded responses: key -> (etag, body, gzipped body)."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return hit
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+CACHE = ResponseCache()
+
+
+def render(path: str, raw_query: str) -> tuple[str, bytes, bytes | None]:
+    key = (STORE.snapshot, path, raw_query)
+    hit = CACHE.get(key)
+    if hit is not None:
+        return hit
+    body = json.dumps(route(path, parse_qs(raw_query)), separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    gz = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+    CACHE.put(key, (etag, body, gz))
+    return etag, body, gz
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive
+    disable_nagle_algorithm = True    # headers and body go out as separate writes
+    server_version = "twin-api"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            etag, body, gz = render(url.path, url.query)
+        except ApiError as e:
+            return self._send(e.status, json.dumps({"error": str(e)}).encode(), {})
+        except Exception as e:   # data problems surface as 500 with the message
+            return self._send(500, json.dumps({"error": str(e)}).encode(), {})
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            return self._send(304, b"", headers)
+        if gz is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            body = gz
+        headers["Vary"] = "Accept-Encoding"
+        self._send(200, body, headers)
+
+    def _send(self, status: int, body: bytes, headers: dict):
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):   # quiet by default; the benchmark would drown in logs
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 8600) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless JSON API for the Veldhuizen digital twin data.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8600)
+    args = ap.parse_args(argv)
+    srv = serve(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}/api/")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+# twin/areal.py
+"""Ad-hoc areas: indicator values for a user-drawn polygon or circle.
+
+Every region that intersects the drawn area contributes to its value. With area
+weighting the weight is the area of the overlap. With population weighting it is
+the estimated number of residents in the overlap (density x overlap area). Densities
+(unit "per km2") are always area-weighted, which makes them residents per km² of
+the covered part.
+
+Overlap areas are computed without building clipped polygons. By Green's theorem,
+area(A ∩ B) is half the integral of x dy - y dx over the parts of A's boundary inside
+B plus the parts of B's boundary inside A. Along a straight edge p -> q that integral
+is (fraction of the edge inside) x cross(p, q). So only two things are needed: where
+edge pairs cross, and whether each ring starts inside. The inside state then toggles
+at every crossing along the ring. This works for non-convex shapes, holes and
+multipolygons, and for all candidate regions at once in flat arrays.
+
+Candidate regions come from a uniform grid over the region bounding boxes, built once
+per layer. Candidate edge pairs come from a grid over the drawn area's bounding box.
+The cost therefore depends on the size of the drawing, not on the size of the layer.
+
+    python -m twin.areal --regions 14000 --vertices 64      (timing on a synthetic national-scale layer)
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .data import numeric_matrix
+from .geometry import KM_PER_DEG_LAT, KM_PER_DEG_LON, FlatGeometry, flatten_polygons
+
+WEIGHTINGS = {"Area": "area", "Population": "population"}
+DENSITY_COLUMN = "pop_dens_inhab_km2"   # residents per km², for population weights
+AREA_WEIGHTED_UNITS = {"per km2"}
+CIRCLE_SEGMENTS = 128
+GRID_CELL = 2.0          # index cell size, in median region bounding-box widths
+GRID_MAX = 1024          # cells per axis
+JOIN_CELLS = 32          # cells per axis of the edge-pair grid over the drawn area
+
+
+def _ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenated aranges [starts[i], starts[i] + lengths[i])."""
+    lengths = np.asarray(lengths, np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(np.asarray(starts, np.int64) - offsets, lengths) + np.arange(int(lengths.sum()))
+
+
+def _kx(lat0: float | np.ndarray) -> float | np.ndarray:
+    return KM_PER_DEG_LON * np.cos(np.radians(lat0))
+
+
+@dataclass
+class Edges:
+    """Ring edges of many features, head to tail per ring (exteriors counter-clockwise, holes clockwise)."""
+    x1: np.ndarray
+    y1: np.ndarray
+    x2: np.ndarray
+    y2: np.ndarray
+    ring: np.ndarray       # (edges,) ring of each edge
+    feat: np.ndarray       # (edges,) feature of each edge
+    feat_ptr: np.ndarray   # (features+1,) offsets: the edges of a feature are contiguous
+
+
+def ring_edges(flat: FlatGeometry) -> Edges:
+    """Oriented, non-degenerate edges of a FlatGeometry."""
+    xy, rp = flat.coords, flat.ring_ptr
+    n_rings, n_feats = len(rp) - 1, len(flat.feat_ptr) - 1
+    ring = np.repeat(np.arange(n_rings), np.diff(rp))
+    pos = np.arange(len(xy)) - rp[:-1][ring]
+    # Exterior rings counter-clockwise and holes clockwise, so every area below is signed the same way
+    nxt = np.where(pos + 1 < np.diff(rp)[ring], np.arange(len(xy)) + 1, rp[:-1][ring])
+    o = xy - xy.mean(axis=0) if len(xy) else xy
+    signed = np.bincount(ring, o[:, 0] * o[nxt, 1] - o[nxt, 0] * o[:, 1], minlength=n_rings)
+    exterior = np.zeros(n_rings, bool)
+    exterior[flat.poly_ptr[:-1]] = True
+    flip = (signed > 0) != exterior
+    order = np.where(flip[ring], rp[1:][ring] - 1 - pos, np.arange(len(xy)))
+    p, q = xy[order], xy[order[nxt]]
+    keep = (p != q).any(axis=1)
+    poly = np.repeat(np.arange(len(flat.poly_ptr) - 1), np.diff(flat.poly_ptr))
+    feat = np.repeat(np.arange(n_feats), np.diff(flat.feat_ptr))[poly[ring]][keep]
+    return Edges(p[keep, 0], p[keep, 1], q[keep, 0], q[keep, 1], ring[keep], feat,
+                 np.searchsorted(feat, np.arange(n_feats + 1)))
+
+
+@dataclass
+class AreaIndex:
+    """Region edges, bounding boxes and areas plus a uniform grid over the boxes (CSR: cell -> regions)."""
+    codes: np.ndarray
+    edges: Edges
+    boxes: np.ndarray      # (features, 4) min lon, min lat, max lon, max lat
+    area_km2: np.ndarray   # (features,)
+    origin: tuple[float, float]
+    cell: tuple[float, float]
+    shape: tuple[int, int]
+    cell_ptr: np.ndarray
+    cell_feat: np.ndarray
+
+    def _cells(self, boxes: np.ndarray) -> tuple[np.ndarray, ...]:
+        (x0, y0), (cx, cy), (nx, ny) = self.origin, self.cell, self.shape
+        i0 = np.clip(((boxes[:, 0] - x0) // cx).astype(np.int64), 0, nx - 1)
+        i1 = np.clip(((boxes[:, 2] - x0) // cx).astype(np.int64), 0, nx - 1)
+        j0 = np.clip(((boxes[:, 1] - y0) // cy).astype(np.int64), 0, ny - 1)
+        j1 = np.clip(((boxes[:, 3] - y0) // cy).astype(np.int64), 0, ny - 1)
+        return i0, i1, j0, j1
+
+    def candidates(self, box) -> np.ndarray:
+        """Regions whose bounding box overlaps `box` (min lon, min lat, max lon, max lat)."""
+        if not len(self.codes):
+            return np.empty(0, np.int64)
+        i0, i1, j0, j1 = (int(v[0]) for v in self._cells(np.asarray([box], float)))
+        cells = (np.arange(j0, j1 + 1)[:, None] * self.shape[0] + np.arange(i0, i1 + 1)).ravel()
+        starts = self.cell_ptr[cells]
+        found = np.unique(self.cell_feat[_ranges(starts, self.cell_ptr[cells + 1] - starts)])
+        b = self.boxes[found]
+        return found[(b[:, 0] <= box[2]) & (b[:, 2] >= box[0]) & (b[:, 1] <= box[3]) & (b[:, 3] >= box[1])]
+
+
+def build_index(codes, flat: FlatGeometry) -> AreaIndex:
+    """Spatial index of a polygon layer (built once per layer and cached by the pages)."""
+    edges = ring_edges(flat)
+    n = len(flat.feat_ptr) - 1
+    boxes = np.full((n, 4), np.nan)
+    filled = np.flatnonzero(np.diff(edges.feat_ptr) > 0)
+    if len(filled):
+        at = edges.feat_ptr[filled]
+        boxes[filled] = np.column_stack([np.minimum.reduceat(edges.x1, at), np.minimum.reduceat(edges.y1, at),
+                                         np.maximum.reduceat(edges.x1, at), np.maximum.reduceat(edges.y1, at)])
+    valid = np.isfinite(boxes).all(axis=1)
+    boxes[~valid] = (np.inf, np.inf, -np.inf, -np.inf)     # never a candidate
+
+    # Areas with a per-region projection (equirectangular at the box centre)
+    lat0 = np.where(valid, (boxes[:, 1] + boxes[:, 3]) / 2, 0.0)
+    ox, oy = (np.nanmean(edges.x1), np.nanmean(edges.y1)) if len(edges.feat) else (0.0, 0.0)
+    cross = (edges.x1 - ox) * (edges.y2 - oy) - (edges.x2 - ox) * (edges.y1 - oy)
+    area = 0.5 * np.bincount(edges.feat, cross, minlength=n) * _kx(lat0) * KM_PER_DEG_LAT
+
+    # Uniform grid, cells about GRID_CELL typical regions wide
+    vb = boxes[valid] if valid.any() else np.zeros((1, 4))
+    size = (max(np.median(vb[:, 2] - vb[:, 0]), 1e-6) * GRID_CELL, max(np.median(vb[:, 3] - vb[:, 1]), 1e-6) * GRID_CELL)
+    origin = (float(vb[:, 0].min()), float(vb[:, 1].min()))
+    extent = (float(vb[:, 2].max()) - origin[0], float(vb[:, 3].max()) - origin[1])
+    shape = tuple(int(min(GRID_MAX, extent[a] // size[a] + 1)) for a in (0, 1))
+    cell = tuple(max(size[a], extent[a] / shape[a]) for a in (0, 1))
+    index = AreaIndex(np.asarray(codes).astype(str), edges, boxes, area, origin, cell, shape,
+                      np.zeros(1, np.int64), np.empty(0, np.int64))
+    feats = np.flatnonzero(valid)
+    i0, i1, j0, j1 = index._cells(boxes[feats])
+    ni, count = i1 - i0 + 1, (i1 - i0 + 1) * (j1 - j0 + 1)
+    owner = np.repeat(np.arange(len(feats)), count)
+    k = np.arange(int(count.sum())) - np.repeat(np.cumsum(count) - count, count)
+    cells = (j0[owner] + k // ni[owner]) * shape[0] + i0[owner] + k % ni[owner]
+    order = np.argsort(cells, kind="stable")
+    index.cell_feat = feats[owner[order]]
+    index.cell_ptr = np.concatenate([[0], np.cumsum(np.bincount(cells, minlength=shape[0] * shape[1]))])
+    return index
+
+
+def circle(lon: float, lat: float, radius_m: float, segments: int = CIRCLE_SEGMENTS) -> dict:
+    """GeoJSON Polygon approximating a circle (local equirectangular projection)."""
+    a = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    r = radius_m / 1000
+    ring = np.column_stack([lon + r * np.cos(a) / _kx(lat), lat + r * np.sin(a) / KM_PER_DEG_LAT])
+    return {"type": "Polygon", "coordinates": [np.vstack([ring, ring[:1]]).tolist()]}
+
+
+def drawn_geometry(feature: dict | None) -> dict | None:
+    """Geometry of a drawn GeoJSON feature; circles (Points with a `radius` in metres) become polygons."""
+    if not feature:
+        return None
+    geom = feature.get("geometry") or {}
+    radius = (feature.get("properties") or {}).get("radius")
+    if geom.get("type") == "Point" and radius:
+        return circle(*map(float, geom["coordinates"][:2]), float(radius))
+    return geom if geom.get("type") in ("Polygon", "MultiPolygon") else None
+
+
+def _pairs(a: Edges, b: tuple[np.ndarray, ...], box, cells: int = JOIN_CELLS) -> tuple[np.ndarray, np.ndarray]:
+    """(a, b) edge pairs whose bounding boxes share a cell of a grid over `box`."""
+    gx, gy = max(box[2] - box[0], 1e-12) / cells, max(box[3] - box[1], 1e-12) / cells
+
+    def cover(x1, y1, x2, y2):
+        i0 = np.clip((np.minimum(x1, x2) - box[0]) // gx, 0, cells - 1).astype(np.int64)
+        i1 = np.clip((np.maximum(x1, x2) - box[0]) // gx, 0, cells - 1).astype(np.int64)
+        j0 = np.clip((np.minimum(y1, y2) - box[1]) // gy, 0, cells - 1).astype(np.int64)
+        j1 = np.clip((np.maximum(y1, y2) - box[1]) // gy, 0, cells - 1).astype(np.int64)
+        ni, count = i1 - i0 + 1, (i1 - i0 + 1) * (j1 - j0 + 1)
+        edge = np.repeat(np.arange(len(x1)), count)
+        k = np.arange(int(count.sum())) - np.repeat(np.cumsum(count) - count, count)
+        return edge, (j0[edge] + k // ni[edge]) * cells + i0[edge] + k % ni[edge]
+
+    ea, ca = cover(a.x1, a.y1, a.x2, a.y2)
+    eb, cb = cover(*b)
+    order = np.argsort(cb, kind="stable")
+    eb, cb = eb[order], cb[order]
+    start = np.searchsorted(cb, ca, "left")
+    length = np.searchsorted(cb, ca, "right") - start
+    key = np.unique(np.repeat(ea, length) * len(b[0]) + eb[_ranges(start, length)])
+    return key // len(b[0]), key % len(b[0])
+
+
+def _ray_parity(px, py, x1, y1, x2, y2) -> np.ndarray:
+    """(points, edges) crossings of a ray from each point towards +x (even-odd rule)."""
+    px, py = np.asarray(px)[:, None], np.asarray(py)[:, None]
+    cond = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xint = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    return cond & (px < xint)
+
+
+def _inside_fraction(group: np.ndarray, t: np.ndarray, start: np.ndarray) -> np.ndarray:
+    """Fraction of every edge inside the other shape: its start state, toggled at the sorted crossings t."""
+    order = np.lexsort((t, group))
+    g, t = group[order], t[order]
+    pos = np.arange(len(g))
+    first = np.r_[True, g[1:] != g[:-1]] if len(g) else np.zeros(0, bool)
+    rank = pos - np.maximum.accumulate(np.where(first, pos, 0)) if len(g) else pos
+    after = start[g] ^ (rank % 2 == 0)
+    return start + np.bincount(g, np.where(after, 1.0, -1.0) * (1.0 - t), minlength=len(start))
+
+
+def _ring_starts(ring: np.ndarray, crossings: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """Inside state at the start of every edge: the ring's first state toggled by the crossings before it."""
+    excl = np.cumsum(crossings, axis=-1) - crossings
+    head = np.r_[True, ring[1:] != ring[:-1]]
+    pos = np.arange(len(ring))
+    ring_head = np.maximum.accumulate(np.where(head, pos, 0))
+    return first ^ ((excl - excl[..., ring_head]) % 2 == 1)
+
+
+def overlap(index: AreaIndex, geom: dict | None) -> tuple[np.ndarray, np.ndarray, float]:
+    """Regions intersecting `geom`, their overlap areas (km²) and the area of `geom` (km²)."""
+    q = ring_edges(flatten_polygons([geom]))
+    none = (np.empty(0, np.int64), np.empty(0), 0.0)
+    if not len(q.x1):
+        return none
+    box = (min(q.x1.min(), q.x2.min()), min(q.y1.min(), q.y2.min()), max(q.x1.max(), q.x2.max()), max(q.y1.max(), q.y2.max()))
+    # Work in degrees around the drawing's centre; one equirectangular scale converts to km² at the end
+    cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+    scale = _kx(cy) * KM_PER_DEG_LAT
+    qx1, qy1, qx2, qy2 = q.x1 - cx, q.y1 - cy, q.x2 - cx, q.y2 - cy
+    qcross = qx1 * qy2 - qx2 * qy1
+    drawn = 0.5 * qcross.sum() * scale
+    box = (box[0] - cx, box[1] - cy, box[2] - cx, box[3] - cy)
+    feats = index.candidates((box[0] + cx, box[1] + cy, box[2] + cx, box[3] + cy))
+    if not len(feats):
+        return none[0], none[1], drawn
+
+    # Candidate edges (all edges of the candidate regions, ring order kept)
+    e = index.edges
+    lo = e.feat_ptr[feats]
+    sel = _ranges(lo, e.feat_ptr[feats + 1] - lo)
+    local = np.repeat(np.arange(len(feats)), e.feat_ptr[feats + 1] - lo)
+    b = Edges(e.x1[sel] - cx, e.y1[sel] - cy, e.x2[sel] - cx, e.y2[sel] - cy, e.ring[sel], local, np.empty(0))
+    bx0, bx1 = np.minimum(b.x1, b.x2), np.maximum(b.x1, b.x2)
+    by0, by1 = np.minimum(b.y1, b.y2), np.maximum(b.y1, b.y2)
+    band = (by1 >= box[1]) & (by0 <= box[3]) & (bx1 >= box[0])       # can cross a ray from inside the box
+    near = np.flatnonzero(band & (bx0 <= box[2]))                     # can cross the drawing
+
+    # Crossings of region edges (parameter t) with drawn edges (parameter u)
+    sub = Edges(b.x1[near], b.y1[near], b.x2[near], b.y2[near], b.ring[near], b.feat[near], np.empty(0))
+    i, k = _pairs(sub, (qx1, qy1, qx2, qy2), box)
+    rx, ry = sub.x2[i] - sub.x1[i], sub.y2[i] - sub.y1[i]
+    wx, wy = qx2[k] - qx1[k], qy2[k] - qy1[k]
+    sx, sy = qx1[k] - sub.x1[i], qy1[k] - sub.y1[i]
+    den = rx * wy - ry * wx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (sx * wy - sy * wx) / den
+        u = (sx * ry - sy * rx) / den
+    hit = (t >= 0) & (t < 1) & (u >= 0) & (u < 1)
+    j, k, t, u = near[i[hit]], k[hit], t[hit], u[hit]
+    F, n = len(feats), len(qx1)
+
+    # Region boundary inside the drawing: ring heads inside the box are tested, the rest are outside
+    head = np.flatnonzero(np.r_[True, b.ring[1:] != b.ring[:-1]])
+    hx, hy = b.x1[head], b.y1[head]
+    test = (hx >= box[0]) & (hx <= box[2]) & (hy >= box[1]) & (hy <= box[3])
+    first = np.zeros(len(head), bool)
+    if test.any():
+        first[test] = _ray_parity(hx[test], hy[test], qx1, qy1, qx2, qy2).sum(axis=1) % 2 == 1
+    ring_no = np.cumsum(np.r_[True, b.ring[1:] != b.ring[:-1]]) - 1
+    start = _ring_starts(b.ring, np.bincount(j, minlength=len(b.x1)), first[ring_no])
+    fb = _inside_fraction(j, t, start)
+    contrib = np.bincount(b.feat, fb * (b.x1 * b.y2 - b.x2 * b.y1), minlength=F)
+
+    # Drawn boundary inside each region: ray from each drawn ring's head against the regions' band edges
+    qhead = np.flatnonzero(np.r_[True, q.ring[1:] != q.ring[:-1]])
+    hits = _ray_parity(qx1[qhead], qy1[qhead], b.x1[band], b.y1[band], b.x2[band], b.y2[band])
+    h, c = np.nonzero(hits)
+    qfirst = np.bincount(b.feat[band][c] * len(qhead) + h, minlength=F * len(qhead)).reshape(F, len(qhead)) % 2 == 1
+    qring_no = np.cumsum(np.r_[True, q.ring[1:] != q.ring[:-1]]) - 1
+    counts = np.bincount(b.feat[j] * n + k, minlength=F * n).reshape(F, n)
+    qstart = _ring_starts(q.ring, counts, qfirst[:, qring_no])
+    fq = _inside_fraction(b.feat[j] * n + k, u, qstart.ravel()).reshape(F, n)
+    contrib += fq @ qcross
+
+    area = np.clip(0.5 * contrib * scale, 0.0, index.area_km2[feats])
+    keep = area > 1e-9
+    return feats[keep], area[keep], drawn
+
+
+def aggregate(index: AreaIndex, geom: dict | None, table: pd.DataFrame, catalog: pd.DataFrame,
+              weighting: str = "area", code_column: str = "buurtcode") -> tuple[pd.DataFrame, dict]:
+    """Weighted values of every catalog indicator for the drawn area, plus a summary.
+
+    `table` holds the region values (any row order, matched on `code_column`).
+    """
+    t0 = time.perf_counter()
+    feats, area, drawn = overlap(index, geom)
+    rows = table.assign(_code=table[code_column].astype(str)).drop_duplicates("_code").set_index("_code")
+    rows = rows.reindex(index.codes[feats])
+    columns = catalog["column"].astype(str).tolist()
+    V = numeric_matrix(rows.reset_index(drop=True), columns)
+    density = numeric_matrix(rows.reset_index(drop=True), [DENSITY_COLUMN])[:, 0]
+    residents = area * np.nan_to_num(density)
+    by_area = catalog["unit"].astype(str).str.strip().isin(AREA_WEIGHTED_UNITS).to_numpy() | (weighting == "area")
+    base = np.where(by_area[None, :], area[:, None], residents[:, None])
+    w = np.where(np.isfinite(V), base, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        value = (w * np.nan_to_num(V)).sum(axis=0) / w.sum(axis=0)
+        coverage = w.sum(axis=0) / base.sum(axis=0)
+    out = pd.DataFrame({"column": columns, "value": np.where(w.sum(axis=0) > 0, value, np.nan),
+                        "coverage": np.nan_to_num(coverage)})
+    parts = pd.DataFrame({"code": index.codes[feats], "overlap_km2": area,
+                          "share_of_region": area / index.area_km2[feats], "residents": residents})
+    return out, {"drawn_km2": drawn, "covered_km2": float(area.sum()), "residents": float(residents.sum()),
+                 "regions": parts, "seconds": time.perf_counter() - t0}
+
+
+# ---------- Timing ----------
+def synthetic_layer(regions: int, vertices: int, seed: int = 0) -> FlatGeometry:
+    """A warped square tiling of about `regions` cells over the Netherlands, `vertices` per ring."""
+    side = int(np.ceil(np.sqrt(regions)))
+    x = np.linspace(3.4, 7.2, side + 1)
+    y = np.linspace(50.75, 53.55, side + 1)
+    per = max(vertices // 4, 1)
+    s = np.arange(per) / per
+    gx, gy = np.meshgrid(np.arange(side), np.arange(side))
+    x0, y0 = x[gx.ravel()], y[gy.ravel()]
+    dx, dy = x[1] - x[0], y[1] - y[0]
+    ring_x = np.concatenate([x0[:, None] + dx * s, np.repeat(x0[:, None] + dx, per, 1),
+                             x0[:, None] + dx * (1 - s), np.repeat(x0[:, None], per, 1)], axis=1)
+    ring_y = np.concatenate([np.repeat(y0[:, None], per, 1), y0[:, None] + dy * s,
+                             np.repeat(y0[:, None] + dy, per, 1), y0[:, None] + dy * (1 - s)], axis=1)
+    # A smooth warp of the plane keeps the tiling (shared points move together) but bends every edge
+    phase = np.random.default_rng(seed).uniform(0, 2 * np.pi, 2)
+    wx = ring_x + 0.15 * dx * np.sin(ring_y / dy * 2.1 + phase[0])
+    wy = ring_y + 0.15 * dy * np.sin(ring_x / dx * 1.7 + phase[1])
+    k = ring_x.shape[1]
+    coords = np.stack([wx, wy], axis=-1).reshape(-1, 2)
+    n = len(x0)
+    ptr = np.arange(n + 1, dtype=np.int64)
+    return FlatGeometry(coords, ptr * k, ptr.copy(), ptr.copy())
+
+
+def benchmark(regions: int, vertices: int, radius_km: float, queries: int = 20, seed: int = 0) -> dict:
+    """Index build time and median aggregation time for random circles and star-shaped polygons."""
+    flat = synthetic_layer(regions, vertices, seed)
+    t0 = time.perf_counter()
+    index = build_index(np.arange(len(flat.feat_ptr) - 1), flat)
+    build = time.perf_counter() - t0
+    rng = np.random.default_rng(seed)
+    table = pd.DataFrame({"buurtcode": index.codes, DENSITY_COLUMN: rng.uniform(100, 8000, len(index.codes)),
+                          "v": rng.normal(size=len(index.codes))})
+    cat = pd.DataFrame({"column": ["v", DENSITY_COLUMN], "unit": ["%", "per km2"]})
+    out = {}
+    for shape in ("circle", "polygon"):
+        times, ratio = [], []
+        for _ in range(queries):
+            lon, lat = rng.uniform(4.0, 6.6), rng.uniform(51.2, 53.1)
+            if shape == "circle":
+                geom = circle(lon, lat, radius_km * 1000)
+            else:
+                a = np.sort(rng.uniform(0, 2 * np.pi, 100))
+                r = radius_km * rng.uniform(0.4, 1.0, 100)
+                ring = np.column_stack([lon + r * np.cos(a) / _kx(lat), lat + r * np.sin(a) / KM_PER_DEG_LAT])
+                geom = {"type": "Polygon", "coordinates": [np.vstack([ring, ring[:1]]).tolist()]}
+            t1 = time.perf_counter()
+            _, info = aggregate(index, geom, table, cat, "population")
+            times.append(time.perf_counter() - t1)
+            ratio.append(info["covered_km2"] / info["drawn_km2"])
+        out[shape] = {"ms": 1000 * float(np.median(times)), "max_ms": 1000 * float(np.max(times)),
+                      "covered/drawn": float(np.median(ratio))}
+    return {"regions": len(index.codes), "edges": len(index.edges.x1), "build_s": build, **out}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Time ad-hoc area aggregation on a synthetic layer.")
+    ap.add_argument("--regions", type=int, default=14_000)
+    ap.add_argument("--vertices", type=int, default=64, help="vertices per region ring")
+    ap.add_argument("--radius", type=float, default=1.5, help="radius of the drawn shapes (km)")
+    ap.add_argument("--queries", type=int, default=20)
+    args = ap.parse_args(argv)
+    r = benchmark(args.regions, args.vertices, args.radius, args.queries)
+    print(f"{r['regions']:,} regions, {r['edges']:,} edges: index built in {r['build_s'] * 1000:.0f} ms")
+    for shape in ("circle", "polygon"):
+        s = r[shape]
+        print(f"{shape:8} r={args.radius:g} km: median {s['ms']:.1f} ms, max {s['max_ms']:.1f} ms "
+              f"(overlaps / drawn area = {s['covered/drawn']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# twin/cached.py
+"""Streamlit-cached wrappers around the engines, shared by the pages.
+
+Every function takes the data `snapshot` (see data.snapshot_key) as its first
+argument so cached entries are invalidated when the data files change.
+"""
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from . import accessibility, areal, clustering, dynamics, points, qol_index, validate, walking
+from .data import (
+    AMENITIES_GJSON, BENCH_CANDIDATES_GJSON, BENCHES_GJSON, MUNI_GJSON, NEIGH_GJSON, STREETS_GJSON, WIJK_GJSON,
+    geojson_to_table, numeric_matrix, read_catalog,
+)
+from .dataplane import PLANE
+from .geometry import flatten_polygons
+from .graph import load_graph, load_points
+from .margins import margin_table
+from .ranking import RankIndex
+
+
+def _layer_table(level: str, path) -> pd.DataFrame:
+    # Attach to the shared data plane when a loader has published one (see twin.dataplane)
+    if PLANE.refresh():
+        try:
+            return PLANE.table(level)
+        except KeyError:
+            pass
+    return geojson_to_table(path)
+
+
+def _layer_features(level: str, path) -> dict:
+    # Array-backed FeatureCollection from the data plane, else the parsed file
+    if PLANE.refresh():
+        try:
+            return PLANE.features(level)
+        except KeyError:
+            pass
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Region tables are cached as resources: one shared (read-only) frame per process,
+# backed by the memory-mapped data plane when it is available.
+@st.cache_resource(show_spinner=False)
+def neighbourhoods(snapshot: str) -> pd.DataFrame:
+    return _layer_table("buurt", NEIGH_GJSON)
+
+
+@st.cache_resource(show_spinner=False)
+def municipality(snapshot: str) -> pd.DataFrame:
+    return _layer_table("gemeente", MUNI_GJSON)
+
+
+@st.cache_resource(show_spinner=False)
+def wijken(snapshot: str) -> pd.DataFrame:
+    return _layer_table("wijk", WIJK_GJSON)
+
+
+@st.cache_data(show_spinner=False)
+def regions(snapshot: str) -> pd.DataFrame:
+    """Neighbourhoods and the municipality stacked into one table with `Region`/`level` columns."""
+    neigh = neighbourhoods(snapshot).assign(level="Neighbourhood")
+    neigh["Region"] = neigh.get("buurtnaam", neigh.index.astype(str)).astype(str)
+    muni = municipality(snapshot).assign(level="Municipality")
+    muni["Region"] = muni.get("gemeentenaam", "Ede").astype(str) + " (municipality)"
+    return pd.concat([neigh, muni], ignore_index=True)
+
+
+@st.cache_resource(show_spinner=False)
+def area_index(snapshot: str) -> areal.AreaIndex:
+    """Spatial index of the buurt polygons for ad-hoc area aggregation (twin.areal), once per layer."""
+    if PLANE.refresh():
+        try:
+            return areal.build_index(PLANE.table("buurt")["buurtcode"], PLANE.geometry("buurt"))
+        except KeyError:
+            pass
+    with open(NEIGH_GJSON, "r", encoding="utf-8") as f:
+        feats = json.load(f).get("features", [])
+    codes = [(ft.get("properties") or {}).get("buurtcode", i) for i, ft in enumerate(feats)]
+    return areal.build_index(codes, flatten_polygons(ft.get("geometry") for ft in feats))
+
+
+@st.cache_data(show_spinner=False)
+def catalog(snapshot: str) -> pd.DataFrame:
+    return read_catalog()
+
+
+@st.cache_data(show_spinner=False)
+def quality(snapshot: str) -> dict:
+    """Data-quality report of the catalog and layer files (twin.validate), once per data snapshot."""
+    return validate.validate_files()
+
+
+@st.cache_data(show_spinner=False)
+def margins(snapshot: str) -> pd.DataFrame:
+    """95% intervals and significance against Ede for every buurt x catalog indicator."""
+    return margin_table(neighbourhoods(snapshot), municipality(snapshot), catalog(snapshot))
+
+
+@st.cache_resource(show_spinner=False)
+def rank_index(snapshot: str) -> RankIndex:
+    """Orderings, histograms and ECDFs of every catalog indicator over the buurten (large-n views)."""
+    return RankIndex(neighbourhoods(snapshot), catalog(snapshot)["column"].tolist())
+
+
+@st.cache_data(show_spinner=False)
+def typology(snapshot: str, columns: tuple[str, ...], k: int) -> pd.DataFrame:
+    """Cluster label per buurtcode for one (indicator set, k)."""
+    df = neighbourhoods(snapshot)
+    X = clustering.prepare_features(numeric_matrix(df, list(columns)))
+    res = clustering.kmeans(X, k)
+    return pd.DataFrame({
+        "buurtcode": df["buurtcode"].astype(str).to_numpy(),
+        "type_id": res.labels,
+        "Type": [clustering.type_label(i) for i in res.labels],
+    })
+
+
+@st.cache_data(show_spinner=False)
+def typology_sweep(snapshot: str, columns: tuple[str, ...], k_max: int) -> pd.DataFrame:
+    df = neighbourhoods(snapshot)
+    X = clustering.prepare_features(numeric_matrix(df, list(columns)))
+    return clustering.sweep(X, list(range(2, min(k_max, len(X)) + 1)))
+
+
+@st.cache_data(show_spinner=False)
+def qol_dimension_scores(snapshot: str, method: str) -> pd.DataFrame:
+    """Per-dimension QoL scores (one column per dimension) for every region."""
+    reg = regions(snapshot)
+    model = qol_index.build_model(reg, catalog(snapshot), method)
+    out = pd.DataFrame(qol_index.dimension_scores(model), columns=model.dimensions)
+    return pd.concat([reg[["Region", "level"]], out], axis=1)
+
+
+@st.cache_data(show_spinner=False)
+def qol_sweep(snapshot: str, method: str, n: int) -> pd.DataFrame:
+    scores = qol_dimension_scores(snapshot, method)
+    S = scores.drop(columns=["Region", "level"]).to_numpy(float)
+    totals, ranks = qol_index.weight_sweep(S, n=n)
+    return qol_index.sweep_summary(scores["Region"].tolist(), totals, ranks)
+
+
+@st.cache_data(show_spinner=False)
+def driver_dynamics(snapshot: str, benches: int, months: int, coupling: float) -> dict:
+    """Driver-network trajectories of a bench intervention for every buurt (twin.dynamics)."""
+    return dynamics.run_scenario(neighbourhoods(snapshot), catalog(snapshot), benches, months, coupling)
+
+
+@st.cache_resource(show_spinner=False)
+def point_layer(snapshot: str, path: str) -> dict:
+    """Points of a layer file with their Web Mercator coordinates, shared for server-side clustering (twin.points)."""
+    lon, lat, labels = points.load_layer_points(path)
+    mx, my = points.mercator(lon, lat)
+    return {"lon": lon, "lat": lat, "mx": mx, "my": my, "labels": labels}
+
+
+@st.cache_resource(show_spinner=False)
+def walking_model(snapshot: str, n_agents: int) -> dict:
+    """Street graph, agents and baseline reachability for the bench simulation."""
+    graph = load_graph(STREETS_GJSON)
+    lon, lat, props = load_points(AMENITIES_GJSON)
+    nodes = graph.nearest_node(lon, lat)
+    cls = np.array([str(p.get("class", "")) for p in props])
+    # nearest_node gives -1 for points without coordinates; as an index that would be the last node
+    benches = graph.nearest_node(*load_points(BENCHES_GJSON)[:2]) if BENCHES_GJSON.exists() else None
+    sim = walking.WalkSimulation(
+        graph,
+        {c: nodes[(cls == c) & (nodes >= 0)] for c in walking.AMENITY_COLUMNS},
+        benches[benches >= 0] if benches is not None else None,
+    )
+    clon, clat, cprops = load_points(BENCH_CANDIDATES_GJSON)
+    prio = np.array([float(p.get("priority", i)) for i, p in enumerate(cprops)])
+    cand = graph.nearest_node(clon, clat)
+    ok = cand >= 0
+    candidates = cand[ok][np.argsort(prio[ok], kind="stable")]
+    agents = walking.synth_agents(_layer_features("buurt", NEIGH_GJSON), graph, n_agents)
+    return {"sim": sim, "agents": agents, "candidates": candidates, "baseline": sim.reach(agents)}
+
+
+@st.cache_data(show_spinner=False)
+def walking_deltas(snapshot: str, n_agents: int, benches: int) -> tuple[dict, pd.DataFrame]:
+    """Dimension deltas and per-buurt reachability change for +/- `benches`.
+
+    Positive counts add benches at the highest-priority candidates; negative counts
+    remove that many existing benches.
+    """
+    model = walking_model(snapshot, n_agents)
+    sim, agents, base = model["sim"], model["agents"], model["baseline"]
+    if benches >= 0:
+        after = sim.reach(agents, add=model["candidates"][:benches])
+    else:
+        after = sim.reach(agents, remove=sim.bench_nodes[:-benches])
+    change = sim.summary(agents, after) - sim.summary(agents, base)
+    return walking.dimension_deltas(sim.classes, base, after), change
+
+
+@st.cache_resource(show_spinner=False)
+def accessibility_model(snapshot: str, spacing_m: float = 50.0) -> dict:
+    """Accessibility engine over the street graph plus grid origins per buurt."""
+    graph = load_graph(STREETS_GJSON)
+    lon, lat, props = load_points(AMENITIES_GJSON)
+    nodes = graph.nearest_node(lon, lat)
+    cls = np.array([str(p.get("class", "")) for p in props])
+    engine = accessibility.AccessibilityEngine(
+        graph, {c: nodes[(cls == c) & (nodes >= 0)] for c in walking.AMENITY_COLUMNS})
+    feats = _layer_features("buurt", NEIGH_GJSON).get("features", [])
+    regions = [(str((ft.get("properties") or {}).get("buurtcode", i)), ft.get("geometry")) for i, ft in enumerate(feats)]
+    origins = accessibility.grid_origins(graph, regions, spacing_m)
+    return {"engine": engine, "origins": origins,
+            "baseline": engine.region_averages(origins, walking.AMENITY_COLUMNS)}
+
+
+@st.cache_data(show_spinner=False)
+def accessibility_whatif(snapshot: str, cls: str, action: str, lon: float, lat: float) -> pd.DataFrame:
+    """Buurt average distance (km) for `cls` after adding an amenity at, or removing the one nearest to, (lon, lat)."""
+    model = accessibility_model(snapshot)
+    engine = model["engine"].copy()
+    node = int(engine.graph.nearest_node(np.array([lon]), np.array([lat]))[0])
+    if action == "add":
+        engine.add(cls, node)
+    else:
+        srcs = np.array([s for s in engine.fields[cls].sources if s >= 0])
+        if len(srcs):
+            d = (engine.graph.lon[srcs] - lon) ** 2 + (engine.graph.lat[srcs] - lat) ** 2
+            engine.remove(cls, int(srcs[d.argmin()]))
+    col = walking.AMENITY_COLUMNS[cls]
+    return engine.region_averages(model["origins"], {cls: col})[[col]]
@@ -0,0 +1,128 @@
+# twin/charts.py
+"""Static (matplotlib) charts shared by the Dashboard fallback and the batch tools."""
+from __future__ import annotations
+
+import numpy as np
+from matplotlib.colors import LinearSegmentedColormap, Normalize, to_rgba
+from matplotlib.patches import Polygon
+
+from .geometry import polygons_of
+
+# ---------- Color constants ----------
+COL_A   = "#E24B35"   # Veldhuizen A
+COL_B   = "#F6A18A"   # Veldhuizen B
+COL_AVG = "#006400"   # Ede average
+NO_DATA = "#cccccc"   # regions without a value on static maps
+PALETTE_RED = [
+    "#fff5f0","#fcbba1","#fc9272","#fb6a4a",
+    "#ef3b2c","#cb181d","#99000d","#67000d","#3b0008"
+]
+RED_CMAP = LinearSegmentedColormap.from_list("twin_red", PALETTE_RED)
+
+
+def value_format(vmax: float) -> tuple[int, str]:
+    """Decimals and format string used for value labels (0 decimals from 100 upwards)."""
+    dec = 0 if vmax >= 100 else 2
+    return dec, f"{{:,.{dec}f}}"
+
+
+def bar_limits(vals, muni_value: float, upper=None) -> tuple[float, float]:
+    """x limits of a bar comparison: from 0 (or below) to the largest value plus 8% headroom."""
+    vmax, vmin = np.nanmax(vals), np.nanmin(vals)
+    cands = [vmax]
+    if upper is not None and np.isfinite(upper).any():
+        cands.append(float(np.nanmax(upper)))
+    if np.isfinite(muni_value):
+        cands.append(float(muni_value))
+    xmax    = max(cands)
+    pad     = 0.08 * xmax if xmax > 0 else 1.0
+    x_upper = xmax + pad
+    x_lower = min(0.0, vmin, float(muni_value) if np.isfinite(muni_value) else 0.0)
+    return x_lower, x_upper
+
+
+def value_label(v: float, x_lower: float, x_upper: float) -> tuple[float, dict]:
+    """x position and text style of a bar's value label: inside long bars, after short ones."""
+    span = x_upper - x_lower
+    if v - x_lower > 0.15 * span:
+        return v - 0.01 * span, {"ha": "right", "color": "white", "fontweight": "semibold"}
+    return v + 0.01 * span, {"ha": "left", "color": "#222", "fontweight": "normal"}
+
+
+def draw_bar_comparison(ax, names, vals, colors, muni_value: float, xlabel: str,
+                        show_labels: bool = True, fmt: str | None = None,
+                        lower=None, upper=None, hatched=None) -> tuple[float, float]:
+    """Horizontal bars per region with the Ede reference line. Returns the x limits.
+
+    Optional `lower`/`upper` draw interval whiskers; bars where `hatched` is true are hatched
+    (used for regions that differ significantly from the reference).
+    """
+    vals = np.asarray(vals, dtype=float)
+    n = len(names)
+    fmt = fmt or value_format(np.nanmax(vals))[1]
+    x_lower, x_upper = bar_limits(vals, muni_value, upper)
+
+    ypos = np.arange(n)
+    bars = ax.barh(ypos, vals, height=0.62, color=colors)
+    if hatched is not None:
+        for bar, h in zip(bars, hatched):
+            if h:
+                bar.set_hatch("///"); bar.set_edgecolor("#333333"); bar.set_linewidth(0)
+    if lower is not None and upper is not None:
+        lo, hi = np.asarray(lower, float), np.asarray(upper, float)
+        ok = np.isfinite(lo) & np.isfinite(hi) & (hi > lo)
+        ax.errorbar(vals[ok], ypos[ok], xerr=[vals[ok] - lo[ok], hi[ok] - vals[ok]],
+                    fmt="none", ecolor="#333333", elinewidth=1, capsize=3)
+
+    ax.set_yticks(ypos)
+    ax.set_yticklabels(names)
+    ax.invert_yaxis()
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("")
+    ax.set_xlim(x_lower, x_upper)
+    ax.grid(axis="x", linestyle=":", linewidth=0.8, alpha=0.6)
+    ax.spines["top"].set_visible(False); ax.spines["right"].set_visible(False)
+
+    if show_labels:
+        for y, v in zip(ypos, vals):
+            x, style = value_label(v, x_lower, x_upper)
+            ax.text(x, y, fmt.format(v), va="center", fontsize=9, **style)
+
+    if np.isfinite(muni_value):
+        xavg = float(muni_value)
+        ax.axvline(x=xavg, color=COL_AVG, linewidth=2)
+        ax.text(xavg, -0.7, f"Ede average: {fmt.format(xavg)}",
+                color=COL_AVG, ha="left", va="bottom", fontsize=10,
+                bbox=dict(facecolor="white", alpha=0.85, edgecolor="none", pad=1.5))
+    return x_lower, x_upper
+
+
+def choropleth_colors(vals, vmin: float | None = None, vmax: float | None = None) -> np.ndarray:
+    """(n, 4) RGBA fill per value on the red scale; grey where the value is missing."""
+    vals = np.asarray(vals, dtype=float)
+    finite = vals[np.isfinite(vals)]
+    lo = vmin if vmin is not None else (finite.min() if finite.size else 0.0)
+    hi = vmax if vmax is not None else (finite.max() if finite.size else 1.0)
+    norm = Normalize(vmin=lo, vmax=hi if hi > lo else lo + 1.0)
+    faces = RED_CMAP(norm(vals))
+    faces[~np.isfinite(vals)] = to_rgba(NO_DATA)
+    return faces
+
+
+def draw_choropleth(ax, geoms: list[dict], vals, highlight: int | None = None,
+                    outline: dict | None = None, vmin: float | None = None, vmax: float | None = None) -> None:
+    """Static choropleth of outer rings on a lon/lat axis, optional highlighted region."""
+    faces = choropleth_colors(vals, vmin, vmax)
+    for geom, face in zip(geoms, faces):
+        for poly in polygons_of(geom):
+            ax.add_patch(Polygon(poly[0], closed=True, facecolor=face, edgecolor="#333333", linewidth=0.6))
+    if highlight is not None:
+        for poly in polygons_of(geoms[highlight]):
+            ax.add_patch(Polygon(poly[0], closed=True, fill=False, edgecolor="#1f77b4", linewidth=2.4))
+    if outline is not None:
+        for poly in polygons_of(outline):
+            ax.add_patch(Polygon(poly[0], closed=True, fill=False, edgecolor="#000", linewidth=1.2))
+
+    ax.autoscale_view()
+    ax.set_aspect(1.0 / np.cos(np.radians(np.mean(ax.get_ylim()))))
+    ax.set_axis_off()
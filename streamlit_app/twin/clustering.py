@@ -0,0 +1,123 @@
+# twin/clustering.py
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .similarity import standardize
+
+TYPE_COLORS = [
+    "#1b9e77", "#d95f02", "#7570b3", "#e7298a",
+    "#66a61e", "#e6ab02", "#a6761d", "#666666",
+]
+
+
+@dataclass
+class KMeansResult:
+    labels: np.ndarray      # (n,) cluster id per row, 0 = largest cluster
+    centers: np.ndarray     # (k, d) in standardized units
+    inertia: float          # sum of squared distances to the assigned center
+    seconds: float
+    n_iter: int
+
+
+def prepare_features(X: np.ndarray) -> np.ndarray:
+    """Standardize columns and fill missing cells with the column mean (0 in z-units)."""
+    Z, _, _ = standardize(X)
+    return np.where(np.isfinite(Z), Z, 0.0)
+
+
+def _assign(X: np.ndarray, C: np.ndarray, block: int = 65536) -> tuple[np.ndarray, np.ndarray]:
+    """Nearest center and squared distance per row, in row blocks to bound memory."""
+    c2 = (C ** 2).sum(1)
+    labels = np.empty(len(X), dtype=np.int64)
+    d2 = np.empty(len(X))
+    for s in range(0, len(X), block):
+        xb = X[s:s + block]
+        D = (xb ** 2).sum(1)[:, None] - 2.0 * xb @ C.T + c2[None, :]
+        labels[s:s + block] = D.argmin(1)
+        d2[s:s + block] = np.maximum(D[np.arange(len(xb)), labels[s:s + block]], 0.0)
+    return labels, d2
+
+
+def _kmeans_pp(X: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    C = [X[rng.integers(len(X))]]
+    d2 = ((X - C[0]) ** 2).sum(1)
+    for _ in range(1, k):
+        tot = d2.sum()
+        i = rng.choice(len(X), p=d2 / tot) if tot > 0 else rng.integers(len(X))
+        C.append(X[i])
+        d2 = np.minimum(d2, ((X - X[i]) ** 2).sum(1))
+    return np.array(C)
+
+
+def kmeans(X: np.ndarray, k: int, batch_size: int = 2048, max_iter: int = 100,
+           tol: float = 1e-4, seed: int = 0) -> KMeansResult:
+    """K-means on an already prepared (finite) feature matrix.
+
+    Small inputs (n <= batch_size) use full Lloyd iterations; larger ones switch to
+    mini-batch updates with per-center learning rates, so a national buurt table
+    costs a few passes over random batches instead of full passes per iteration.
+    """
+    t0 = time.perf_counter()
+    n = len(X)
+    k = int(min(k, n))
+    rng = np.random.default_rng(seed)
+    init_rows = X if n <= 20 * batch_size else X[rng.choice(n, 20 * batch_size, replace=False)]
+    C = _kmeans_pp(init_rows, k, rng)
+
+    it = 0
+    if n <= batch_size:
+        for it in range(1, max_iter + 1):
+            labels, _ = _assign(X, C)
+            newC = C.copy()
+            for j in range(k):
+                members = X[labels == j]
+                if len(members):
+                    newC[j] = members.mean(0)
+            shift = np.abs(newC - C).max()
+            C = newC
+            if shift < tol:
+                break
+    else:
+        counts = np.zeros(k)
+        for it in range(1, max_iter + 1):
+            xb = X[rng.integers(0, n, batch_size)]
+            lb, _ = _assign(xb, C)
+            prev = C.copy()
+            np.add.at(counts, lb, 1.0)
+            for j in np.unique(lb):
+                members = xb[lb == j]
+                eta = len(members) / counts[j]
+                C[j] = (1.0 - eta) * C[j] + eta * members.mean(0)
+            if np.abs(C - prev).max() < tol:
+                break
+
+    labels, d2 = _assign(X, C)
+    # Relabel by cluster size so colours stay stable across reruns
+    order = np.argsort(-np.bincount(labels, minlength=k), kind="mergesort")
+    remap = np.empty(k, dtype=np.int64)
+    remap[order] = np.arange(k)
+    return KMeansResult(
+        labels=remap[labels],
+        centers=C[order],
+        inertia=float(d2.sum()),
+        seconds=time.perf_counter() - t0,
+        n_iter=it,
+    )
+
+
+def sweep(X: np.ndarray, ks: list[int], **kwargs) -> pd.DataFrame:
+    """Inertia and run time for each k (elbow table)."""
+    rows = []
+    for k in ks:
+        r = kmeans(X, k, **kwargs)
+        rows.append({"k": k, "inertia": r.inertia, "seconds": r.seconds, "iterations": r.n_iter})
+    return pd.DataFrame(rows)
+
+
+def type_label(i: int) -> str:
+    return f"Type {i + 1}"
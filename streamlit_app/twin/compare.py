@@ -0,0 +1,182 @@
+# twin/compare.py
+"""Map comparison views that ship the region geometry once.
+
+`compare_html` renders one Leaflet page with any number of synchronized map panels.
+The geometry is serialized a single time (feature id = row position, no properties);
+each panel only adds a per-feature colour and tooltip array. The page size therefore
+grows with the number of panels/indicators, not with panels x geometry.
+
+`bivariate_classes` puts two indicators into a 3x3 class matrix in one vectorized
+pass (terciles of each indicator, class = 3 * row + column).
+"""
+from __future__ import annotations
+
+import json
+
+import numpy as np
+from branca.colormap import LinearColormap, StepColormap
+
+from .charts import PALETTE_RED
+
+LEAFLET_CSS = "https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"
+LEAFLET_JS = "https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"
+TILES = "https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png"
+MISSING_COLOR = "#cccccc"
+
+# Map page colour options (also enumerated by the static export)
+MAP_COLOR_MODES = ["Continuous gradient", "Discrete classes"]
+MAP_CLASSIFICATIONS = ["Equal interval", "Quantile"]
+MAP_CLASSES = list(range(5, 10))
+
+# Rows: indicator B low -> high; columns: indicator A low -> high (pink-blue scheme)
+BIVARIATE_COLORS = np.array([
+    ["#e8e8e8", "#e4acac", "#c85a5a"],
+    ["#b0d5df", "#ad9ea5", "#985356"],
+    ["#64acbe", "#627f8c", "#574249"],
+])
+
+
+def tercile_classes(X: np.ndarray) -> np.ndarray:
+    """Class 0/1/2 per cell of an (n x k) matrix, by the column terciles; -1 where missing."""
+    X = np.asarray(X, dtype=float)
+    finite = np.isfinite(X)
+    X = np.where(finite, X, np.nan)
+    q = np.zeros((2, X.shape[1]))
+    ok = finite.any(axis=0)
+    if ok.any():
+        q[:, ok] = np.nanquantile(X[:, ok], [1 / 3, 2 / 3], axis=0)
+    with np.errstate(invalid="ignore"):
+        cls = (X > q[0]).astype(np.int8) + (X > q[1])
+    return np.where(finite, cls, -1)
+
+
+def bivariate_classes(a, b) -> np.ndarray:
+    """3x3 class (0..8, = 3 * class_b + class_a) per region; -1 where either value is missing."""
+    c = tercile_classes(np.column_stack([a, b]))
+    return np.where((c >= 0).all(axis=1), 3 * c[:, 1] + c[:, 0], -1)
+
+
+def bivariate_counts(classes: np.ndarray) -> np.ndarray:
+    """3x3 matrix of region counts per class (rows: B low -> high, columns: A low -> high)."""
+    c = np.asarray(classes)
+    return np.bincount(c[c >= 0], minlength=9).reshape(3, 3)
+
+
+def bivariate_colors(classes: np.ndarray) -> list[str]:
+    flat = BIVARIATE_COLORS.ravel()
+    return np.where(classes >= 0, flat[np.clip(classes, 0, 8)], MISSING_COLOR).tolist()
+
+
+def ramp_colors(values, palette: list[str] = PALETTE_RED) -> tuple[list[str], float, float]:
+    """Equal-interval colours from `palette` per value (grey when missing), plus the value range."""
+    v = np.asarray(values, dtype=float)
+    finite = np.isfinite(v)
+    vmin, vmax = (float(v[finite].min()), float(v[finite].max())) if finite.any() else (0.0, 1.0)
+    span = vmax - vmin if vmax > vmin else 1.0
+    with np.errstate(invalid="ignore"):
+        idx = np.clip(np.floor((v - vmin) / span * len(palette)), 0, len(palette) - 1)
+    return np.where(finite, np.asarray(palette)[np.nan_to_num(idx).astype(int)], MISSING_COLOR).tolist(), vmin, vmax
+
+
+def combined_min_max(values):
+    arr = np.array([v for v in values if v is not None and np.isfinite(v)], dtype=float)
+    if arr.size == 0:
+        return 0.0, 1.0
+    vmin, vmax = float(arr.min()), float(arr.max())
+    if vmin == vmax:
+        vmin -= 0.5; vmax += 0.5
+    return vmin, vmax
+
+
+def map_colormap(values, color_mode: str = MAP_COLOR_MODES[0], classes: str = MAP_CLASSIFICATIONS[0], k: int = 7):
+    """The Map page colormap over `values` (neighbourhoods plus Ede): a gradient, or k classes."""
+    vmin, vmax = combined_min_max(values)
+    if color_mode == MAP_COLOR_MODES[0]:
+        return LinearColormap(colors=PALETTE_RED, vmin=vmin, vmax=vmax)
+    finite_vals = [x for x in values if x is not None and np.isfinite(x)]
+    if classes.lower().startswith("quantile") and len(finite_vals) >= k:
+        qs = np.linspace(0, 1, k + 1)
+        bins = list(np.quantile(finite_vals, qs))
+        for i in range(1, len(bins)):
+            if bins[i] <= bins[i-1]:
+                bins[i] = bins[i-1] + 1e-9
+    else:
+        bins = list(np.linspace(vmin, vmax, k + 1))
+    rng = abs(bins[-1]-bins[0])
+    if rng >= 100:  bins = [round(b,0) for b in bins]
+    elif rng >= 10: bins = [round(b,1) for b in bins]
+    else:           bins = [round(b,2) for b in bins]
+    return StepColormap(colors=PALETTE_RED[:k], index=bins, vmin=bins[0], vmax=bins[-1])
+
+
+def geometry_payload(gj: dict) -> str:
+    """FeatureCollection JSON with only geometry and the row position as feature id."""
+    feats = [{"type": "Feature", "id": i, "geometry": f.get("geometry"), "properties": {}}
+             for i, f in enumerate(gj.get("features", []))]
+    return json.dumps({"type": "FeatureCollection", "features": feats}, separators=(",", ":"))
+
+
+def ramp_legend(title: str, vmin: float, vmax: float, palette: list[str] = PALETTE_RED) -> str:
+    grad = ",".join(palette)
+    return (f"<b>{title}</b><div style='width:160px;height:10px;background:linear-gradient(to right,{grad})'></div>"
+            f"<div style='display:flex;justify-content:space-between;width:160px'><span>{vmin:,.4g}</span>"
+            f"<span>{vmax:,.4g}</span></div>")
+
+
+def bivariate_legend(label_a: str, label_b: str) -> str:
+    cells = "".join(
+        f"<div style='width:18px;height:18px;background:{BIVARIATE_COLORS[2 - r, c]}'></div>"
+        for r in range(3) for c in range(3)
+    )
+    return (f"<div style='display:flex;align-items:center;gap:6px'>"
+            f"<div style='writing-mode:vertical-rl;transform:rotate(180deg)'>{label_b} &rarr;</div>"
+            f"<div style='display:grid;grid-template-columns:repeat(3,18px)'>{cells}</div></div>"
+            f"<div style='margin-left:22px'>{label_a} &rarr;</div>")
+
+
+def compare_html(geometry: str, names: list[str], panels: list[dict], bounds, height: int = 520) -> str:
+    """Synchronized Leaflet panels over one geometry payload.
+
+    Each panel is a dict with `title`, `colors` and `labels` (one entry per feature)
+    and optional `legend` HTML. `bounds` is [[south, west], [north, east]].
+    """
+    divs = "".join(
+        f"<div style='flex:1;min-width:0'><div style='font:600 14px sans-serif;margin:0 0 4px 2px'>{p['title']}</div>"
+        f"<div id='panel{i}' style='height:{height}px'></div></div>"
+        for i, p in enumerate(panels)
+    )
+    data = json.dumps([{"colors": p["colors"], "labels": p["labels"], "legend": p.get("legend", "")} for p in panels],
+                      separators=(",", ":"))
+    return f"""<!DOCTYPE html><html><head><meta charset="utf-8">
+<link rel="stylesheet" href="{LEAFLET_CSS}"/><script src="{LEAFLET_JS}"></script>
+<style>body{{margin:0}} .legend{{background:rgba(255,255,255,.9);padding:6px 8px;border-radius:6px;font:12px sans-serif}}
+.leaflet-control-attribution{{font-size:9px}}</style></head><body>
+<div style="display:flex;gap:8px">{divs}</div>
+<script>
+const GEOMETRY = {geometry};
+const NAMES = {json.dumps(list(names))};
+const PANELS = {data};
+const BOUNDS = {json.dumps(bounds)};
+let syncing = false;
+const maps = PANELS.map((p, i) => {{
+  const m = L.map("panel" + i, {{zoomSnap: 0.25}});
+  L.tileLayer("{TILES}", {{attribution: "&copy; OpenStreetMap contributors &copy; CARTO", subdomains: "abcd", maxZoom: 19}}).addTo(m);
+  L.geoJSON(GEOMETRY, {{
+    style: f => ({{fillColor: p.colors[f.id], fillOpacity: 0.85, color: "#333", weight: 0.6}}),
+    onEachFeature: (f, layer) => layer.bindTooltip("<b>" + NAMES[f.id] + "</b><br>" + p.labels[f.id], {{sticky: true}})
+  }}).addTo(m);
+  if (p.legend) {{
+    const lg = L.control({{position: "bottomright"}});
+    lg.onAdd = () => {{ const d = L.DomUtil.create("div", "legend"); d.innerHTML = p.legend; return d; }};
+    lg.addTo(m);
+  }}
+  m.fitBounds(BOUNDS);
+  return m;
+}});
+maps.forEach((m, i) => m.on("move", () => {{
+  if (syncing) return;
+  syncing = true;
+  maps.forEach((o, j) => {{ if (j !== i) o.setView(m.getCenter(), m.getZoom(), {{animate: false}}); }});
+  syncing = false;
+}}));
+</script></body></html>"""
@@ -0,0 +1,302 @@
+# twin/crosswalk.py
+"""Crosswalks between two region divisions (e.g. CBS buurten 2022 -> 2024).
+
+Both divisions are scan-converted onto one metric grid (default 25 m cells): every
+polygon edge is intersected with the grid rows in one vectorized pass, crossings are
+sorted and paired into (region, row, first col, last col) spans. The grid doubles as
+the spatial index. Rows are then processed in bands: the source division is painted
+into a dense band raster and read back at the target's cells (and at address
+points, for address-weighted overlap), which gives the overlap pairs without any
+polygon-polygon tests (addresses take the region of the cell they fall in). Overlap weights are stored as a sparse CSR (target x source)
+matrix, so reallocating an indicator between years is a sparse mat-vec:
+
+    cw = build_crosswalk(old, new, old_codes, new_codes)
+    pct_2024 = cw.intensive(pct_2022)       # rates: overlap-weighted mean
+    n_2024 = cw.extensive(n_2022)           # counts: split by overlap share
+
+    python -m twin.crosswalk old.geojson new.geojson --out crosswalk.npz [--cell 25] [--addresses pts.geojson]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .geometry import KM_PER_DEG_LAT, KM_PER_DEG_LON, FlatGeometry, flatten_polygons
+
+BAND_CELLS = 8_000_000      # cells per processing band (bounds memory of the band rasters)
+
+
+# ---------- Sparse matrix ----------
+@dataclass
+class CSR:
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    shape: tuple[int, int]
+    _rows: np.ndarray = field(default=None, repr=False)
+
+    @classmethod
+    def from_triplets(cls, rows, cols, vals, shape) -> "CSR":
+        """Sum duplicate (row, col) entries and pack them row-major."""
+        rows, cols = np.asarray(rows, np.int64), np.asarray(cols, np.int64)
+        key, inv = np.unique(rows * shape[1] + cols, return_inverse=True)
+        data = np.bincount(inv, weights=np.asarray(vals, float), minlength=len(key))
+        r = key // shape[1]
+        indptr = np.zeros(shape[0] + 1, np.int64)
+        np.cumsum(np.bincount(r, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, (key % shape[1]).astype(np.int64), data, shape)
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return self._rows
+
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        return np.bincount(self.row_ids, weights=self.data * np.asarray(x, float)[self.indices],
+                           minlength=self.shape[0])
+
+    def row_sums(self) -> np.ndarray:
+        return np.bincount(self.row_ids, weights=self.data, minlength=self.shape[0])
+
+    def col_sums(self) -> np.ndarray:
+        return np.bincount(self.indices, weights=self.data, minlength=self.shape[1])
+
+    def scaled(self, row_scale: np.ndarray | None = None, col_scale: np.ndarray | None = None) -> "CSR":
+        d = self.data.copy()
+        if row_scale is not None:
+            d *= row_scale[self.row_ids]
+        if col_scale is not None:
+            d *= col_scale[self.indices]
+        return CSR(self.indptr, self.indices, d, self.shape, self._rows)
+
+
+# ---------- Scan conversion ----------
+@dataclass
+class Grid:
+    x0: float     # km, local equirectangular
+    y0: float
+    cell: float   # km
+    ncols: int
+    nrows: int
+    kx: float     # km per degree longitude at the reference latitude
+
+    def project(self, lon, lat) -> tuple[np.ndarray, np.ndarray]:
+        return np.asarray(lon) * self.kx, np.asarray(lat) * KM_PER_DEG_LAT
+
+    def cell_of(self, lon, lat) -> tuple[np.ndarray, np.ndarray]:
+        x, y = self.project(lon, lat)
+        return np.floor((y - self.y0) / self.cell).astype(np.int64), np.floor((x - self.x0) / self.cell).astype(np.int64)
+
+
+def make_grid(geoms: list[FlatGeometry], cell_m: float) -> Grid:
+    coords = np.concatenate([g.coords for g in geoms if len(g.coords)])
+    lat0 = float(np.mean([coords[:, 1].min(), coords[:, 1].max()]))
+    kx = KM_PER_DEG_LON * np.cos(np.radians(lat0))
+    x, y = coords[:, 0] * kx, coords[:, 1] * KM_PER_DEG_LAT
+    cell = cell_m / 1000.0
+    x0, y0 = float(x.min()) - cell, float(y.min()) - cell
+    return Grid(x0, y0, cell, int(np.ceil((x.max() - x0) / cell)) + 2, int(np.ceil((y.max() - y0) / cell)) + 2, kx)
+
+
+def scan_spans(geom: FlatGeometry, grid: Grid) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(feature, row, c0, c1) spans of grid cells whose centres lie inside each feature (even-odd)."""
+    n_pts = len(geom.coords)
+    ring_len = np.diff(geom.ring_ptr)
+    ring_feat = np.repeat(np.repeat(np.arange(len(geom.feat_ptr) - 1), np.diff(geom.feat_ptr)), np.diff(geom.poly_ptr))
+    feat = np.repeat(ring_feat, ring_len)
+    nxt = np.arange(1, n_pts + 1)
+    nxt[geom.ring_ptr[1:] - 1] = geom.ring_ptr[:-1]          # close every ring
+    x, y = grid.project(geom.coords[:, 0], geom.coords[:, 1])
+    x, y = (x - grid.x0) / grid.cell - 0.5, (y - grid.y0) / grid.cell - 0.5   # cell-centre units
+    xa, ya, xb, yb = x, y, x[nxt], y[nxt]
+
+    # Rows whose centre line crosses each edge (half-open in y, so vertices count once)
+    lo, hi = np.ceil(np.minimum(ya, yb)).astype(np.int64), np.ceil(np.maximum(ya, yb)).astype(np.int64)
+    cnt = np.where(ya != yb, hi - lo, 0)
+    e = np.repeat(np.arange(n_pts), cnt)
+    row = np.repeat(lo, cnt) + (np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt))
+    t = (row - ya[e]) / (yb[e] - ya[e])
+    xc = xa[e] + t * (xb[e] - xa[e])
+    f = feat[e]
+
+    order = np.lexsort((xc, row, f))
+    f, row, xc = f[order], row[order], xc[order]
+    # Even-odd: consecutive crossings of one (feature, row) bound an inside span
+    f, row, left, right = f[0::2], row[0::2], xc[0::2], xc[1::2]
+    c0, c1 = np.ceil(left).astype(np.int64), np.ceil(right).astype(np.int64)
+    keep = c1 > c0
+    return f[keep], row[keep], c0[keep], c1[keep]
+
+
+def _runs(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Run-length encode: cells of one span mostly share a key, so this shrinks the pairs a lot."""
+    if not len(keys):
+        return keys, np.empty(0)
+    start = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[start], np.diff(np.r_[start, len(keys)]).astype(float)
+
+
+def _expand(f, row, c0, c1, row0: int, ncols: int) -> tuple[np.ndarray, np.ndarray]:
+    """Cells (flat index within the band) and labels covered by spans."""
+    n = c1 - c0
+    start = (row - row0) * ncols + c0
+    cells = np.repeat(start, n) + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+    return cells, np.repeat(f, n)
+
+
+# ---------- Crosswalk ----------
+@dataclass
+class Crosswalk:
+    src_codes: np.ndarray
+    dst_codes: np.ndarray
+    overlap: CSR              # (n_dst, n_src) km² or address counts
+    src_total: np.ndarray     # (n_src,) total weight of each source region
+    dst_total: np.ndarray     # (n_dst,)
+    weight: str = "area"
+
+    def __post_init__(self):
+        with np.errstate(divide="ignore"):
+            self._split = self.overlap.scaled(col_scale=np.where(self.src_total > 0, 1.0 / self.src_total, 0.0))
+            rs = self.overlap.row_sums()
+            self._mean = self.overlap.scaled(row_scale=np.where(rs > 0, 1.0 / rs, 0.0))
+
+    def extensive(self, x: np.ndarray) -> np.ndarray:
+        """Counts: each source value is split over targets by its overlap share."""
+        return self._split.matvec(np.nan_to_num(np.asarray(x, float)))
+
+    def intensive(self, x: np.ndarray) -> np.ndarray:
+        """Rates and shares: overlap-weighted mean of the source values (NaN sources skipped)."""
+        x = np.asarray(x, float)
+        ok = np.isfinite(x)
+        if ok.all():
+            out = self._mean.matvec(x)
+            out[self.overlap.row_sums() == 0] = np.nan
+            return out
+        num, den = self.overlap.matvec(np.where(ok, x, 0.0)), self.overlap.matvec(ok.astype(float))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(den > 0, num / den, np.nan)
+
+    def reallocate(self, df: pd.DataFrame, code_col: str, columns: list[str], kind: str = "intensive") -> pd.DataFrame:
+        """Table keyed by source code -> the same columns keyed by target code."""
+        idx = pd.Index(self.src_codes).get_indexer(df[code_col].astype(str).str.strip())
+        out = {code_col: self.dst_codes}
+        for c in columns:
+            x = np.full(len(self.src_codes), np.nan)
+            ok = idx >= 0
+            x[idx[ok]] = pd.to_numeric(df[c], errors="coerce").to_numpy()[ok]
+            out[c] = self.intensive(x) if kind == "intensive" else self.extensive(x)
+        return pd.DataFrame(out)
+
+    def coverage(self) -> np.ndarray:
+        """Share of each target region covered by source regions."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.overlap.row_sums() / self.dst_total
+
+    def save(self, path: Path) -> None:
+        np.savez_compressed(path, src_codes=self.src_codes.astype(str), dst_codes=self.dst_codes.astype(str),
+                            indptr=self.overlap.indptr, indices=self.overlap.indices, data=self.overlap.data,
+                            shape=np.array(self.overlap.shape), src_total=self.src_total,
+                            dst_total=self.dst_total, weight=np.array(self.weight))
+
+    @classmethod
+    def load(cls, path: Path) -> "Crosswalk":
+        z = np.load(path)
+        m = CSR(z["indptr"], z["indices"], z["data"], tuple(int(v) for v in z["shape"]))
+        return cls(z["src_codes"], z["dst_codes"], m, z["src_total"], z["dst_total"], str(z["weight"]))
+
+
+def build_crosswalk(src: FlatGeometry, dst: FlatGeometry, src_codes, dst_codes, cell_m: float = 25.0,
+                    points: tuple[np.ndarray, np.ndarray] | None = None) -> Crosswalk:
+    """Overlap of two divisions by area (grid cells) or by `points` (lon, lat), e.g. addresses."""
+    grid = make_grid([src, dst], cell_m)
+    n_src, n_dst = len(src.feat_ptr) - 1, len(dst.feat_ptr) - 1
+    spans_s, spans_d = scan_spans(src, grid), scan_spans(dst, grid)
+    if points is not None:
+        prow, pcol = grid.cell_of(*points)
+        porder = np.argsort(prow, kind="stable")
+        prow, pcol = prow[porder], pcol[porder]
+
+    cell_km2 = grid.cell ** 2
+    band = max(1, BAND_CELLS // grid.ncols)
+    keys, vals = [], []
+    src_total, dst_total = np.zeros(n_src), np.zeros(n_dst)
+    for r0 in range(0, grid.nrows, band):
+        r1 = min(r0 + band, grid.nrows)
+        raster = np.full((r1 - r0) * grid.ncols, -1, dtype=np.int64)
+        sel = [(s[1] >= r0) & (s[1] < r1) for s in (spans_s, spans_d)]
+        cs, ls = _expand(*(a[sel[0]] for a in spans_s), r0, grid.ncols)
+        cd, ld = _expand(*(a[sel[1]] for a in spans_d), r0, grid.ncols)
+        raster[cs] = ls
+        if points is None:
+            src_total += np.bincount(ls, minlength=n_src) * cell_km2
+            dst_total += np.bincount(ld, minlength=n_dst) * cell_km2
+            a = raster[cd]
+            hit = a >= 0
+            k, n = _runs(ld[hit] * n_src + a[hit])
+            keys.append(k)
+            vals.append(n * cell_km2)
+        else:
+            i0, i1 = np.searchsorted(prow, [r0, r1])
+            pc = (prow[i0:i1] - r0) * grid.ncols + pcol[i0:i1]
+            pc = pc[(pcol[i0:i1] >= 0) & (pcol[i0:i1] < grid.ncols)]
+            a = raster[pc]
+            raster.fill(-1)
+            raster[cd] = ld
+            b = raster[pc]
+            src_total += np.bincount(a[a >= 0], minlength=n_src)
+            dst_total += np.bincount(b[b >= 0], minlength=n_dst)
+            hit = (a >= 0) & (b >= 0)
+            keys.append(b[hit] * n_src + a[hit])
+            vals.append(np.ones(int(hit.sum())))
+
+    k = np.concatenate(keys) if keys else np.empty(0, np.int64)
+    v = np.concatenate(vals) if vals else np.empty(0)
+    m = CSR.from_triplets(k // n_src, k % n_src, v, (n_dst, n_src))
+    return Crosswalk(np.asarray(src_codes, dtype=str), np.asarray(dst_codes, dtype=str), m, src_total, dst_total,
+                     "area" if points is None else "addresses")
+
+
+def load_division(path: Path, code_col: str) -> tuple[FlatGeometry, np.ndarray]:
+    with open(path, "r", encoding="utf-8") as f:
+        feats = json.load(f).get("features", [])
+    codes = np.array([str((ft.get("properties") or {}).get(code_col, "")).strip() for ft in feats])
+    return flatten_polygons(ft.get("geometry") for ft in feats), codes
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build an overlap crosswalk between two region divisions.")
+    ap.add_argument("source", type=Path, help="GeoJSON of the old division")
+    ap.add_argument("target", type=Path, help="GeoJSON of the new division")
+    ap.add_argument("--code", default="buurtcode", help="region code property in both files")
+    ap.add_argument("--cell", type=float, default=25.0, help="grid cell size in metres (area weighting)")
+    ap.add_argument("--addresses", type=Path, help="GeoJSON points to weight overlaps by (e.g. BAG addresses)")
+    ap.add_argument("--out", type=Path, required=True)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    src, src_codes = load_division(args.source, args.code)
+    dst, dst_codes = load_division(args.target, args.code)
+    points = None
+    if args.addresses:
+        from .graph import load_points
+        lon, lat, _ = load_points(args.addresses)
+        points = (lon, lat)
+    t1 = time.perf_counter()
+    cw = build_crosswalk(src, dst, src_codes, dst_codes, args.cell, points)
+    t2 = time.perf_counter()
+    cw.save(args.out)
+    cov = cw.coverage()
+    print(f"{len(src_codes):,} -> {len(dst_codes):,} regions, {len(cw.overlap.data):,} overlaps "
+          f"(read {t1 - t0:.1f} s, crosswalk {t2 - t1:.1f} s); "
+          f"median target coverage {np.nanmedian(cov):.1%}; saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
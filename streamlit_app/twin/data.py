@@ -0,0 +1,86 @@
+# twin/data.py
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ---------- Paths ----------
+APP_ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_ROOT / "data"
+
+CATALOG_CSV = DATA_DIR / "variables_catalog.csv"
+NEIGH_GJSON = DATA_DIR / "neighbourhoods_veld.geojson"
+MUNI_GJSON  = DATA_DIR / "municipality_ede.geojson"
+WIJK_GJSON  = DATA_DIR / "wijkenbuurtenwijken.geojson"
+VELD_GJSON  = DATA_DIR / "wijk_boundary_veld.geojson"
+
+# Optional local layers (not shipped; features that need them explain how to add them)
+STREETS_GJSON          = DATA_DIR / "streets_veld.geojson"            # LineStrings, e.g. OSM footways
+AMENITIES_GJSON        = DATA_DIR / "amenities_veld.geojson"          # Points with a `class` property
+BENCHES_GJSON          = DATA_DIR / "benches_veld.geojson"            # Points, existing benches
+BENCH_CANDIDATES_GJSON = DATA_DIR / "bench_candidates_veld.geojson"   # Points, optional `priority`
+
+CATALOG_REQUIRED = {"dimension", "label", "column", "unit"}
+
+# ---------- Readers ----------
+def geojson_to_table(path: Path) -> pd.DataFrame:
+    """Read a GeoJSON and return a pandas DataFrame of feature properties."""
+    with open(path, "r", encoding="utf-8") as f:
+        gj = json.load(f)
+    props = [feat.get("properties", {}) for feat in gj.get("features", [])]
+    return pd.DataFrame(props)
+
+def read_catalog(path: Path = CATALOG_CSV) -> pd.DataFrame:
+    """Read variables_catalog.csv and check the required columns."""
+    cat = pd.read_csv(path, encoding="utf-8-sig")
+    missing = CATALOG_REQUIRED - set(cat.columns)
+    if missing:
+        raise ValueError(f"variables_catalog.csv missing columns: {missing}")
+    return cat
+
+def snapshot_key(*paths: Path) -> str:
+    """Cheap fingerprint of the data files (name, size, mtime) used as a cache key."""
+    paths = paths or (CATALOG_CSV, NEIGH_GJSON, MUNI_GJSON)
+    h = hashlib.sha1()
+    for p in paths:
+        p = Path(p)
+        if p.exists():
+            st = p.stat()
+            h.update(f"{p.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+        else:
+            h.update(f"{p.name}:missing;".encode())
+    return h.hexdigest()[:16]
+
+_CONTENT_HASHES: dict[tuple, str] = {}
+
+def content_key(*paths: Path) -> str:
+    """Fingerprint of the data file contents: equal across machines and redeployments.
+
+    Each file is hashed once per (path, size, mtime); later calls cost a stat.
+    """
+    paths = paths or (CATALOG_CSV, NEIGH_GJSON, MUNI_GJSON)
+    h = hashlib.sha1()
+    for p in paths:
+        p = Path(p)
+        if not p.exists():
+            h.update(f"{p.name}:missing;".encode())
+            continue
+        st = p.stat()
+        sig = (str(p), st.st_size, st.st_mtime_ns)
+        digest = _CONTENT_HASHES.get(sig)
+        if digest is None:
+            digest = _CONTENT_HASHES[sig] = hashlib.sha1(p.read_bytes()).hexdigest()
+        h.update(f"{p.name}:{digest};".encode())
+    return h.hexdigest()[:16]
+
+def numeric_matrix(df: pd.DataFrame, columns: list[str]) -> np.ndarray:
+    """Float matrix (rows x columns) with NaN for missing or non-numeric cells."""
+    out = np.full((len(df), len(columns)), np.nan, dtype=float)
+    for j, col in enumerate(columns):
+        if col in df.columns:
+            out[:, j] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+    return out
@@ -0,0 +1,216 @@
+# twin/dataplane.py
+"""Memory-mapped data plane shared by all server processes on a host.
+
+A loader (`python -m twin.dataplane [--watch]`) parses every region layer once and
+publishes, per data version, plain .npy files: the numeric attribute columns as one
+column-major float matrix, each text column as a fixed-width string array (plus a
+null mask), and the geometry as flat coordinate arrays with ring/polygon/feature
+offsets. Workers map these files read-only, so the pages live in the shared page
+cache instead of in every process. `DataPlane.features` exposes a layer as a
+FeatureCollection whose properties and coordinates are read from the mapped
+arrays, for code written against parsed GeoJSON. A version is written to a temporary directory and renamed into place,
+then the CURRENT pointer is replaced atomically; workers pick up the new version
+on their next refresh() and never see a half-written one. Data that fails the
+quality checks of twin.validate is not published.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .data import APP_ROOT, CATALOG_CSV, MUNI_GJSON, NEIGH_GJSON, WIJK_GJSON, content_key
+from .geometry import FlatGeometry, flatten_polygons
+from .validate import require, validate_files
+
+PLANE_DIR = Path(os.environ.get("TWIN_DATA_PLANE", APP_ROOT / ".data_plane"))
+LAYERS = {"buurt": NEIGH_GJSON, "wijk": WIJK_GJSON, "gemeente": MUNI_GJSON}
+KEEP_VERSIONS = 2        # older versions are removed by the publisher
+PLANE_VERSION = "3"      # bump when the published layout changes so data is republished
+GEOMETRY_ARRAYS = ("coords", "ring_ptr", "poly_ptr", "feat_ptr")
+
+
+# ---------- Publishing ----------
+def _write_layer(path: Path, out: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        features = json.load(f).get("features", [])
+    df = pd.DataFrame([ft.get("properties") or {} for ft in features])
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    text = [c for c in df.columns if c not in numeric]
+    np.save(out / "num.npy", np.asfortranarray(df[numeric].to_numpy(dtype=float)).reshape(len(df), len(numeric)))
+    null = np.asfortranarray(df[text].isna().to_numpy(dtype=bool)).reshape(len(df), len(text))
+    np.save(out / "txt_null.npy", null)
+    for k, c in enumerate(text):
+        np.save(out / f"txt{k}.npy", np.array(["" if n else str(v) for v, n in zip(df[c], null[:, k])], dtype=str))
+    flat = flatten_polygons(ft.get("geometry") for ft in features)
+    for name in GEOMETRY_ARRAYS:
+        np.save(out / f"{name}.npy", getattr(flat, name))
+    return {"rows": len(df), "numeric": numeric, "text": text, "columns": list(df.columns),
+            "dtypes": {c: str(df[c].dtype) for c in numeric}}
+
+
+def publish(root: Path = PLANE_DIR) -> str:
+    """Parse all layers and make them the current version; returns the version id."""
+    version = f"{content_key(CATALOG_CSV, *LAYERS.values())}-{PLANE_VERSION}"
+    root.mkdir(parents=True, exist_ok=True)
+    target = root / version
+    if not (target / "meta.json").exists():
+        report = require(validate_files())       # a version that fails validation is never published
+        tmp = Path(tempfile.mkdtemp(dir=root, prefix=".tmp-"))
+        (tmp / "quality.json").write_text(json.dumps(report), encoding="utf-8")
+        meta = {"version": version, "created": time.time(), "layers": {}}
+        for lvl, path in LAYERS.items():
+            if path.exists():
+                (tmp / lvl).mkdir()
+                meta["layers"][lvl] = _write_layer(path, tmp / lvl)
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        try:
+            os.rename(tmp, target)
+        except OSError:                       # published concurrently by another loader
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    fd, ptr = tempfile.mkstemp(dir=root, prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(version)
+    os.replace(ptr, root / "CURRENT")
+
+    versions = sorted((p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")),
+                      key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in [p for p in versions if p.name != version][KEEP_VERSIONS - 1:]:
+        shutil.rmtree(old, ignore_errors=True)   # mapped pages stay valid for open workers
+    return version
+
+
+# ---------- Attaching ----------
+class DataPlane:
+    def __init__(self, root: Path = PLANE_DIR):
+        self.root = Path(root)
+        self.version = None
+        self._lock = threading.Lock()
+        self._meta: dict = {}
+        self._layers: dict[str, dict] = {}
+
+    def refresh(self) -> str | None:
+        """Attach to the current version (no-op if unchanged); None when nothing is published."""
+        try:
+            current = (self.root / "CURRENT").read_text().strip()
+        except OSError:
+            return None
+        if current != self.version:
+            with self._lock:
+                if current != self.version:
+                    meta = json.loads((self.root / current / "meta.json").read_text(encoding="utf-8"))
+                    self._meta, self._layers, self.version = meta, {}, current
+        return self.version
+
+    def levels(self) -> list[str]:
+        self.refresh()
+        return list(self._meta.get("layers", {}))
+
+    def _layer(self, level: str) -> dict:
+        if self.refresh() is None or level not in self._meta["layers"]:
+            raise KeyError(f"level '{level}' not published")
+        lay = self._layers.get(level)
+        if lay is None:
+            d = self.root / self.version / level
+            text = self._meta["layers"][level]["text"]
+            lay = {name: np.load(d / f"{name}.npy", mmap_mode="r")
+                   for name in ("num", "txt_null", *GEOMETRY_ARRAYS, *(f"txt{k}" for k in range(len(text))))}
+            self._layers[level] = lay
+        return lay
+
+    def numeric(self, level: str) -> tuple[list[str], np.ndarray]:
+        """Numeric column names and the read-only (rows x columns) memory-mapped matrix."""
+        lay = self._layer(level)
+        return self._meta["layers"][level]["numeric"], lay["num"]
+
+    def column(self, level: str, column: str) -> np.ndarray:
+        cols, num = self.numeric(level)
+        return num[:, cols.index(column)]
+
+    def table(self, level: str) -> pd.DataFrame:
+        """Attribute table as geojson_to_table reads it: same column order and dtypes.
+
+        Float columns are views on the mapped file (treat as read-only). Int and bool
+        columns are stored as floats and cast back, and text columns become object
+        arrays of str/None; those columns are copies held by the calling process.
+        """
+        lay = self._layer(level)
+        meta = self._meta["layers"][level]
+        cols = {c: lay["num"][:, k] for k, c in enumerate(meta["numeric"])}
+        for c, dtype in meta["dtypes"].items():
+            if dtype != "float64":
+                cols[c] = cols[c].astype(dtype)
+        for k, c in enumerate(meta["text"]):
+            cols[c] = lay[f"txt{k}"].astype(object)
+            cols[c][lay["txt_null"][:, k]] = None
+        return pd.DataFrame({c: cols[c] for c in meta["columns"]}, copy=False)
+
+    def geometry(self, level: str) -> FlatGeometry:
+        lay = self._layer(level)
+        return FlatGeometry(*(lay[name] for name in GEOMETRY_ARRAYS))
+
+    def features(self, level: str) -> dict:
+        """The layer as a read-only FeatureCollection backed by the mapped arrays.
+
+        Properties are looked up in the table columns on access and each geometry is
+        a MultiPolygon whose rings are views on the mapped coordinates, so no
+        per-feature copies are made. Use twin.overlay to serialize it.
+        """
+        table, flat = self.table(level), self.geometry(level)
+        cols = {c: table[c].to_numpy() for c in table.columns}
+        return {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "properties": _Properties(cols, i),
+             "geometry": {"type": "MultiPolygon", "coordinates": flat.polygons(i)}}
+            for i in range(len(table))]}
+
+
+class _Properties(Mapping):
+    """Properties of feature `i` as JSON values (NaN -> None), read from the table columns."""
+    __slots__ = ("_cols", "_i")
+
+    def __init__(self, cols: dict[str, np.ndarray], i: int):
+        self._cols, self._i = cols, i
+
+    def __getitem__(self, key):
+        v = self._cols[key][self._i]
+        v = v.item() if isinstance(v, np.generic) else v
+        return None if isinstance(v, float) and v != v else v
+
+    def __iter__(self):
+        return iter(self._cols)
+
+    def __len__(self) -> int:
+        return len(self._cols)
+
+
+PLANE = DataPlane()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Publish the region layers as a shared memory-mapped data plane.")
+    ap.add_argument("--root", type=Path, default=PLANE_DIR)
+    ap.add_argument("--watch", type=float, default=0.0, help="re-publish when the data changes, polling every N s")
+    args = ap.parse_args(argv)
+    last = None
+    while True:
+        version = publish(args.root)
+        if version != last:
+            print(f"Published data plane {version} -> {args.root}")
+            last = version
+        if args.watch <= 0:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
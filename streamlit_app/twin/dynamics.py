@@ -0,0 +1,281 @@
+# twin/dynamics.py
+"""System-dynamics mode: the Drivers diagram as a weighted dynamical system.
+
+Every driver of the diagram is a state in [0, 1] per buurt. A driver relaxes, with
+the time constant of its dimension, toward its baseline plus the weighted
+deviations of the drivers pointing at it, plus the intervention input:
+
+    dx/dt = (x0 + (x - x0) @ W + u(t) - x) / tau,      x in [0, 1]
+
+W holds the diagram's arrows (row = from, column = to), so feedback loops (green
+spaces -> community participation -> the social -> environment arc -> green spaces)
+carry an intervention on beyond its first-order effect. With non-negative weights
+and a loop gain (spectral radius of W) below 1 the system settles; the state is
+projected onto [0, 1] after every step either way. All buurten are integrated at
+once as one (regions x drivers) matrix. The system is linear between the bounds,
+so the default integrator steps it exactly with the matrix exponential of the
+drivers' coupling (one small matrix product per step and no step-size error);
+fixed-step RK4 is kept as the reference.
+
+Baselines come from catalog indicators where a driver has a counterpart
+(loneliness for social networks, ...); drivers without data start at 0.5.
+
+    python -m twin.dynamics --regions 10000 --months 100 --drivers 36     (timing)
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from .scenario import DIMENSIONS, QOL_WEIGHTS
+
+# Drivers of pages/03_Drivers diagram.py: id -> (label, dimension)
+DRIVERS = {
+    "SN": ("Social networks", "social"),
+    "CP": ("Community participation", "social"),
+    "ES": ("Emotional security", "psychological"),
+    "SA": ("Sense of autonomy", "psychological"),
+    "Purpose": ("Purpose", "psychological"),
+    "Downshift": ("Downshift", "psychological"),
+    "PS": ("Proximity to services", "environmental"),
+    "GS": ("Green spaces", "environmental"),
+    "MA": ("Mobility & accessibility", "environmental"),
+    "SI": ("Social infrastructures", "environmental"),
+    "Safety": ("Safety", "environmental"),
+    "PA": ("Physical activity & active lifestyle", "physical"),
+}
+_ENV = [k for k, (_, dim) in DRIVERS.items() if dim == "environmental"]
+
+EDGE_WEIGHT = 0.3     # arrows between two drivers (A01-A15)
+FRAME_WEIGHT = 0.1    # frame-level arrows, spread over every driver of the frame (A16, A00)
+EDGES = [
+    ("SN", "Purpose"), ("SN", "ES"), ("SN", "SA"),                      # A01-A03
+    ("CP", "Purpose"), ("CP", "Downshift"), ("CP", "PA"),               # A04-A06
+    ("PS", "SN"), ("PS", "SA"), ("GS", "CP"), ("GS", "Downshift"),      # A07-A10
+    ("MA", "CP"), ("SI", "SN"), ("SI", "CP"),                           # A11-A13
+    ("Safety", "CP"), ("Safety", "Downshift"),                          # A14-A15
+]
+FRAME_EDGES = [(e, "PA") for e in _ENV]                                 # A16: environment -> physical activity
+# A00, the dotted social -> environment arc, is the only arrow back upstream: it closes every loop
+FEEDBACK_EDGES = [(s, e) for s in ("SN", "CP") for e in _ENV]
+
+TAU_MONTHS = {"social": 6.0, "psychological": 9.0, "physical": 4.0, "environmental": 24.0}
+
+# Input per bench on the environmental drivers (state units); the sign of safety
+# follows the one-shot mock (scenario.BENCH_EFFECTS)
+BENCH_INPUTS = {"MA": 0.010, "SI": 0.015, "Safety": -0.005}
+RAMP_MONTHS = 6.0     # benches are placed over the first months
+
+# Driver baselines from catalog indicators: column, higher-is-better for % indicators
+BASELINE_COLUMNS = {
+    "SN": ("health_lonely", False),
+    "ES": ("health_lacks_emotional_support", False),
+    "SA": ("health_limited_daily_activ_due_to_health", False),
+    "Purpose": ("health_very_high_resilience", True),
+    "Downshift": ("health_psychological_complaints", False),
+    "CP": ("health_does_volunteer_work", True),
+    "PA": ("health_meets_phys_activ_guidel", True),
+    "PS": ("prox_dist_gp_practice_km", False),
+}
+KM_SCALE = 2.0        # distances score exp(-km / KM_SCALE)
+NEUTRAL = 0.5
+
+
+@dataclass
+class Model:
+    drivers: list[str]
+    W: np.ndarray          # (d, d) weight of the arrow i -> j at [i, j]
+    tau: np.ndarray        # (d,) time constants in months
+
+    @property
+    def loop_gain(self) -> float:
+        """Spectral radius of W; below 1 the feedback loops settle."""
+        return float(np.abs(np.linalg.eigvals(self.W)).max()) if len(self.W) else 0.0
+
+
+def build_model(coupling: float = 1.0, feedback: bool = True) -> Model:
+    """The diagram's arrows with their default weights scaled by `coupling`.
+
+    Without `feedback` the social -> environment arc is left out and the network is acyclic.
+    """
+    drivers = list(DRIVERS)
+    idx = {k: i for i, k in enumerate(drivers)}
+    W = np.zeros((len(drivers), len(drivers)))
+    groups = [(EDGES, EDGE_WEIGHT), (FRAME_EDGES, FRAME_WEIGHT)] + ([(FEEDBACK_EDGES, FRAME_WEIGHT)] if feedback else [])
+    for edges, w in groups:
+        for a, b in edges:
+            W[idx[a], idx[b]] += w
+    tau = np.array([TAU_MONTHS[DRIVERS[k][1]] for k in drivers])
+    return Model(drivers, coupling * W, tau)
+
+
+def baseline(df: pd.DataFrame, catalog: pd.DataFrame, drivers: list[str]) -> np.ndarray:
+    """(regions, drivers) starting state from the mapped catalog indicators."""
+    units = dict(zip(catalog["column"], catalog["unit"].astype(str).str.strip()))
+    X = np.full((len(df), len(drivers)), NEUTRAL)
+    for j, k in enumerate(drivers):
+        col, better = BASELINE_COLUMNS.get(k, (None, True))
+        if col not in df.columns:
+            continue
+        v = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+        x = np.exp(-v / KM_SCALE) if units.get(col) == "km" else (v / 100 if better else 1 - v / 100)
+        X[:, j] = np.where(np.isfinite(x), np.clip(x, 0, 1), NEUTRAL)
+    return X
+
+
+def bench_input(drivers: list[str], benches: float) -> np.ndarray:
+    return np.array([BENCH_INPUTS.get(k, 0.0) * benches for k in drivers])
+
+
+# ---------- Integration ----------
+def expm(M: np.ndarray) -> np.ndarray:
+    """Matrix exponential by scaling and squaring of a Taylor series (small dense matrices)."""
+    norm = float(np.abs(M).sum(axis=1).max()) if M.size else 0.0
+    k = max(0, int(np.ceil(np.log2(norm))) + 1) if norm > 0 else 0
+    A = M / 2.0 ** k
+    E = term = np.eye(len(M))
+    for i in range(1, 30):
+        term = term @ A / i
+        E = E + term
+        if np.abs(term).max() < 1e-18:
+            break
+    for _ in range(k):
+        E = E @ E
+    return E
+
+
+def propagators(model: Model, dt: float) -> tuple[np.ndarray, np.ndarray]:
+    """Exact one-step maps of the deviation Y = X - X0 for the row form dY/dt = Y A + v:
+    Y(t + dt) = Y(t) Phi + v Gamma, from the exponential of [[A, 0], [I, 0]] * dt."""
+    d = len(model.drivers)
+    A = (model.W - np.eye(d)) / model.tau[None, :]
+    M = np.zeros((2 * d, 2 * d))
+    M[:d, :d], M[d:, :d] = A, np.eye(d)
+    E = expm(M * dt)
+    return E[:d, :d], E[d:, :d]
+
+
+def _ramp(t: float, ramp: float) -> float:
+    return min(max(t / ramp, 0.0), 1.0) if ramp > 0 else 1.0
+
+
+def simulate(model: Model, X0: np.ndarray, u: np.ndarray, months: float, dt: float = 1.0,
+             method: str = "exact", ramp: float = RAMP_MONTHS,
+             observe: Callable[[np.ndarray], np.ndarray] | None = None) -> tuple[np.ndarray, np.ndarray, int]:
+    """Integrate from X0 with input u (ramped in over `ramp` months), recording every `dt` months.
+
+    "exact" steps the linear system with its matrix exponential (one matrix product
+    per step; the ramp is held at its mid-step value), "rk4" is the classic
+    fixed-step scheme. Either way the state is projected onto [0, 1] after each step.
+    Returns (times, recorded states (times, ...), matrix products). Without `observe`
+    the full (regions, drivers) state is recorded as float32; pass a reduction (e.g. a
+    mean over regions) to keep memory flat for large runs.
+    """
+    X0 = np.asarray(X0, dtype=float)
+    v = np.asarray(u, dtype=float) / model.tau          # input rate per month at full ramp
+    lo, hi = -X0, 1.0 - X0                               # bounds of the deviation
+    times = np.arange(0.0, months + 1e-9, dt)
+    record = observe or (lambda X: X.astype(np.float32))
+    out = [record(X0)]
+    Y, buf, products = np.zeros_like(X0), np.empty_like(X0), 0
+    if method == "exact":
+        Phi, Gamma = propagators(model, dt)
+        vG = v @ Gamma
+        for t in times[:-1]:
+            np.matmul(Y, Phi, out=buf)
+            np.add(buf, _ramp(t + dt / 2, ramp) * vG, out=buf)
+            Y, buf = np.clip(buf, lo, hi, out=buf), Y
+            products += 1
+            out.append(record(X0 + Y))
+    elif method == "rk4":
+        A = (model.W - np.eye(len(model.drivers))) / model.tau[None, :]
+
+        def f(t, Z):
+            return Z @ A + _ramp(t, ramp) * v
+
+        for t in times[:-1]:
+            k1 = f(t, Y)
+            k2 = f(t + dt / 2, Y + (dt / 2) * k1)
+            k3 = f(t + dt / 2, Y + (dt / 2) * k2)
+            k4 = f(t + dt, Y + dt * k3)
+            Y = np.clip(Y + (dt / 6) * (k1 + 2 * k2 + 2 * k3 + k4), lo, hi)
+            products += 4
+            out.append(record(X0 + Y))
+    else:
+        raise ValueError(f"unknown method '{method}'")
+    return times, np.stack(out), products
+
+
+# ---------- Summaries ----------
+def dimension_matrix(drivers: list[str]) -> np.ndarray:
+    """(drivers, dimensions) averaging matrix: a dimension is the mean of its drivers."""
+    M = np.array([[DRIVERS[k][1] == d for d in DIMENSIONS] for k in drivers], dtype=float)
+    return M / np.maximum(M.sum(axis=0), 1)
+
+
+def run_scenario(df: pd.DataFrame, catalog: pd.DataFrame, benches: float, months: int, coupling: float,
+                 method: str = "exact") -> dict:
+    """Trajectories of the bench intervention with and without the feedback arc.
+
+    Changes are index points (state x 100) against the baseline, which is a steady state.
+    """
+    out = {}
+    for mode, feedback in (("feedback", True), ("no feedback", False)):
+        model = build_model(coupling, feedback)
+        X0 = baseline(df, catalog, model.drivers)
+        times, states, products = simulate(model, X0, bench_input(model.drivers, benches), months, method=method)
+        out[mode] = (times, 100 * (states - X0[None].astype(np.float32)), products)
+    model = build_model(coupling)
+    M = dimension_matrix(model.drivers)
+    times = out["feedback"][0]
+    rows = []
+    for mode, (_, delta, _) in out.items():
+        dims = delta.mean(axis=1) @ M                     # (times, dimensions), averaged over regions
+        qol = dims @ np.array([QOL_WEIGHTS[d] for d in DIMENSIONS], dtype=float)
+        for j, d in enumerate([*DIMENSIONS, "QoL (weighted)"]):
+            series = dims[:, j] if j < len(DIMENSIONS) else qol
+            rows.append(pd.DataFrame({"month": times, "series": d, "mode": mode, "change": series}))
+    return {
+        "dimensions": pd.concat(rows, ignore_index=True),
+        "drivers": out["feedback"][1],                    # (times, regions, drivers)
+        "names": model.drivers,
+        "loop_gain": model.loop_gain,
+        "products": out["feedback"][2],
+    }
+
+
+def benchmark(regions: int, months: int, drivers: int, method: str = "exact", seed: int = 0) -> dict:
+    """Time a random sparse system of `drivers` with loop gain 0.8 over `regions` x `months`."""
+    rng = np.random.default_rng(seed)
+    W = rng.random((drivers, drivers)) * (rng.random((drivers, drivers)) < 0.15)
+    np.fill_diagonal(W, 0)
+    gain = np.abs(np.linalg.eigvals(W)).max()
+    W = W * (0.8 / gain) if gain > 0 else W
+    model = Model([f"d{i}" for i in range(drivers)], W, rng.uniform(3, 24, drivers))
+    X0 = rng.random((regions, drivers))
+    u = rng.normal(0, 0.02, drivers)
+    t0 = time.perf_counter()
+    _, _, products = simulate(model, X0, u, months, method=method, observe=lambda X: X.mean(axis=0))
+    return {"method": method, "regions": regions, "months": months, "drivers": drivers,
+            "products": products, "seconds": time.perf_counter() - t0}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Time the driver-network integrator.")
+    ap.add_argument("--regions", type=int, default=10_000)
+    ap.add_argument("--months", type=int, default=100)
+    ap.add_argument("--drivers", type=int, default=36)
+    args = ap.parse_args(argv)
+    for method in ("exact", "rk4"):
+        r = benchmark(args.regions, args.months, args.drivers, method)
+        print(f"{method:9}{r['regions']:,} regions x {r['months']} months x {r['drivers']} drivers: "
+              f"{r['seconds'] * 1000:.0f} ms ({r['products']} matrix products)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+# twin/etl.py
+"""Rebuild the neighbourhood and municipality layers from the raw source tables.
+
+Inputs (local downloads, default under data/raw/):
+    buurten.geojson      CBS/PDOK wijken en buurten, buurt level, with kerncijfers (CRS84)
+    gemeenten.geojson    the same export at gemeente level
+    rivm.csv             RIVM Gezondheid per wijk en buurt (all ages; filtered to 65+ here)
+    nabijheid.csv        CBS Nabijheid voorzieningen, wijk- en buurtcijfers
+
+The catalog's `source`/`source_column` columns say which raw field becomes which
+app column. Raw fields are matched case- and punctuation-insensitively, and the
+numbered suffixes of OData exports (`_12`) are ignored. RIVM columns get the
+`health_` prefix and Nabijheid columns the `prox_` prefix, as before. Catalog indicators with source `points` are recomputed
+from their point layer in data/ (see twin.points). Every stage
+records a hash of its inputs (files, catalog, upstream stages, region filters, stage code version);
+a rerun only recomputes stages whose inputs changed. The built layers are checked
+by twin.validate before anything is written (report in <out>/quality.json).
+
+    python -m twin.etl --out build/layers [--raw data/raw] [--gemeente GM0228 --wijk WK022803] [--force]
+"""
+from __future__ import annotations
+
+import argparse
+import difflib
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from .data import CATALOG_CSV, DATA_DIR, content_key, read_catalog
+from .points import attach, point_layers
+from .validate import require, validate
+
+RAW_DIR = DATA_DIR / "raw"
+RAW_FILES = {
+    "buurten": "buurten.geojson",
+    "gemeenten": "gemeenten.geojson",
+    "rivm": "rivm.csv",
+    "nabijheid": "nabijheid.csv",
+}
+
+RIVM_AGE_65_PLUS = "80200"        # Leeftijd code for 65 years and older
+RIVM_ESTIMATE = "MW00000"         # Marges code of the point estimate
+RIVM_BOUNDS = {"MOG0095": "_lower", "MBG0095": "_upper"}   # Marges codes of the 95% interval
+CBS_SECRET = -99990               # kerncijfers codes -99995/-99997 mean "secret / not available"
+
+BUURT_KEYS = ["buurtcode", "buurtnaam", "wijkcode", "gemeentecode", "gemeentenaam", "jrstatcode", "jaar"]
+GEMEENTE_KEYS = ["gemeentecode", "gemeentenaam", "jrstatcode", "jaar"]
+
+
+# ---------- Helpers ----------
+def _norm(name: str) -> str:
+    """Field name key: lowercase alphanumerics, without an OData `_<n>` suffix."""
+    return re.sub(r"[^0-9a-z]", "", re.sub(r"_\d+$", "", str(name)).casefold())
+
+
+def _codes(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.strip()
+
+
+def _numeric(s: pd.Series, decimal_comma: bool = False) -> pd.Series:
+    if s.dtype == object:
+        s = s.astype(str).str.strip()
+        if decimal_comma:
+            s = s.str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
+def read_table(path: Path) -> tuple[pd.DataFrame, bool]:
+    """CSV from StatLine (`;`, decimal comma) or an OData/CSV export (`,`); all columns as text."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        head = f.readline()
+    semicolon = head.count(";") > head.count(",")
+    df = pd.read_csv(path, sep=";" if semicolon else ",", dtype=str, encoding="utf-8-sig")
+    return df, semicolon
+
+
+def read_layer(path: Path) -> pd.DataFrame:
+    """GeoJSON features as a table of properties plus a `geometry` column."""
+    with open(path, "r", encoding="utf-8") as f:
+        gj = json.load(f)
+    crs = ((gj.get("crs") or {}).get("properties") or {}).get("name", "CRS84")
+    if not re.search(r"CRS84|4326", crs):
+        raise ValueError(f"{path.name}: expected lon/lat (CRS84) coordinates, got {crs}")
+    feats = gj.get("features", [])
+    df = pd.DataFrame([f.get("properties") or {} for f in feats])
+    df["geometry"] = [f.get("geometry") for f in feats]
+    return df
+
+
+def rename_map(cat: pd.DataFrame, source: str, available) -> dict[str, str]:
+    """Raw field -> app column for one source; raises with suggestions for missing fields."""
+    by_norm = {_norm(c): c for c in available}
+    rows = cat[cat["source"] == source]
+    out, missing = {}, []
+    for col, raw in zip(rows["column"], rows["source_column"]):
+        hit = by_norm.get(_norm(raw))
+        if hit is None:
+            near = difflib.get_close_matches(_norm(raw), list(by_norm), n=2)
+            missing.append(f"{col} <- '{raw}'" + (f" (close: {', '.join(by_norm[n] for n in near)})" if near else ""))
+        else:
+            out[hit] = col
+    if missing:
+        raise ValueError(f"{source}: raw fields not found for\n  " + "\n  ".join(missing))
+    return out
+
+
+def _find(df: pd.DataFrame, name: str) -> str:
+    for c in df.columns:
+        if _norm(c) == _norm(name):
+            return c
+    raise ValueError(f"column '{name}' not found (have: {', '.join(map(str, df.columns[:12]))}, ...)")
+
+
+# ---------- Stages ----------
+def stage_kerncijfers(path: Path, cat: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    df = read_layer(path)
+    ren = rename_map(cat, "kerncijfers", df.columns)
+    out = df[[k for k in keys if k in df.columns] + ["geometry"]].copy()
+    for raw, col in ren.items():
+        v = _numeric(df[raw])
+        out[col] = v.where(v > CBS_SECRET)
+    return out
+
+
+def stage_rivm(path: Path, cat: pd.DataFrame) -> pd.DataFrame:
+    df, comma = read_table(path)
+    region, age, marg, period = (_find(df, n) for n in ("WijkenEnBuurten", "Leeftijd", "Marges", "Perioden"))
+    df = df[_codes(df[age]) == RIVM_AGE_65_PLUS]
+    latest = _codes(df[period]).max()
+    df = df[_codes(df[period]) == latest]
+    ren = rename_map(cat, "rivm", df.columns)
+    est = df[_codes(df[marg]) == RIVM_ESTIMATE]
+    out = pd.DataFrame({"code": _codes(est[region]).to_numpy()})
+    out["health_Perioden"] = latest
+    out["health_Leeftijd"] = RIVM_AGE_65_PLUS
+    out["health_Marges"] = RIVM_ESTIMATE
+    for raw, col in ren.items():
+        out[col] = _numeric(est[raw], comma).to_numpy()
+    out = out.drop_duplicates("code", keep="last")
+    # Interval rows (when the download includes them) become <column>_lower / <column>_upper
+    for code, suffix in RIVM_BOUNDS.items():
+        b = df[_codes(df[marg]) == code]
+        if len(b):
+            bounds = pd.DataFrame({"code": _codes(b[region]).to_numpy()})
+            for raw, col in ren.items():
+                bounds[col + suffix] = _numeric(b[raw], comma).to_numpy()
+            out = out.merge(bounds.drop_duplicates("code", keep="last"), on="code", how="left")
+    return out
+
+
+def stage_nabijheid(path: Path, cat: pd.DataFrame) -> pd.DataFrame:
+    df, comma = read_table(path)
+    region = _find(df, "Regioaanduiding/Codering (code)")
+    ren = rename_map(cat, "nabijheid", df.columns)
+    out = pd.DataFrame({"code": _codes(df[region]).to_numpy()})
+    for raw, col in ren.items():
+        out[col] = _numeric(df[raw], comma).to_numpy()
+    return out.drop_duplicates("code", keep="last")
+
+
+def join_layer(base: pd.DataFrame, code_col: str, rivm: pd.DataFrame, prox: pd.DataFrame,
+               cat: pd.DataFrame, keep: Callable[[pd.DataFrame], pd.Series]) -> pd.DataFrame:
+    """Left-join health and proximity on the region code; columns in catalog order."""
+    base = base[keep(base)].copy()
+    base["code"] = _codes(base[code_col])
+    out = base.merge(rivm, on="code", how="left").merge(prox, on="code", how="left")
+    ids = [c for c in base.columns if c not in cat["column"].values and c not in ("code", "geometry")]
+    meta = [c for c in ("health_Perioden", "health_Leeftijd", "health_Marges") if c in out.columns]
+    cols = [c for c in cat["column"] if c in out.columns]
+    cols += [c + s for c in cols for s in RIVM_BOUNDS.values() if c + s in out.columns]
+    return out[ids + cols + meta + ["geometry"]]
+
+
+def write_geojson(df: pd.DataFrame, path: Path, name: str) -> None:
+    props = df.drop(columns="geometry")
+    props = props.astype(object).where(props.notna(), None)
+    feats = [{"type": "Feature", "properties": p, "geometry": g}
+             for p, g in zip(props.to_dict(orient="records"), df["geometry"])]
+    gj = {"type": "FeatureCollection", "name": name,
+          "crs": {"type": "name", "properties": {"name": "urn:ogc:def:crs:OGC:1.3:CRS84"}},
+          "features": feats}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(gj, ensure_ascii=False, default=lambda v: v.item() if hasattr(v, "item") else str(v)),
+                   encoding="utf-8")
+    tmp.replace(path)
+
+
+# ---------- Dependency-tracked runner ----------
+STAGE_VERSION = "3"     # bump when stage code changes so cached results are rebuilt
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[..., pd.DataFrame]     # called with the outputs of `deps`, in order
+    files: tuple[Path, ...] = ()
+    deps: tuple[str, ...] = ()
+    params: tuple = ()                   # settings the stage depends on (e.g. region filters)
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage], build_dir: Path, log=print):
+        self.stages = {s.name: s for s in stages}
+        self.build_dir = build_dir
+        self.log = log
+        self.manifest_path = build_dir / "manifest.json"
+        self.manifest = json.loads(self.manifest_path.read_text()) if self.manifest_path.exists() else {}
+        self.keys: dict[str, str] = {}
+        self.results: dict[str, pd.DataFrame] = {}
+        self.rebuilt: list[str] = []
+
+    def key(self, name: str) -> str:
+        if name not in self.keys:
+            s = self.stages[name]
+            h = hashlib.sha1(f"{STAGE_VERSION}|{name}|{content_key(CATALOG_CSV, *s.files)}".encode())
+            h.update(json.dumps(list(s.params)).encode())
+            for d in s.deps:
+                h.update(self.key(d).encode())
+            self.keys[name] = h.hexdigest()[:16]
+        return self.keys[name]
+
+    def get(self, name: str, force: bool = False) -> pd.DataFrame:
+        if name in self.results:
+            return self.results[name]
+        s = self.stages[name]
+        out = self.build_dir / f"{name}.pkl"
+        if not force and self.manifest.get(name) == self.key(name) and out.exists():
+            self.log(f"  {name}: up to date")
+            self.results[name] = pd.read_pickle(out)
+            return self.results[name]
+        inputs = [self.get(d, force) for d in s.deps]
+        t0 = time.perf_counter()
+        df = s.run(*inputs)
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        df.to_pickle(out)
+        self.manifest[name] = self.key(name)
+        self.manifest_path.write_text(json.dumps(self.manifest, indent=1, sort_keys=True))
+        self.rebuilt.append(name)
+        self.results[name] = df
+        self.log(f"  {name}: rebuilt ({len(df):,} rows, {time.perf_counter() - t0:.2f} s)")
+        return df
+
+
+def build_pipeline(raw: dict[str, Path], build_dir: Path, gemeente: str, wijk: str | None, log=print) -> Pipeline:
+    in_wijk = (lambda d: _codes(d["wijkcode"]) == wijk) if wijk else (lambda d: _codes(d["gemeentecode"]) == gemeente)
+    points = tuple(point_layers(read_catalog()).values())
+    stages = [
+        Stage("catalog", lambda: read_catalog(), (CATALOG_CSV,)),
+        Stage("kerncijfers_buurt", lambda cat: stage_kerncijfers(raw["buurten"], cat, BUURT_KEYS),
+              (raw["buurten"],), ("catalog",)),
+        Stage("kerncijfers_gemeente", lambda cat: stage_kerncijfers(raw["gemeenten"], cat, GEMEENTE_KEYS),
+              (raw["gemeenten"],), ("catalog",)),
+        Stage("rivm", lambda cat: stage_rivm(raw["rivm"], cat), (raw["rivm"],), ("catalog",)),
+        Stage("nabijheid", lambda cat: stage_nabijheid(raw["nabijheid"], cat), (raw["nabijheid"],), ("catalog",)),
+        Stage("neighbourhoods", lambda b, r, p, cat: attach(join_layer(b, "buurtcode", r, p, cat, in_wijk), cat),
+              points, deps=("kerncijfers_buurt", "rivm", "nabijheid", "catalog"), params=(gemeente, wijk)),
+        Stage("municipality",
+              lambda g, r, p, cat: attach(join_layer(g, "gemeentecode", r, p, cat, lambda d: _codes(d["gemeentecode"]) == gemeente),
+                                          cat),
+              points, deps=("kerncijfers_gemeente", "rivm", "nabijheid", "catalog"), params=(gemeente,)),
+    ]
+    return Pipeline(stages, build_dir, log)
+
+
+OUTPUTS = {"neighbourhoods": "neighbourhoods_veld.geojson", "municipality": "municipality_ede.geojson"}
+OUTPUT_LEVELS = {"neighbourhoods": "buurt", "municipality": "gemeente"}
+
+
+def run(out_dir: Path, raw_dir: Path = RAW_DIR, gemeente: str = "GM0228", wijk: str | None = "WK022803",
+        force: bool = False, log=print) -> list[str]:
+    raw = {k: raw_dir / v for k, v in RAW_FILES.items()}
+    missing = [p.name for p in raw.values() if not p.exists()]
+    if missing:
+        raise FileNotFoundError(f"missing raw inputs in {raw_dir}: {', '.join(missing)}")
+    pipe = build_pipeline(raw, out_dir / ".build", gemeente, wijk, log)
+    built = {name: pipe.get(name, force) for name in OUTPUTS}
+    # Fail fast: no layer is written when the build fails validation (report in quality.json)
+    report = validate(pipe.get("catalog"), {OUTPUT_LEVELS[n]: df for n, df in built.items()},
+                      {OUTPUT_LEVELS[n]: df["geometry"].tolist() for n, df in built.items()})
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "quality.json").write_text(json.dumps(report, indent=1), encoding="utf-8")
+    require(report)
+    log(f"Validated: {report['errors']} errors, {report['warnings']} warnings")
+    for name, fname in OUTPUTS.items():
+        df = built[name]
+        target = out_dir / fname
+        if name in pipe.rebuilt or not target.exists():
+            write_geojson(df, target, target.stem)
+            log(f"Wrote {target} ({len(df)} features)")
+    return pipe.rebuilt
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rebuild the app layers from raw CBS/RIVM tables.")
+    ap.add_argument("--raw", type=Path, default=RAW_DIR)
+    ap.add_argument("--out", type=Path, default=Path("build/layers"),
+                    help="output folder (use data/ to replace the app layers)")
+    ap.add_argument("--gemeente", default="GM0228")
+    ap.add_argument("--wijk", default="WK022803", help="buurten of this wijk form the neighbourhood layer ('' = whole gemeente)")
+    ap.add_argument("--force", action="store_true", help="recompute every stage")
+    args = ap.parse_args(argv)
+    rebuilt = run(args.out, args.raw, args.gemeente, args.wijk or None, args.force)
+    print(f"Rebuilt stages: {', '.join(rebuilt) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# twin/fragments.py
+"""Partial reruns: page sections as Streamlit fragments, with per-fragment rerun counters.
+
+A widget inside a fragment re-executes only that fragment; everything else on the
+page is kept as rendered. Pages split into fragments (controls + the view they
+drive) and pass upstream values in as arguments, which makes the dependencies
+explicit: a fragment reruns on its own widgets, the full script only on the
+sidebar choices everything depends on. Fragments cannot write to the sidebar.
+
+Every tracked section counts its runs and thread CPU time, per session and per
+process, so the saving is measurable: `rerun_stats_panel()` shows the counters
+when TWIN_RERUN_STATS=1.
+"""
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+import streamlit as st
+
+from . import memwatch
+
+# st.fragment from Streamlit 1.37; experimental_fragment in 1.33-1.36
+FRAGMENT = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+SHOW_STATS = os.environ.get("TWIN_RERUN_STATS", "") not in ("", "0")
+_SESSION_KEY = "_twin_rerun_stats"
+
+_lock = threading.Lock()
+_process: dict[str, list[float]] = defaultdict(lambda: [0, 0.0])     # name -> [runs, cpu seconds]
+
+
+def _record(name: str, cpu: float) -> None:
+    with _lock:
+        entry = _process[name]
+        entry[0] += 1
+        entry[1] += cpu
+    try:
+        stats = st.session_state.setdefault(_SESSION_KEY, {})
+        runs, total = stats.get(name, (0, 0.0))
+        stats[name] = (runs + 1, total + cpu)
+    except Exception:      # outside a script run (bare mode, tests)
+        pass
+
+
+def tracked(name: str, fragment: bool = True):
+    """Decorator: count runs and CPU of a page section; run it as a fragment when supported."""
+    def deco(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            t0 = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.thread_time() - t0)
+        return FRAGMENT(run) if fragment and FRAGMENT is not None else run
+    return deco
+
+
+def page_run(name: str) -> None:
+    """Count a full script run of page `name` (call at the top of the page)."""
+    _record(f"{name} (full page)", 0.0)
+    memwatch.on_page_run(name)
+
+
+def rerun_stats(scope: str = "session") -> pd.DataFrame:
+    """Runs and CPU per tracked section, for this session or the whole process."""
+    if scope == "session":
+        items = dict(st.session_state.get(_SESSION_KEY, {}))
+    else:
+        with _lock:
+            items = {k: tuple(v) for k, v in _process.items()}
+    df = pd.DataFrame([(k, int(r), 1000.0 * c) for k, (r, c) in items.items()],
+                      columns=["Section", "Runs", "CPU (ms)"])
+    df["CPU per run (ms)"] = df["CPU (ms)"] / df["Runs"].where(df["Runs"] > 0)
+    return df.sort_values("Section").reset_index(drop=True)
+
+
+def rerun_stats_panel() -> None:
+    """Expander with the rerun counters (only when TWIN_RERUN_STATS is set)."""
+    if not SHOW_STATS:
+        return
+    with st.expander("Rerun counters", expanded=False):
+        st.dataframe(rerun_stats("session").round(1), use_container_width=True, hide_index=True)
+        st.caption("Per section for this session, as of the last full page run. "
+                   "Fragment reruns do not increment the full-page counter.")
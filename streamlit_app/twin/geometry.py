@@ -0,0 +1,136 @@
+# twin/geometry.py
+"""Small vectorized geometry helpers for GeoJSON (lon/lat, CRS84) polygons and points."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+EARTH_R_M = 6_371_008.8
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320    # at the equator
+SAMPLE_ROUNDS = 100         # rejection-sampling rounds before sample_points gives up
+
+
+def polygons_of(geom: dict | None) -> list[list[np.ndarray]]:
+    """Polygon/MultiPolygon -> list of polygons, each a list of (k, 2) lon/lat rings (outer first)."""
+    if not geom:
+        return []
+    t, c = geom.get("type"), geom.get("coordinates") or []
+    polys = [c] if t == "Polygon" else c if t == "MultiPolygon" else []
+    out = []
+    for poly in polys:
+        rings = [np.asarray(r, dtype=float)[:, :2] for r in poly if len(r) >= 3]
+        if rings:
+            out.append(rings)
+    return out
+
+
+@dataclass
+class FlatGeometry:
+    """Polygons of many features as flat arrays (the layout of the data plane and ingest output)."""
+    coords: np.ndarray     # (points, 2) lon/lat
+    ring_ptr: np.ndarray   # (rings+1,) offsets into coords
+    poly_ptr: np.ndarray   # (polygons+1,) offsets into rings (first ring is the exterior)
+    feat_ptr: np.ndarray   # (features+1,) offsets into polygons
+
+    def polygons(self, i: int) -> list[list[np.ndarray]]:
+        """Polygons of feature i in the `polygons_of` layout (views, no copy)."""
+        out = []
+        for p in range(self.feat_ptr[i], self.feat_ptr[i + 1]):
+            rings = range(self.poly_ptr[p], self.poly_ptr[p + 1])
+            out.append([self.coords[self.ring_ptr[r]:self.ring_ptr[r + 1]] for r in rings])
+        return out
+
+
+def flatten_polygons(geoms) -> FlatGeometry:
+    """Pack the polygons of a sequence of geometries into a FlatGeometry."""
+    coords, ring_ptr, poly_ptr, feat_ptr = [], [0], [0], [0]
+    for geom in geoms:
+        for poly in polygons_of(geom):
+            for ring in poly:
+                coords.append(ring)
+                ring_ptr.append(ring_ptr[-1] + len(ring))
+            poly_ptr.append(len(ring_ptr) - 1)
+        feat_ptr.append(len(poly_ptr) - 1)
+    xy = np.concatenate(coords) if coords else np.empty((0, 2))
+    return FlatGeometry(xy.astype(float), np.asarray(ring_ptr, np.int64),
+                        np.asarray(poly_ptr, np.int64), np.asarray(feat_ptr, np.int64))
+
+
+def bbox(geom: dict | None) -> tuple[float, float, float, float]:
+    """(min_lon, min_lat, max_lon, max_lat); NaNs for empty geometries."""
+    pts = [r for poly in polygons_of(geom) for r in poly]
+    if not pts:
+        return (np.nan, np.nan, np.nan, np.nan)
+    a = np.vstack(pts)
+    return (float(a[:, 0].min()), float(a[:, 1].min()), float(a[:, 0].max()), float(a[:, 1].max()))
+
+
+def _ring_area(r: np.ndarray) -> float:
+    x, y = r[:, 0], r[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def to_local_km(lon: np.ndarray, lat: np.ndarray, lat0: float) -> tuple[np.ndarray, np.ndarray]:
+    """Equirectangular projection to km; accurate enough at neighbourhood scale."""
+    kx = KM_PER_DEG_LON * np.cos(np.radians(lat0))
+    return np.asarray(lon) * kx, np.asarray(lat) * KM_PER_DEG_LAT
+
+
+def area_km2(geom: dict | None) -> float:
+    """Planar area of a (Multi)Polygon in km², holes subtracted."""
+    total = 0.0
+    for poly in polygons_of(geom):
+        lat0 = float(poly[0][:, 1].mean())
+        for i, ring in enumerate(poly):
+            x, y = to_local_km(ring[:, 0], ring[:, 1], lat0)
+            a = abs(_ring_area(np.column_stack([x, y])))
+            total += a if i == 0 else -a
+    return total
+
+
+def points_in_geometry(lon: np.ndarray, lat: np.ndarray, geom: dict | None, chunk: int = 20000) -> np.ndarray:
+    """Even-odd point-in-polygon test for many points against one (Multi)Polygon."""
+    lon, lat = np.asarray(lon, float), np.asarray(lat, float)
+    inside = np.zeros(len(lon), dtype=bool)
+    for poly in polygons_of(geom):
+        part = np.zeros(len(lon), dtype=bool)
+        for ring in poly:
+            x1, y1 = ring[:, 0], ring[:, 1]
+            x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+            for s in range(0, len(lon), chunk):
+                px, py = lon[s:s + chunk, None], lat[s:s + chunk, None]
+                cond = (y1 > py) != (y2 > py)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    xint = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+                part[s:s + chunk] ^= (np.count_nonzero(cond & (px < xint), axis=1) % 2).astype(bool)
+        inside |= part
+    return inside
+
+
+def sample_points(geom: dict | None, n: int, rng: np.random.Generator,
+                  max_rounds: int = SAMPLE_ROUNDS) -> tuple[np.ndarray, np.ndarray]:
+    """Uniform random points inside a polygon by rejection sampling in its bounding box.
+
+    Zero-area (degenerate) polygons give no points, and slivers that fill almost none of
+    their box may give fewer than `n` after `max_rounds` rounds.
+    """
+    x0, y0, x1, y1 = bbox(geom)
+    if n <= 0 or not np.isfinite(x0) or area_km2(geom) <= 0:
+        return np.empty(0), np.empty(0)
+    lons, lats, have = [], [], 0
+    for _ in range(max_rounds):
+        if have >= n:
+            break
+        m = max(2 * (n - have), 64)
+        lo, la = rng.uniform(x0, x1, m), rng.uniform(y0, y1, m)
+        keep = points_in_geometry(lo, la, geom)
+        lons.append(lo[keep]); lats.append(la[keep]); have += int(keep.sum())
+    return np.concatenate(lons)[:n], np.concatenate(lats)[:n]
+
+
+def haversine_m(lon1, lat1, lon2, lat2) -> np.ndarray:
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_R_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
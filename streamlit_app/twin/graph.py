@@ -0,0 +1,208 @@
+# twin/graph.py
+"""Local street/footpath graph loaded from a GeoJSON line file, stored as CSR arrays."""
+from __future__ import annotations
+
+import heapq
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .geometry import haversine_m, to_local_km
+
+SNAP_DECIMALS = 6      # ~0.1 m: line vertices closer than this become one node
+NN_CELL_NODES = 4      # mean nodes per cell of the nearest-node grid
+NN_PAIRS = 1_000_000   # candidate (point, node) pairs per nearest-node pass
+
+
+def _ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenated aranges [starts[i], starts[i] + lengths[i])."""
+    lengths = np.asarray(lengths, np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(np.asarray(starts, np.int64) - offsets, lengths) + np.arange(int(lengths.sum()))
+
+
+@dataclass
+class StreetGraph:
+    lon: np.ndarray        # (n,) node coordinates
+    lat: np.ndarray
+    indptr: np.ndarray     # CSR adjacency (undirected, both directions stored)
+    indices: np.ndarray
+    weights: np.ndarray    # edge length in metres
+
+    def __post_init__(self):
+        # Python lists make the heap loops below several times faster than array indexing
+        self._ptr = self.indptr.tolist()
+        self._nbr = self.indices.tolist()
+        self._w = self.weights.tolist()
+        self._grid = None
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.lon)
+
+    def nearest_node(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Index of the closest node for each point (uniform grid over the nodes, in local km).
+
+        Each point scans the cells within `h` cells of its own. The result is final once the
+        best distance is at most h cells: every node outside that box is farther away. Other
+        points widen the box and scan again. Ties go to the lowest node index, as in a brute
+        force argmin, and points with non-finite coordinates get -1. Work is done in passes
+        of at most NN_PAIRS candidate pairs, so memory scales with the number of points,
+        not with points x nodes.
+        """
+        lat0, (x0, y0), cell, (nx, ny), cell_ptr, cell_node = self._node_grid()
+        px, py = to_local_km(np.asarray(lon, float), np.asarray(lat, float), lat0)
+        todo = np.flatnonzero(np.isfinite(px) & np.isfinite(py))
+        ci = np.zeros(len(px), dtype=np.int64)
+        cj = np.zeros(len(px), dtype=np.int64)
+        ci[todo] = np.clip((px[todo] - x0) // cell, 0, nx - 1)
+        cj[todo] = np.clip((py[todo] - y0) // cell, 0, ny - 1)
+        out = np.full(len(px), -1, dtype=np.int64)
+        h = np.ones(len(todo), dtype=np.int64)
+        while len(todo):
+            i0, i1 = np.maximum(ci[todo] - h, 0), np.minimum(ci[todo] + h, nx - 1)
+            j0, j1 = np.maximum(cj[todo] - h, 0), np.minimum(cj[todo] + h, ny - 1)
+            # One contiguous run of cell_node per (point, grid row) of its box
+            rows = j1 - j0 + 1
+            q = np.repeat(np.arange(len(todo)), rows)
+            row = j0[q] + np.arange(int(rows.sum())) - np.repeat(np.cumsum(rows) - rows, rows)
+            start = cell_ptr[row * nx + i0[q]]
+            count = cell_ptr[row * nx + i1[q] + 1] - start
+            per_point = np.bincount(q, weights=count, minlength=len(todo)).astype(np.int64)
+            best = np.full(len(todo), np.inf)
+            node = np.full(len(todo), -1, dtype=np.int64)
+            # Passes of whole points, each within NN_PAIRS candidates (a single point may exceed it)
+            bounds = np.cumsum(per_point)
+            lo = 0
+            while lo < len(todo):
+                hi = max(int(np.searchsorted(bounds, bounds[lo] - per_point[lo] + NN_PAIRS, "right")), lo + 1)
+                sel = slice(*np.searchsorted(q, [lo, hi]))
+                pair = np.repeat(q[sel], count[sel])
+                cand = cell_node[_ranges(start[sel], count[sel])]
+                if len(cand):
+                    d2 = (px[todo[pair]] - self._x[cand]) ** 2 + (py[todo[pair]] - self._y[cand]) ** 2
+                    at = np.flatnonzero(np.r_[True, pair[1:] != pair[:-1]])
+                    owner = pair[at]
+                    best[owner] = np.minimum.reduceat(d2, at)
+                    tie = np.where(d2 == best[pair], cand, self.n_nodes)
+                    node[owner] = np.minimum.reduceat(tie, at)
+                lo = hi
+            full = (i0 == 0) & (i1 == nx - 1) & (j0 == 0) & (j1 == ny - 1)
+            reach = h * cell
+            done = full | (best <= reach * reach)
+            out[todo[done]] = node[done]
+            # Widen the rest: far enough to cover the best distance found, else double
+            grow = np.where(np.isfinite(best), np.ceil(np.sqrt(best) / cell), 0).astype(np.int64)
+            todo, h = todo[~done], np.maximum(2 * h, grow)[~done]
+        return out
+
+    def _node_grid(self):
+        """Grid over the nodes in local km (CSR: row-major cell -> nodes), built on first use."""
+        if self._grid is None:
+            lat0 = float(np.mean(self.lat))
+            x, y = to_local_km(self.lon, self.lat, lat0)
+            x0, y0 = float(x.min()), float(y.min())
+            w, h = max(float(x.max()) - x0, 1e-9), max(float(y.max()) - y0, 1e-9)
+            # ~NN_CELL_NODES nodes per cell; the second term keeps thin extents to O(n) cells
+            per = max(self.n_nodes / NN_CELL_NODES, 1.0)
+            cell = max(np.sqrt(w * h / per), max(w, h) / per)
+            nx, ny = int(w // cell) + 1, int(h // cell) + 1
+            cid = ((y - y0) // cell).astype(np.int64) * nx + ((x - x0) // cell).astype(np.int64)
+            cell_node = np.argsort(cid, kind="stable")
+            cell_ptr = np.concatenate([[0], np.cumsum(np.bincount(cid, minlength=nx * ny))])
+            self._x, self._y = x, y
+            self._grid = (lat0, (x0, y0), cell, (nx, ny), cell_ptr, cell_node)
+        return self._grid
+
+    def dijkstra(self, sources, cutoff: float = np.inf, rest: np.ndarray | None = None,
+                 max_leg: float = np.inf) -> np.ndarray:
+        """Multi-source shortest distances (metres) from `sources` to every node.
+
+        With `rest` (bool mask of rest points, e.g. benches) and `max_leg`, the label is
+        the distance walked since the last rest instead: it resets to 0 at rest nodes and
+        edges that would exceed `max_leg` are not taken. Finite labels then mark nodes
+        reachable without ever walking more than `max_leg` between rests. Nodes whose
+        label would exceed `cutoff` (or that are unreachable) are inf.
+        """
+        ptr, nbr, w = self._ptr, self._nbr, self._w
+        rest_l = rest.tolist() if rest is not None else None
+        dist = [np.inf] * self.n_nodes
+        heap = []
+        for s in np.atleast_1d(sources).tolist():
+            if dist[s] > 0.0:
+                dist[s] = 0.0
+                heap.append((0.0, s))
+        heapq.heapify(heap)
+        limit = min(cutoff, max_leg)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(ptr[u], ptr[u + 1]):
+                v = nbr[e]
+                nd = d + w[e]
+                if nd > limit:
+                    continue
+                if rest_l is not None and rest_l[v]:
+                    nd = 0.0
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return np.asarray(dist)
+
+
+def build_graph(segments: list[np.ndarray]) -> StreetGraph:
+    """Graph from polylines given as (k, 2) lon/lat arrays; shared vertices are merged."""
+    pts = np.vstack([s for s in segments if len(s) >= 2])
+    keys = np.round(pts, SNAP_DECIMALS)
+    uniq, inv = np.unique(keys, axis=0, return_inverse=True)
+    inv = inv.ravel()
+    src, dst, off = [], [], 0
+    for s in segments:
+        k = len(s)
+        if k >= 2:
+            ids = inv[off:off + k]
+            src.append(ids[:-1]); dst.append(ids[1:])
+            off += k
+    a, b = np.concatenate(src), np.concatenate(dst)
+    keep = a != b
+    a, b = a[keep], b[keep]
+    length = haversine_m(uniq[a, 0], uniq[a, 1], uniq[b, 0], uniq[b, 1])
+    # Both directions, sorted by source node -> CSR
+    u, v, w = np.concatenate([a, b]), np.concatenate([b, a]), np.concatenate([length, length])
+    order = np.argsort(u, kind="stable")
+    u, v, w = u[order], v[order], w[order]
+    indptr = np.zeros(len(uniq) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(u, minlength=len(uniq)), out=indptr[1:])
+    return StreetGraph(uniq[:, 0].copy(), uniq[:, 1].copy(), indptr, v.astype(np.int64), w)
+
+
+def load_graph(path: Path) -> StreetGraph:
+    """Read LineString/MultiLineString features (e.g. an OSM footway extract) from GeoJSON."""
+    with open(path, "r", encoding="utf-8") as f:
+        gj = json.load(f)
+    segments = []
+    for feat in gj.get("features", []):
+        g = feat.get("geometry") or {}
+        if g.get("type") == "LineString":
+            segments.append(np.asarray(g["coordinates"], float)[:, :2])
+        elif g.get("type") == "MultiLineString":
+            segments.extend(np.asarray(c, float)[:, :2] for c in g["coordinates"])
+    if not segments:
+        raise ValueError(f"{Path(path).name} contains no line features")
+    return build_graph(segments)
+
+
+def load_points(path: Path) -> tuple[np.ndarray, np.ndarray, list[dict]]:
+    """Point features of a GeoJSON file as (lon, lat, properties)."""
+    with open(path, "r", encoding="utf-8") as f:
+        gj = json.load(f)
+    lon, lat, props = [], [], []
+    for feat in gj.get("features", []):
+        g = feat.get("geometry") or {}
+        if g.get("type") == "Point":
+            lon.append(float(g["coordinates"][0])); lat.append(float(g["coordinates"][1]))
+            props.append(feat.get("properties") or {})
+    return np.asarray(lon), np.asarray(lat), props
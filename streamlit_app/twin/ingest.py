@@ -0,0 +1,264 @@
+# twin/ingest.py
+"""Streaming ingestion of large GeoJSON exports (e.g. national Wijken-en-Buurten).
+
+`iter_features` reads the file in fixed-size text blocks and decodes one feature at
+a time with json.JSONDecoder.raw_decode, so only the current block and feature are
+held in memory. `ingest` keeps the catalog columns plus identifier columns; each
+feature's values and rings are appended to growing numpy buffers as it is decoded
+(the feature itself is dropped), and a columnar part (.npz: a float array per
+numeric column, a string array per identifier, flat geometry arrays) is written
+whenever the buffers reach `chunk_mb`. Peak memory is bounded by that budget and
+the largest single feature, not by the file size or the vertex count per feature.
+
+    python -m twin.ingest export.geojson --out ingest/buurten [--chunk-mb 64] [--geometry bbox]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .data import read_catalog
+from .geometry import FlatGeometry, bbox, polygons_of
+
+BLOCK_CHARS = 1 << 20
+ID_COLUMNS = (
+    "buurtcode", "buurtnaam", "wijkcode", "wijknaam", "gemeentecode", "gemeentenaam",
+    "BU_CODE", "BU_NAAM", "WK_CODE", "WK_NAAM", "GM_CODE", "GM_NAAM",   # raw CBS export names
+)
+GEOMETRY_MODES = ("full", "bbox", "none")
+
+_FEATURES_KEY = re.compile(r'"features"\s*:\s*\[')
+_SEPARATOR = re.compile(r"[\s,]*")
+
+
+def iter_features(path: Path, block_chars: int = BLOCK_CHARS) -> Iterator[dict]:
+    """Yield the features of a FeatureCollection one by one without loading the file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buf, eof = "", False
+
+        def more() -> bool:
+            nonlocal buf, eof
+            block = f.read(block_chars)
+            eof = not block
+            buf += block
+            return not eof
+
+        # Skip to the start of the features array (other top-level keys are ignored)
+        while (m := _FEATURES_KEY.search(buf)) is None:
+            buf = buf[-64:]                       # keep a tail in case the key spans two blocks
+            if not more():
+                raise ValueError(f"{Path(path).name}: no 'features' array found")
+        buf, pos = buf[m.end():], 0
+
+        while True:
+            pos = _SEPARATOR.match(buf, pos).end()
+            if pos >= len(buf):
+                buf, pos = "", 0
+                if not more():
+                    raise ValueError(f"{Path(path).name}: unexpected end of file in 'features'")
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                feat, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                buf, pos = buf[pos:], 0           # incomplete feature: append the next block
+                if not more():
+                    raise
+                continue
+            yield feat
+            pos = end
+            if pos > block_chars:
+                buf, pos = buf[pos:], 0
+
+
+def _to_float(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class _Buffer:
+    """Append-only numpy array that doubles its capacity when full."""
+
+    def __init__(self, dtype, width: int | None = None, first=None):
+        self.tail = () if width is None else (width,)
+        self.data = np.empty((256, *self.tail), dtype)
+        self.n = 0
+        if first is not None:
+            self.extend([first])
+
+    def extend(self, values) -> None:
+        values = np.asarray(values, self.data.dtype)
+        end = self.n + len(values)
+        if end > len(self.data):
+            grown = np.empty((max(end, 2 * len(self.data)), *self.tail), self.data.dtype)
+            grown[:self.n] = self.data[:self.n]
+            self.data = grown
+        self.data[self.n:end] = values
+        self.n = end
+
+    def last(self):
+        return self.data[self.n - 1]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.data[:self.n]
+
+
+class _Chunk:
+    def __init__(self, numeric: list[str], text: list[str], geometry: str):
+        self.numeric, self.text, self.geometry = numeric, text, geometry
+        self.num = _Buffer(float, len(numeric))
+        self.strings: list[list[str]] = []
+        self.string_bytes = 0
+        if geometry == "full":
+            self.coords = _Buffer(float, 2)
+            self.ring_ptr, self.poly_ptr, self.feat_ptr = (_Buffer(np.int64, first=0) for _ in range(3))
+        elif geometry == "bbox":
+            self.bbox = _Buffer(float, 4)
+
+    def add(self, feat: dict) -> None:
+        p = feat.get("properties") or {}
+        self.num.extend([[_to_float(p.get(c)) for c in self.numeric]])
+        row = ["" if p.get(c) is None else str(p.get(c)) for c in self.text]
+        self.strings.append(row)
+        self.string_bytes += sum(map(len, row)) + 50 * len(row)      # rough per-str overhead
+        if self.geometry == "full":
+            for poly in polygons_of(feat.get("geometry")):
+                for ring in poly:
+                    self.coords.extend(ring)
+                    self.ring_ptr.extend([self.coords.n])
+                self.poly_ptr.extend([self.ring_ptr.n - 1])
+            self.feat_ptr.extend([self.poly_ptr.n - 1])
+        elif self.geometry == "bbox":
+            self.bbox.extend([bbox(feat.get("geometry"))])
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the buffers (allocated capacity, not just the filled part)."""
+        bufs = [self.num] + ([self.coords, self.ring_ptr, self.poly_ptr, self.feat_ptr] if self.geometry == "full"
+                             else [self.bbox] if self.geometry == "bbox" else [])
+        return sum(b.data.nbytes for b in bufs) + self.string_bytes
+
+    def write(self, path: Path) -> None:
+        num = self.num.values
+        arrays = {f"num:{c}": num[:, j] for j, c in enumerate(self.numeric)}
+        txt = np.asarray(self.strings, dtype=str).reshape(len(self), len(self.text))
+        arrays.update({f"str:{c}": txt[:, j] for j, c in enumerate(self.text)})
+        if self.geometry == "full":
+            arrays.update({f"geom:{k}": getattr(self, k).values for k in ("coords", "ring_ptr", "poly_ptr", "feat_ptr")})
+        elif self.geometry == "bbox":
+            arrays["geom:bbox"] = self.bbox.values
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0   # KiB on Linux
+    except (ImportError, AttributeError):
+        return float("nan")
+
+
+def ingest(path: Path, out_dir: Path, columns: list[str] | None = None, chunk_mb: float = 64.0,
+           geometry: str = "full", log=print) -> dict:
+    """Stream `path` into columnar parts under `out_dir`; returns throughput statistics."""
+    if geometry not in GEOMETRY_MODES:
+        raise ValueError(f"geometry must be one of {GEOMETRY_MODES}")
+    numeric = list(columns) if columns is not None else read_catalog()["column"].tolist()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.glob("part-*.npz"):
+        old.unlink()
+
+    t0 = time.perf_counter()
+    text: list[str] | None = None
+    chunk, parts, n = None, 0, 0
+    for feat in iter_features(path):
+        if chunk is None:
+            # Identifier columns are taken from the first feature (CBS exports are rectangular)
+            props = feat.get("properties") or {}
+            text = [c for c in ID_COLUMNS if c in props]
+            chunk = _Chunk(numeric, text, geometry)
+        chunk.add(feat)
+        n += 1
+        if chunk.nbytes >= chunk_mb * 2 ** 20:
+            chunk.write(out_dir / f"part-{parts:05d}.npz")
+            parts += 1
+            chunk = _Chunk(numeric, text, geometry)
+            dt = time.perf_counter() - t0
+            log(f"{n:,} features  {n / dt:,.0f} features/s  peak RSS {peak_rss_mb():,.0f} MB")
+    if chunk is not None and len(chunk):
+        chunk.write(out_dir / f"part-{parts:05d}.npz")
+        parts += 1
+
+    seconds = time.perf_counter() - t0
+    stats = {"source": str(path), "features": n, "parts": parts, "numeric": numeric, "text": text or [],
+             "geometry": geometry, "seconds": round(seconds, 3),
+             "features_per_s": round(n / seconds, 1) if seconds > 0 else None,
+             "peak_rss_mb": round(peak_rss_mb(), 1)}
+    (out_dir / "meta.json").write_text(json.dumps(stats, indent=1), encoding="utf-8")
+    log(f"Ingested {n:,} features into {parts} part(s) in {seconds:.1f} s "
+        f"({stats['features_per_s']:,} features/s, peak RSS {stats['peak_rss_mb']:,} MB)")
+    return stats
+
+
+def load_ingested(out_dir: Path, columns: list[str] | None = None) -> tuple[pd.DataFrame, FlatGeometry | np.ndarray | None]:
+    """Read ingest output back: attribute table (selected columns) and geometry."""
+    meta = json.loads((out_dir / "meta.json").read_text(encoding="utf-8"))
+    want = columns if columns is not None else meta["text"] + meta["numeric"]
+    frames, geo = [], {"coords": [], "ring_ptr": [], "poly_ptr": [], "feat_ptr": [], "bbox": []}
+    offsets = np.zeros(3, dtype=np.int64)         # points, rings, polygons so far
+    for i in range(meta["parts"]):
+        with np.load(out_dir / f"part-{i:05d}.npz") as z:
+            cols = {}
+            for c in want:
+                key = f"str:{c}" if c in meta["text"] else f"num:{c}"
+                if key in z.files:
+                    cols[c] = z[key]
+            frames.append(pd.DataFrame(cols))
+            if meta["geometry"] == "bbox":
+                geo["bbox"].append(z["geom:bbox"])
+            elif meta["geometry"] == "full":
+                ring_ptr, poly_ptr, feat_ptr = z["geom:ring_ptr"], z["geom:poly_ptr"], z["geom:feat_ptr"]
+                geo["coords"].append(z["geom:coords"])
+                geo["ring_ptr"].append(ring_ptr[(1 if i else 0):] + offsets[0])
+                geo["poly_ptr"].append(poly_ptr[(1 if i else 0):] + offsets[1])
+                geo["feat_ptr"].append(feat_ptr[(1 if i else 0):] + offsets[2])
+                offsets += (ring_ptr[-1], len(ring_ptr) - 1, len(poly_ptr) - 1)
+    table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=want)
+    if meta["geometry"] == "bbox":
+        return table, np.concatenate(geo["bbox"]) if geo["bbox"] else np.empty((0, 4))
+    if meta["geometry"] == "full" and geo["coords"]:
+        return table, FlatGeometry(np.concatenate(geo["coords"]), *(np.concatenate(geo[k]) for k in ("ring_ptr", "poly_ptr", "feat_ptr")))
+    return table, None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream a large GeoJSON export into chunked columnar files.")
+    ap.add_argument("source", type=Path)
+    ap.add_argument("--out", type=Path, required=True)
+    ap.add_argument("--chunk-mb", type=float, default=64.0, help="buffered MB per output part")
+    ap.add_argument("--geometry", choices=GEOMETRY_MODES, default="full")
+    ap.add_argument("--columns", nargs="*", help="numeric columns to keep (default: catalog columns)")
+    args = ap.parse_args(argv)
+    ingest(args.source, args.out, args.columns, args.chunk_mb, args.geometry)
+
+
+if __name__ == "__main__":
+    main()
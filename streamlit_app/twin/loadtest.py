@@ -0,0 +1,342 @@
+# twin/loadtest.py
+"""Concurrent-session load test of the Streamlit app over its websocket protocol.
+
+Each simulated user opens the app's websocket (`/_stcore/stream`), exactly as a
+browser tab does, and replays scripted flows: switching dimension/variable on the
+Dashboard and the Map, moving the bench slider on Scenarios. Widget changes are
+sent as `rerun_script` messages with the widget states of the current page (with
+the fragment id when the widget sits in a fragment); the rerun latency is the time
+until the server reports `script_finished`. Meanwhile the server's CPU and RSS are
+sampled from /proc.
+
+The app is started locally (or attached to with --url) and nothing outside the
+host is contacted. Results are saved as JSON for regression comparison:
+
+    python -m twin.loadtest --users 20 --duration 60
+    python -m twin.loadtest --users 20 --duration 60 --compare loadtest/baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from tornado.websocket import websocket_connect
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from .data import APP_ROOT
+
+STREAM_PATH = "/_stcore/stream"
+HEALTH_PATH = "/_stcore/health"
+PERCENTILES = (50, 95, 99)
+MAIN_PAGE = "Home"
+
+# WidgetState field per element type (as registered by Streamlit)
+VALUE_FIELDS = {"checkbox": "bool_value", "radio": "int_value", "selectbox": "int_value",
+                "slider": "double_array_value"}
+
+# Scripted flows: (page, widget label); label None opens the page
+FLOWS = {
+    "dashboard": [("Dashboard", None), ("Dashboard", "Dimension"), ("Dashboard", "Variable"),
+                  ("Dashboard", "Variable")],
+    "map": [("Map", None), ("Map", "Dimension"), ("Map", "Variable"),
+            ("Map", "Show district (wijk) boundaries")],
+    "scenarios": [("Scenarios", None), ("Scenarios", "Benches (add/remove)"),
+                  ("Scenarios", "Benches (add/remove)"), ("Scenarios", "Benches (add/remove)")],
+}
+
+
+# ---------- One simulated browser session ----------
+class Session:
+    def __init__(self, url: str, rng: random.Random):
+        self.url = url
+        self.rng = rng
+        self.ws = None
+        self.pages: dict[str, str] = {}         # page name -> page_script_hash
+        self.page = ""
+        self.widgets: dict[str, tuple] = {}     # label -> (element type, proto, fragment id)
+        self.states: dict[str, WidgetState] = {}
+
+    async def connect(self) -> dict:
+        self.ws = await websocket_connect(self.url.rstrip("/").replace("http", "ws", 1) + STREAM_PATH,
+                                          max_message_size=256 * 1024 * 1024)
+        return await self._rerun(MAIN_PAGE, "")
+
+    def close(self) -> None:
+        if self.ws is not None:
+            self.ws.close()
+
+    async def _rerun(self, action: str, page_hash: str, fragment_id: str = "") -> dict:
+        msg = BackMsg()
+        cs = msg.rerun_script
+        cs.page_script_hash = page_hash
+        cs.widget_states.widgets.extend(self.states.values())
+        if fragment_id:
+            cs.fragment_id = fragment_id
+        else:
+            self.widgets = {}
+        t0 = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        status, errors, nbytes = await self._read_until_finished()
+        return {"action": action, "t": time.time(), "seconds": time.perf_counter() - t0,
+                "status": status, "errors": errors, "bytes": nbytes, "fragment": bool(fragment_id)}
+
+    async def _read_until_finished(self) -> tuple[str, int, int]:
+        errors = nbytes = 0
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("websocket closed by the server")
+            nbytes += len(raw)
+            fm = ForwardMsg()
+            fm.ParseFromString(raw)
+            kind = fm.WhichOneof("type")
+            if kind == "new_session":
+                self.pages = {p.page_name: p.page_script_hash for p in fm.new_session.app_pages}
+                self.page = next((n for n, h in self.pages.items() if h == fm.new_session.page_script_hash),
+                                 self.page)
+            elif kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                el = fm.delta.new_element
+                etype = el.WhichOneof("type")
+                if etype in VALUE_FIELDS:
+                    w = getattr(el, etype)
+                    self.widgets.setdefault(w.label, (etype, w, fm.delta.fragment_id))
+                elif etype == "exception":
+                    errors += 1
+            elif kind == "script_finished":
+                return ForwardMsg.ScriptFinishedStatus.Name(fm.script_finished), errors, nbytes
+
+    def _next_value(self, etype: str, w) -> WidgetState:
+        state = WidgetState(id=w.id)
+        if etype == "checkbox":
+            prev = self.states.get(w.id)
+            state.bool_value = not (prev.bool_value if prev is not None else w.default)
+        elif etype in ("radio", "selectbox"):
+            state.int_value = self.rng.randrange(max(len(w.options), 1))
+        else:
+            steps = int(round((w.max - w.min) / w.step)) if w.step else 0
+            state.double_array_value.data.append(w.min + w.step * self.rng.randint(0, steps))
+        return state
+
+    async def step(self, page: str, label: str | None) -> dict:
+        if page != self.page or label is None:
+            if page not in self.pages:
+                raise KeyError(f"page '{page}' not found (app pages: {', '.join(self.pages)})")
+            self.states = {}
+            self.page = page
+            return await self._rerun(f"{page}: open", self.pages[page])
+        if label not in self.widgets:
+            return {"action": f"{page}: {label}", "t": time.time(), "seconds": np.nan,
+                    "status": "WIDGET_NOT_FOUND", "errors": 1, "bytes": 0, "fragment": False}
+        etype, w, fragment_id = self.widgets[label]
+        self.states[w.id] = self._next_value(etype, w)
+        return await self._rerun(f"{page}: {label}", self.pages[page], fragment_id)
+
+
+# ---------- Server process ----------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port: int, timeout: float = 90.0) -> subprocess.Popen:
+    """Start the app headless on localhost (no usage statistics, no file watcher)."""
+    cmd = [sys.executable, "-m", "streamlit", "run", str(APP_ROOT / "Home.py"),
+           "--server.headless=true", "--server.address=127.0.0.1", f"--server.port={port}",
+           "--browser.gatherUsageStats=false", "--server.fileWatcherType=none"]
+    proc = subprocess.Popen(cmd, cwd=APP_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url + HEALTH_PATH, timeout=1) as r:
+                if r.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.25)
+    proc.terminate()
+    raise TimeoutError(f"app did not become healthy within {timeout:.0f} s")
+
+
+def _proc_sample(pid: int) -> tuple[float, float]:
+    """(CPU seconds, RSS MB) of a process from /proc; NaN where unavailable."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        cpu = (int(stat[11]) + int(stat[12])) / os.sysconf("SC_CLK_TCK")
+        rss = int(stat[21]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+        return cpu, rss
+    except (OSError, IndexError, ValueError):
+        return np.nan, np.nan
+
+
+async def monitor(pid: int | None, interval: float, out: list, active: list, stop: asyncio.Event) -> None:
+    t0 = time.perf_counter()
+    cpu0, _ = _proc_sample(pid) if pid else (np.nan, np.nan)
+    prev_t, prev_cpu = t0, cpu0
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        now = time.perf_counter()
+        cpu, rss = _proc_sample(pid) if pid else (np.nan, np.nan)
+        out.append({"elapsed": round(now - t0, 3), "cpu_pct": 100.0 * (cpu - prev_cpu) / max(now - prev_t, 1e-9),
+                    "rss_mb": rss, "sessions": active[0]})
+        prev_t, prev_cpu = now, cpu
+
+
+# ---------- Load driver ----------
+async def user(uid: int, url: str, flows: list[str], start: float, deadline: float, think: float,
+               seed: int, samples: list, active: list) -> None:
+    rng = random.Random(seed + uid)
+    await asyncio.sleep(max(0.0, start - time.monotonic()))
+    s = Session(url, rng)
+    try:
+        rec = await s.connect()
+        active[0] += 1
+        samples.append({"user": uid, **rec})
+        while time.monotonic() < deadline:
+            for page, label in FLOWS[rng.choice(flows)]:
+                if time.monotonic() >= deadline:
+                    break
+                samples.append({"user": uid, **await s.step(page, label)})
+                await asyncio.sleep(rng.uniform(0.0, 2.0 * think))
+    except Exception as e:          # a failed session is a result, not a crash of the run
+        samples.append({"user": uid, "action": "session", "t": time.time(), "seconds": np.nan,
+                        "status": f"{type(e).__name__}: {e}", "errors": 1, "bytes": 0, "fragment": False})
+    finally:
+        if s.ws is not None:
+            active[0] -= 1
+        s.close()
+
+
+async def drive(url: str, users: int, duration: float, ramp: float, think: float, flows: list[str],
+                pid: int | None, interval: float, seed: int) -> tuple[list, list, float]:
+    samples, resources, active = [], [], [0]
+    stop = asyncio.Event()
+    mon = asyncio.ensure_future(monitor(pid, interval, resources, active, stop))
+    t0 = time.monotonic()
+    deadline = t0 + ramp + duration
+    await asyncio.gather(*(user(i, url, flows, t0 + ramp * i / max(users, 1), deadline, think, seed,
+                                samples, active) for i in range(users)))
+    elapsed = time.monotonic() - t0
+    stop.set()
+    await mon
+    return samples, resources, elapsed
+
+
+def summarize(samples: list, resources: list, elapsed: float) -> dict:
+    df = pd.DataFrame(samples)
+    ok = df[df["status"].isin(["FINISHED_SUCCESSFULLY", "FINISHED_FRAGMENT_RUN_SUCCESSFULLY"]) & (df["errors"] == 0)]
+
+    def stats(s: pd.Series) -> dict:
+        q = np.percentile(s, PERCENTILES) if len(s) else [np.nan] * len(PERCENTILES)
+        return {"count": int(len(s)), **{f"p{p}_ms": 1000.0 * float(v) for p, v in zip(PERCENTILES, q)},
+                "mean_ms": 1000.0 * float(s.mean()) if len(s) else np.nan}
+
+    res = pd.DataFrame(resources, columns=["elapsed", "cpu_pct", "rss_mb", "sessions"])
+    return {
+        "overall": stats(ok["seconds"]),
+        "actions": {a: stats(g["seconds"]) for a, g in ok.groupby("action")},
+        "reruns": int(len(df)),
+        "failed": int(len(df) - len(ok)),
+        "throughput_per_s": len(ok) / elapsed if elapsed > 0 else np.nan,
+        "elapsed_s": elapsed,
+        "cpu_pct_mean": float(res["cpu_pct"].mean()) if len(res) else np.nan,
+        "cpu_pct_max": float(res["cpu_pct"].max()) if len(res) else np.nan,
+        "rss_mb_max": float(res["rss_mb"].max()) if len(res) else np.nan,
+        "rss_mb_end": float(res["rss_mb"].iloc[-1]) if len(res) else np.nan,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> pd.DataFrame:
+    """Percentile changes per action against a saved run; `regression` where p95 grew beyond tolerance."""
+    rows = []
+    for action, cur in {"(all)": current["overall"], **current["actions"]}.items():
+        base = baseline["overall"] if action == "(all)" else baseline["actions"].get(action)
+        if not base:
+            continue
+        row = {"action": action}
+        for p in PERCENTILES:
+            row[f"p{p} base"], row[f"p{p} now"] = base[f"p{p}_ms"], cur[f"p{p}_ms"]
+        row["p95 change"] = cur["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else np.nan
+        row["regression"] = bool(row["p95 change"] > tolerance)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _json_default(o):
+    if isinstance(o, (np.floating, np.integer)):
+        return o.item()
+    raise TypeError(type(o).__name__)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Drive concurrent simulated sessions against the Streamlit app.")
+    ap.add_argument("--users", type=int, default=10, help="concurrent sessions")
+    ap.add_argument("--duration", type=float, default=60.0, help="seconds of load after the ramp-up")
+    ap.add_argument("--ramp", type=float, default=10.0, help="seconds over which sessions join")
+    ap.add_argument("--think", type=float, default=1.0, help="mean pause between actions (s)")
+    ap.add_argument("--flows", nargs="+", choices=list(FLOWS), default=list(FLOWS))
+    ap.add_argument("--url", help="attach to a running app instead of starting one")
+    ap.add_argument("--pid", type=int, help="server process to sample with --url")
+    ap.add_argument("--interval", type=float, default=1.0, help="resource sampling interval (s)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, default=Path("loadtest"))
+    ap.add_argument("--compare", type=Path, help="earlier result file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 increase before flagging")
+    args = ap.parse_args(argv)
+
+    proc = None
+    if args.url:
+        url, pid = args.url, args.pid
+    else:
+        port = free_port()
+        proc = start_app(port)
+        url, pid = f"http://127.0.0.1:{port}", proc.pid
+    try:
+        samples, resources, elapsed = asyncio.run(drive(
+            url, args.users, args.duration, args.ramp, args.think, args.flows, pid, args.interval, args.seed))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    summary = summarize(samples, resources, elapsed)
+    args.out.mkdir(parents=True, exist_ok=True)
+    path = args.out / f"loadtest-{time.strftime('%Y%m%d-%H%M%S')}-u{args.users}.json"
+    config = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()}
+    path.write_text(json.dumps({"config": config, "summary": summary, "resources": resources, "samples": samples},
+                               default=_json_default), encoding="utf-8")
+
+    table = pd.DataFrame({"(all)": summary["overall"], **summary["actions"]}).T
+    print(table.round(1).to_string())
+    print(f"{args.users} sessions: {summary['reruns']:,} reruns ({summary['failed']:,} failed), "
+          f"{summary['throughput_per_s']:.1f} reruns/s; server CPU mean {summary['cpu_pct_mean']:.0f}% "
+          f"(max {summary['cpu_pct_max']:.0f}%), RSS max {summary['rss_mb_max']:,.0f} MB; saved {path}")
+
+    if args.compare:
+        diff = compare(summary, json.loads(args.compare.read_text(encoding="utf-8"))["summary"], args.tolerance)
+        print(diff.round(2).to_string(index=False))
+        if diff["regression"].any():
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
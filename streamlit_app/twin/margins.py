@@ -0,0 +1,88 @@
+# twin/margins.py
+"""Confidence intervals and significance of every region against the Ede reference.
+
+Interval per indicator, by catalog `source`:
+
+- rivm: the published 95% bounds when the layer carries them (the ETL turns the RIVM
+  `Marges` rows MOG0095/MBG0095 into `<column>_lower`/`<column>_upper`); otherwise an
+  approximate binomial interval from a nominal effective sample size per level.
+- kerncijfers, nabijheid: registrations without sampling error; the interval is the value.
+
+A region differs significantly from the reference when
+|value - ref| / sqrt(se² + se_ref²) > 1.96, with se = half the interval width / 1.96.
+Everything is computed at once on the (regions x indicators) matrix.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .data import numeric_matrix
+
+Z95 = 1.959964
+LOWER_SUFFIX, UPPER_SUFFIX = "_lower", "_upper"
+SAMPLED_SOURCES = ("rivm",)
+APPROX_N = {"buurt": 100, "wijk": 300, "gemeente": 2000}   # rough effective survey sizes (65+)
+
+INTERVAL_KINDS = ("published", "approx", "exact", "missing")
+FLAG_LABELS = {-1: "Significantly lower", 0: "Not significantly different", 1: "Significantly higher"}
+
+
+def intervals(df: pd.DataFrame, catalog: pd.DataFrame, level: str = "buurt") -> dict[str, np.ndarray]:
+    """value, lower, upper and interval kind (index into INTERVAL_KINDS) matrices."""
+    cols = catalog["column"].tolist()
+    V = numeric_matrix(df, cols)
+    L = numeric_matrix(df, [c + LOWER_SUFFIX for c in cols])
+    U = numeric_matrix(df, [c + UPPER_SUFFIX for c in cols])
+    sampled = catalog.get("source", pd.Series("", index=catalog.index)).isin(SAMPLED_SOURCES).to_numpy()
+    sampled = np.broadcast_to(sampled, V.shape)
+    finite = np.isfinite(V)
+
+    published = sampled & finite & np.isfinite(L) & np.isfinite(U)
+    approx = sampled & finite & ~published
+    p = np.clip(V / 100.0, 0.0, 1.0)
+    half = 100.0 * Z95 * np.sqrt(p * (1 - p) / APPROX_N.get(level, APPROX_N["buurt"]))
+    L = np.where(published, L, np.where(approx, np.maximum(V - half, 0.0), V))
+    U = np.where(published, U, np.where(approx, np.minimum(V + half, 100.0), V))
+
+    kind = np.select([published, approx, finite], [0, 1, 2], default=3).astype(np.int8)
+    return {"value": V, "lower": L, "upper": U, "kind": kind}
+
+
+def compare(region: dict[str, np.ndarray], ref: dict[str, np.ndarray], direction: np.ndarray) -> dict[str, np.ndarray]:
+    """z-scores, significance flags (-1/0/1) and better/worse (-1/0/1, by catalog direction)."""
+    se = (region["upper"] - region["lower"]) / (2 * Z95)
+    se_ref = (ref["upper"] - ref["lower"]) / (2 * Z95)
+    diff = region["value"] - ref["value"]
+    scale = np.sqrt(se ** 2 + se_ref ** 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(scale > 0, diff / scale, np.sign(diff) * np.inf)
+    flag = np.where(np.isfinite(diff), np.sign(diff) * (np.abs(z) > Z95), 0).astype(np.int8)
+    better = (flag * np.asarray(direction, float)).astype(np.int8)
+    return {"z": np.where(np.isfinite(diff), z, np.nan), "flag": flag, "better": better}
+
+
+def margin_table(df: pd.DataFrame, muni: pd.DataFrame, catalog: pd.DataFrame,
+                 code_col: str = "buurtcode", level: str = "buurt") -> pd.DataFrame:
+    """Long table (one row per region and indicator) with intervals and the comparison to Ede."""
+    cat = catalog.reset_index(drop=True)
+    reg = intervals(df, cat, level)
+    ref = intervals(muni.iloc[:1], cat, "gemeente")
+    direction = pd.to_numeric(cat.get("direction", 0), errors="coerce").fillna(0).to_numpy()
+    cmp = compare(reg, ref, direction)
+
+    n, m = reg["value"].shape
+    codes = df[code_col].astype(str).to_numpy() if code_col in df.columns else np.arange(n).astype(str)
+    out = pd.DataFrame({
+        "code": np.repeat(codes, m),
+        "column": np.tile(cat["column"].to_numpy(), n),
+        "value": reg["value"].ravel(),
+        "lower": reg["lower"].ravel(),
+        "upper": reg["upper"].ravel(),
+        "reference": np.tile(ref["value"][0], n),
+        "z": cmp["z"].ravel(),
+        "flag": cmp["flag"].ravel(),
+        "better": cmp["better"].ravel(),
+        "interval": np.asarray(INTERVAL_KINDS)[reg["kind"].ravel()],
+    })
+    return out
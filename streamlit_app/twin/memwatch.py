@@ -0,0 +1,253 @@
+# twin/memwatch.py
+"""Memory-growth diagnostics across reruns.
+
+With TWIN_MEMWATCH=N, tracemalloc is started and every N-th full run of a page
+takes a checkpoint: traced memory, a snapshot diffed against the page's previous
+snapshot by allocation site, the entry counts and sizes of every st.cache_data
+(and entry counts of st.cache_resource) function, and the size of the session
+state. A series that grew at each of the last GROWTH_WINDOW checkpoints is flagged
+as monotonic growth. Session state above TWIN_SESSION_BUDGET_MB is flagged too.
+
+`memory_panel()` shows the checkpoints on the page; `python -m twin.memwatch` replays
+a page many times in-process (Streamlit AppTest) and writes the same report as JSON:
+
+    python -m twin.memwatch pages/02_Map.py --reruns 200 --every 20 --out memreport.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+EVERY = int(os.environ.get("TWIN_MEMWATCH", "0") or 0)
+SESSION_BUDGET_MB = float(os.environ.get("TWIN_SESSION_BUDGET_MB", 50))
+GROWTH_WINDOW = 4        # consecutive increases before a series is flagged
+TOP_SITES = 10
+FRAMES = 1
+
+_lock = threading.Lock()
+_runs: dict[str, int] = defaultdict(int)
+_snapshots: dict[str, tracemalloc.Snapshot] = {}
+_checkpoints: list[dict] = []
+
+_IGNORE = [tracemalloc.Filter(False, tracemalloc.__file__),
+           tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+           tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+           tracemalloc.Filter(False, "<unknown>")]
+
+
+def enable(every: int) -> None:
+    """Start tracing and take a checkpoint every `every` page runs (0 disables)."""
+    global EVERY
+    EVERY = every
+    if every and not tracemalloc.is_tracing():
+        tracemalloc.start(FRAMES)
+
+
+if EVERY:
+    enable(EVERY)
+
+
+# ---------- Measurements ----------
+def cache_stats() -> pd.DataFrame:
+    """Entries and bytes per cached function (cache_resource: entries only, sizing them is costly)."""
+    from streamlit.runtime.caching import cache_data_api, cache_resource_api
+
+    rows = []
+    with cache_data_api._data_caches._caches_lock:
+        data = list(cache_data_api._data_caches._function_caches.values())
+    for cache in data:
+        sizes = [s.byte_length for s in cache.get_stats()]
+        rows.append(("cache_data", cache.display_name, len(sizes), sum(sizes)))
+    with cache_resource_api._resource_caches._caches_lock:
+        resource = list(cache_resource_api._resource_caches._function_caches.values())
+    for cache in resource:
+        rows.append(("cache_resource", cache.display_name, len(cache._mem_cache), np.nan))
+    df = pd.DataFrame(rows, columns=["kind", "function", "entries", "bytes"])
+    return df.groupby(["kind", "function"], as_index=False).sum(min_count=1)
+
+
+def deep_size(obj, _seen: set | None = None) -> int:
+    """Approximate retained size of a session-state value (arrays and frames by their buffers)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(v, seen) for v in obj)
+    return size
+
+
+def session_size() -> int:
+    try:
+        return deep_size({k: st.session_state[k] for k in st.session_state.keys()})
+    except Exception:      # outside a script run
+        return 0
+
+
+def _top_sites(snap: tracemalloc.Snapshot, prev: tracemalloc.Snapshot | None) -> list[dict]:
+    if prev is None:
+        stats = [(s.traceback, s.size, s.count) for s in snap.statistics("lineno")[:TOP_SITES]]
+    else:
+        stats = [(s.traceback, s.size_diff, s.count_diff) for s in snap.compare_to(prev, "lineno")[:TOP_SITES]]
+    return [{"site": f"{tb[0].filename}:{tb[0].lineno}", "kb": size / 1024, "blocks": count}
+            for tb, size, count in stats if size]
+
+
+# ---------- Checkpoints ----------
+def on_page_run(page: str) -> dict | None:
+    """Count a full run of `page`; every EVERY-th run records a checkpoint."""
+    if not EVERY or not tracemalloc.is_tracing():
+        return None
+    with _lock:
+        _runs[page] += 1
+        run = _runs[page]
+        if run % EVERY:
+            return None
+    snap = tracemalloc.take_snapshot().filter_traces(_IGNORE)
+    current, peak = tracemalloc.get_traced_memory()
+    caches = cache_stats()
+    cp = {
+        "page": page, "rerun": run, "time": time.time(),
+        "traced_mb": current / 2 ** 20, "peak_mb": peak / 2 ** 20,
+        "session_mb": session_size() / 2 ** 20,
+        "caches": caches.to_dict("records"),
+        "top_sites": _top_sites(snap, _snapshots.get(page)),
+    }
+    with _lock:
+        _snapshots[page] = snap
+        _checkpoints.append(cp)
+    return cp
+
+
+def checkpoints(page: str | None = None) -> list[dict]:
+    with _lock:
+        return [c for c in _checkpoints if page is None or c["page"] == page]
+
+
+def _series(cps: list[dict]) -> dict[str, list[float]]:
+    out = {"traced memory (MB)": [c["traced_mb"] for c in cps], "session state (MB)": [c["session_mb"] for c in cps]}
+    for i, c in enumerate(cps):
+        for row in c["caches"]:
+            for field in ("entries", "bytes"):
+                if row["kind"] == "cache_data" or field == "entries":
+                    out.setdefault(f"{row['function']} {field}", [np.nan] * len(cps))[i] = row[field]
+    return out
+
+
+def growth_flags(cps: list[dict], window: int = GROWTH_WINDOW) -> pd.DataFrame:
+    """Series that increased at each of the last `window` checkpoints, with their growth per rerun."""
+    rows = []
+    if len(cps) > window:
+        reruns = np.array([c["rerun"] for c in cps], dtype=float)
+        for name, values in _series(cps).items():
+            v = np.asarray(values, dtype=float)[-(window + 1):]
+            if np.isfinite(v).all() and (np.diff(v) > 0).all():
+                per_run = (v[-1] - v[0]) / max(reruns[-1] - reruns[-(window + 1)], 1)
+                rows.append((name, v[0], v[-1], per_run))
+    return pd.DataFrame(rows, columns=["series", "from", "to", "growth per rerun"])
+
+
+def report(page: str | None = None) -> dict:
+    """Checkpoints, growth flags and budget status, per page."""
+    pages = sorted({c["page"] for c in checkpoints()}) if page is None else [page]
+    out = {"every": EVERY, "session_budget_mb": SESSION_BUDGET_MB, "pages": {}}
+    for p in pages:
+        cps = checkpoints(p)
+        out["pages"][p] = {
+            "checkpoints": cps,
+            "growth": growth_flags(cps).to_dict("records"),
+            "over_budget": bool(cps and cps[-1]["session_mb"] > SESSION_BUDGET_MB),
+        }
+    return out
+
+
+def memory_panel(page: str) -> None:
+    """Expander with the memory checkpoints of `page` (only when TWIN_MEMWATCH is set)."""
+    if not EVERY:
+        return
+    with st.expander("Memory diagnostics", expanded=False):
+        cps = checkpoints(page)
+        if not cps:
+            st.caption(f"First checkpoint after {EVERY} runs of this page.")
+            return
+        st.dataframe(pd.DataFrame([{k: c[k] for k in ("rerun", "traced_mb", "peak_mb", "session_mb")} for c in cps])
+                     .round(2), use_container_width=True, hide_index=True)
+        flags = growth_flags(cps)
+        if len(flags):
+            st.warning("Monotonic growth over the last checkpoints: " + ", ".join(flags["series"]))
+        if cps[-1]["session_mb"] > SESSION_BUDGET_MB:
+            st.warning(f"Session state is {cps[-1]['session_mb']:.1f} MB, above the budget of {SESSION_BUDGET_MB:g} MB.")
+        st.dataframe(pd.DataFrame(cps[-1]["caches"]), use_container_width=True, hide_index=True)
+        st.dataframe(pd.DataFrame(cps[-1]["top_sites"]).round(1), use_container_width=True, hide_index=True)
+        st.caption(f"Checkpoint every {EVERY} full runs (process-wide tracemalloc); top allocation sites "
+                   "are the change since the previous checkpoint of this page.")
+
+
+# ---------- Offline replay ----------
+def replay(page: str, reruns: int, seed: int = 0) -> None:
+    """Rerun `page` in one AppTest session, picking a random sidebar option before each run."""
+    from streamlit.testing.v1 import AppTest
+
+    from .data import APP_ROOT
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(str(APP_ROOT / page), default_timeout=120).run()
+    for _ in range(reruns - 1):
+        widgets = [w for w in list(at.sidebar.selectbox) + list(at.sidebar.radio) if len(w.options) > 1]
+        if widgets:
+            w = rng.choice(widgets)
+            w.set_value(rng.choice(w.options))
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay a page and report memory growth across reruns.")
+    ap.add_argument("page", help="page script relative to the app root, e.g. pages/02_Map.py")
+    ap.add_argument("--reruns", type=int, default=100)
+    ap.add_argument("--every", type=int, default=10, help="checkpoint every N reruns")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, help="write the report as JSON")
+    args = ap.parse_args(argv)
+
+    enable(args.every)
+    t0 = time.perf_counter()
+    replay(args.page, args.reruns, args.seed)
+    rep = report()
+    if args.out:
+        args.out.write_text(json.dumps(rep, default=float), encoding="utf-8")
+    for page, r in rep["pages"].items():
+        cps = r["checkpoints"]
+        print(f"{page}: {cps[-1]['rerun']} reruns, traced {cps[0]['traced_mb']:.1f} -> {cps[-1]['traced_mb']:.1f} MB, "
+              f"session state {cps[-1]['session_mb']:.2f} MB ({time.perf_counter() - t0:.0f} s)")
+        print(pd.DataFrame(cps[-1]["caches"]).to_string(index=False))
+        flags = pd.DataFrame(r["growth"])
+        print("Monotonic growth:\n" + flags.round(4).to_string(index=False) if len(flags) else "No monotonic growth.")
+        print("Top allocation sites since the previous checkpoint:")
+        print(pd.DataFrame(cps[-1]["top_sites"]).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    # Run through the imported module: the pages read the tracing state from twin.memwatch
+    from .memwatch import main
+    main()
@@ -0,0 +1,49 @@
+# twin/overlay.py
+"""Per-render attribute overlays on shared, immutable GeoJSON layers.
+
+Parsed layers are cached once per process and must not be modified, because every
+session reads the same dicts. Values that depend on the session (formatted
+indicator text, tooltip lines, typology) are kept as plain columns and merged only
+when a view is serialized: `overlay` returns a new FeatureCollection whose features
+have fresh property dicts but share the geometry objects of the base layer. Layers
+from the data plane (DataPlane.features) keep their rings as mapped arrays; those
+are converted to lists in the view, so the shared layer stays array-backed.
+"""
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+
+def overlay(gj: dict, columns: dict[str, Sequence] | None = None) -> dict:
+    """FeatureCollection view of `gj` with row i of every column added to feature i's properties.
+
+    Also shields the base layer from renderers that annotate features in place
+    (folium adds an `id` to each feature it styles).
+    """
+    features = gj.get("features", [])
+    columns = columns or {}
+    for name, col in columns.items():
+        if len(col) != len(features):
+            raise ValueError(f"overlay column '{name}' has {len(col)} values for {len(features)} features")
+    names, cols = list(columns), list(columns.values())
+    out = []
+    for i, f in enumerate(features):
+        props = dict(f.get("properties") or {})
+        props.update(zip(names, (c[i] for c in cols)))
+        feat = {"type": "Feature", "geometry": _plain(f.get("geometry")), "properties": props}
+        if "id" in f:
+            feat["id"] = f["id"]
+        out.append(feat)
+    return {"type": "FeatureCollection", "features": out}
+
+
+def _plain(geom: dict | None) -> dict | None:
+    """JSON-serializable geometry: array rings (data-plane layers) become nested lists."""
+    if not geom or geom.get("type") != "MultiPolygon":
+        return geom
+    polys = geom.get("coordinates") or []
+    if not (polys and polys[0] and isinstance(polys[0][0], np.ndarray)):
+        return geom
+    return {"type": "MultiPolygon", "coordinates": [[ring.tolist() for ring in poly] for poly in polys]}
@@ -0,0 +1,442 @@
+# twin/points.py
+"""Point-data layers (benches, toilets, bus stops, ...) joined into the region layers.
+
+`python -m twin.points` reads a local CSV or GeoJSON of points and does the following:
+
+- Coordinates come from lon/lat columns, a WKT `POINT (x y)` column or Point
+  geometries. RD New (EPSG:28992) metres are converted to lon/lat.
+- The points are written as data/<layer>_veld.geojson. This is the file the
+  Scenarios and Map pages read for benches and amenities.
+- Each point is joined to its buurt, wijk and gemeente.
+- Three catalog indicators are added per layer: count, points per km² and points
+  per 1,000 residents aged 65+. Re-ingesting a layer replaces its rows.
+- The layers are checked by twin.validate before anything is written. A later
+  twin.etl rebuild re-attaches the columns of every point layer in the catalog.
+
+The join uses the grid index of twin.areal to find the regions whose bounding box
+holds a point. Each region's edges are also bucketed into horizontal slabs. An
+even-odd test of a point then only visits the edges of its own slab of each
+candidate region, so a million points take seconds, not minutes.
+
+For the Map, `cluster` groups the points in view into screen-space grid cells at the
+current zoom. Only one marker per cell is sent to the browser, so the payload depends
+on the view, not on the number of points.
+
+    python -m twin.points benches.csv --layer benches [--label Benches] [--data data]
+    python -m twin.points --benchmark 1000000            (join and clustering timing)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .areal import AreaIndex, _ranges, build_index, synthetic_layer
+from .data import DATA_DIR, MUNI_GJSON, NEIGH_GJSON, WIJK_GJSON, read_catalog
+from .geometry import flatten_polygons
+from .ingest import iter_features
+from .validate import BOM, KEY_COLUMNS, LON_LAT_BOX, require, validate
+
+SOURCE = "points"                      # catalog `source` of point indicators
+POINT_LAYERS = {"benches": "benches", "toilets": "public toilets", "bus_stops": "bus stops", "amenities": "amenities"}
+DEFAULT_DIMENSION = "environment and living conditions"
+LAYER_FILES = {"buurt": NEIGH_GJSON.name, "wijk": WIJK_GJSON.name, "gemeente": MUNI_GJSON.name}
+UNIT_PER_65 = "per 1000 aged 65+"
+
+LON_COLUMNS = ("lon", "lng", "long", "longitude", "lengtegraad", "x", "xcoord", "xcoordinaat")
+LAT_COLUMNS = ("lat", "latitude", "breedtegraad", "y", "ycoord", "ycoordinaat")
+WKT_COLUMNS = ("wkt", "geometry", "geom", "thegeom", "geometrie")
+LABEL_COLUMNS = ("name", "naam", "class", "type", "soort", "omschrijving")
+# Residents: an explicit total where the layer has one, else density x polygon area
+POPULATION_COLUMNS = ("aantalInwoners",)
+DENSITY_COLUMNS = ("pop_dens_inhab_km2", "bevolkingsdichtheidInwonersPerKm2")
+SHARE_65_COLUMNS = ("perc_65y_plus", "percentagePersonen65JaarEnOuder")
+
+SLABS = 16                 # minimum horizontal edge buckets per region
+SLAB_EDGES = 8             # target edges per bucket on detailed outlines
+JOIN_CHUNK = 200_000       # points per vectorized join pass
+CLUSTER_PX = 60            # cluster cell size in screen pixels
+DENSE_CELLS = 4_000_000    # above this many cells in view, cells are grouped by sorting
+
+_POINT_WKT = re.compile(r"POINT\s*Z?\s*\(\s*([-+0-9.eE]+)[\s,]+([-+0-9.eE]+)", re.I)
+
+
+def _norm(name: str) -> str:
+    return re.sub(r"[^0-9a-z]", "", str(name).casefold())
+
+
+def point_layer_path(layer: str, data_dir: Path = DATA_DIR) -> Path:
+    return Path(data_dir) / f"{layer}_veld.geojson"
+
+
+def indicator_columns(layer: str) -> dict[str, str]:
+    return {"count": f"pts_{layer}_count", "per_km2": f"pts_{layer}_per_km2", "per_65": f"pts_{layer}_per_1000_65plus"}
+
+
+# ---------- Reading ----------
+def rd_to_wgs84(x, y) -> tuple[np.ndarray, np.ndarray]:
+    """RD New (EPSG:28992) metres to lon/lat; the usual polynomial approximation, about 1 m."""
+    dx, dy = (np.asarray(x, float) - 155000) * 1e-5, (np.asarray(y, float) - 463000) * 1e-5
+    lat = 52.15517440 + (3235.65389 * dy - 32.58297 * dx ** 2 - 0.24750 * dy ** 2 - 0.84978 * dx ** 2 * dy
+                         - 0.06550 * dy ** 3 - 0.01709 * dx ** 2 * dy ** 2 - 0.00738 * dx + 0.00530 * dx ** 4
+                         - 0.00039 * dx ** 2 * dy ** 3 + 0.00033 * dx ** 4 * dy - 0.00012 * dx * dy) / 3600
+    lon = 5.38720621 + (5260.52916 * dx + 105.94684 * dx * dy + 2.45656 * dx * dy ** 2 - 0.81885 * dx ** 3
+                        + 0.05594 * dx * dy ** 3 - 0.05607 * dx ** 3 * dy + 0.01199 * dy - 0.00256 * dx ** 3 * dy ** 2
+                        + 0.00128 * dx * dy ** 4 + 0.00022 * dy ** 2 - 0.00022 * dx ** 2 + 0.00026 * dx ** 5) / 3600
+    return lon, lat
+
+
+def _column(df: pd.DataFrame, names, given: str | None = None) -> str | None:
+    if given:
+        return given
+    by_norm = {_norm(c): c for c in df.columns}
+    return next((by_norm[n] for n in names if n in by_norm), None)
+
+
+def read_points(path: Path, lon: str | None = None, lat: str | None = None) -> pd.DataFrame:
+    """Points of a CSV or GeoJSON file as a table with `lon`, `lat` and the other attributes."""
+    path = Path(path)
+    if path.suffix.lower() in (".geojson", ".json"):
+        rows, xs, ys = [], [], []
+        for feat in iter_features(path):
+            g = feat.get("geometry") or {}
+            if g.get("type") == "Point":
+                coords = [g.get("coordinates")]
+            elif g.get("type") == "MultiPoint":
+                coords = g.get("coordinates") or []
+            else:
+                continue
+            for c in coords:
+                rows.append(feat.get("properties") or {})
+                xs.append(float(c[0])); ys.append(float(c[1]))
+        df = pd.DataFrame(rows)
+        x, y = np.asarray(xs), np.asarray(ys)
+    else:
+        from .etl import read_table
+
+        df, comma = read_table(path)
+        wkt = None if (lon or lat) else _column(df, WKT_COLUMNS)
+        if wkt is not None:
+            xy = df[wkt].astype(str).str.extract(_POINT_WKT).astype(float)
+            x, y = xy[0].to_numpy(), xy[1].to_numpy()
+        else:
+            cx, cy = _column(df, LON_COLUMNS, lon), _column(df, LAT_COLUMNS, lat)
+            if cx is None or cy is None:
+                raise ValueError(f"{path.name}: no coordinate columns found (have: {', '.join(map(str, df.columns[:12]))}); "
+                                 "use --lon/--lat")
+            num = lambda s: pd.to_numeric(s.astype(str).str.strip().str.replace(",", ".", regex=False) if comma else s,
+                                          errors="coerce").to_numpy(float)
+            x, y = num(df[cx]), num(df[cy])
+            df = df.drop(columns=[cx, cy])
+    if len(x) and np.nanmedian(np.abs(x)) > 1000:       # metres: RD New
+        x, y = rd_to_wgs84(x, y)
+    df = df.drop(columns=[c for c in ("lon", "lat") if c in df.columns]).reset_index(drop=True)
+    df.insert(0, "lat", y)
+    df.insert(0, "lon", x)
+    return df
+
+
+def clean_points(df: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """Drop points without finite coordinates inside the Netherlands; returns the kept points and the dropped count."""
+    x0, y0, x1, y1 = LON_LAT_BOX
+    ok = np.isfinite(df["lon"]) & np.isfinite(df["lat"]) & df["lon"].between(x0, x1) & df["lat"].between(y0, y1)
+    return df[ok].reset_index(drop=True), int((~ok).sum())
+
+
+def write_points(df: pd.DataFrame, path: Path, name: str) -> None:
+    props = df.drop(columns=["lon", "lat"])
+    props = props.astype(object).where(props.notna(), None).to_dict(orient="records")
+    feats = [{"type": "Feature", "properties": p, "geometry": {"type": "Point", "coordinates": [x, y]}}
+             for p, x, y in zip(props, df["lon"].round(7).tolist(), df["lat"].round(7).tolist())]
+    gj = {"type": "FeatureCollection", "name": name,
+          "crs": {"type": "name", "properties": {"name": "urn:ogc:def:crs:OGC:1.3:CRS84"}}, "features": feats}
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(gj, ensure_ascii=False, default=str), encoding="utf-8")
+    tmp.replace(path)
+
+
+# ---------- Join ----------
+class PointJoin:
+    """Bulk point-in-polygon over an AreaIndex; region edges bucketed into horizontal slabs."""
+
+    def __init__(self, index: AreaIndex, slabs: int = SLABS):
+        self.index = index
+        e, b = index.edges, index.boxes
+        n = len(index.codes)
+        # Detailed outlines get more slabs so each holds roughly SLAB_EDGES edges
+        self.slabs = np.maximum(slabs, np.bincount(e.feat, minlength=n) // SLAB_EDGES)
+        self.base = np.concatenate([[0], np.cumsum(self.slabs)])
+        self.height = np.where(np.isfinite(b[:, 3] - b[:, 1]), np.maximum(b[:, 3] - b[:, 1], 1e-12), 1.0) / self.slabs
+        y0, h, top = b[e.feat, 1], self.height[e.feat], self.slabs[e.feat] - 1
+        s0 = np.clip((np.minimum(e.y1, e.y2) - y0) // h, 0, top).astype(np.int64)
+        s1 = np.clip((np.maximum(e.y1, e.y2) - y0) // h, 0, top).astype(np.int64)
+        count = s1 - s0 + 1
+        edge = np.repeat(np.arange(len(e.feat)), count)
+        key = self.base[e.feat[edge]] + s0[edge] + np.arange(int(count.sum())) - np.repeat(np.cumsum(count) - count, count)
+        self.slab_edge = edge[np.argsort(key, kind="stable")]
+        self.slab_ptr = np.concatenate([[0], np.cumsum(np.bincount(key, minlength=int(self.base[-1])))])
+
+    def regions(self, lon, lat) -> np.ndarray:
+        """Region position of every point (-1 outside all regions)."""
+        lon, lat = np.asarray(lon, float), np.asarray(lat, float)
+        out = np.full(len(lon), -1, np.int64)
+        for s in range(0, len(lon), JOIN_CHUNK):
+            out[s:s + JOIN_CHUNK] = self._regions(lon[s:s + JOIN_CHUNK], lat[s:s + JOIN_CHUNK])
+        return out
+
+    def _regions(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        idx, e = self.index, self.index.edges
+        out = np.full(len(lon), -1, np.int64)
+        if not len(idx.codes) or not len(lon):
+            return out
+        # Candidate regions: the grid cell of each point, then its bounding boxes
+        (x0, y0), (cx, cy), (nx, ny) = idx.origin, idx.cell, idx.shape
+        cell = (np.clip((lat - y0) // cy, 0, ny - 1).astype(np.int64) * nx
+                + np.clip((lon - x0) // cx, 0, nx - 1).astype(np.int64))
+        start = idx.cell_ptr[cell]
+        length = idx.cell_ptr[cell + 1] - start
+        p = np.repeat(np.arange(len(lon)), length)
+        f = idx.cell_feat[_ranges(start, length)]
+        b = idx.boxes[f]
+        hit = (lon[p] >= b[:, 0]) & (lon[p] <= b[:, 2]) & (lat[p] >= b[:, 1]) & (lat[p] <= b[:, 3])
+        p, f = p[hit], f[hit]
+        # Even-odd test against the edges in the point's slab of each candidate
+        slab = np.clip((lat[p] - idx.boxes[f, 1]) // self.height[f], 0, self.slabs[f] - 1).astype(np.int64)
+        key = self.base[f] + slab
+        start = self.slab_ptr[key]
+        length = self.slab_ptr[key + 1] - start
+        pair = np.repeat(np.arange(len(p)), length)
+        edge = self.slab_edge[_ranges(start, length)]
+        px, py = lon[p][pair], lat[p][pair]
+        x1, y1, x2, y2 = e.x1[edge], e.y1[edge], e.x2[edge], e.y2[edge]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross = ((y1 > py) != (y2 > py)) & (px < x1 + (py - y1) * (x2 - x1) / (y2 - y1))
+        inside = np.bincount(pair[cross], minlength=len(p)) % 2 == 1
+        out[p[inside]] = f[inside]
+        return out
+
+
+def _first(df: pd.DataFrame, names) -> pd.Series | None:
+    col = next((c for c in names if c in df.columns), None)
+    return pd.to_numeric(df[col], errors="coerce") if col else None
+
+
+def residents_65(df: pd.DataFrame, area_km2: np.ndarray) -> np.ndarray:
+    """Residents aged 65+ per region: total residents (or density x area) x share 65+."""
+    total = _first(df, POPULATION_COLUMNS)
+    if total is None:
+        dens = _first(df, DENSITY_COLUMNS)
+        total = dens * area_km2 if dens is not None else pd.Series(np.nan, index=df.index)
+    share = _first(df, SHARE_65_COLUMNS)
+    return (total * share / 100).to_numpy(float) if share is not None else np.full(len(df), np.nan)
+
+
+def region_indicators(layer: str, lon, lat, table: pd.DataFrame, geometries: list,
+                      join: PointJoin | None = None) -> pd.DataFrame:
+    """Count, density (per km²) and rate per 1,000 residents aged 65+ of the points in every region."""
+    if join is None:
+        join = PointJoin(build_index(np.arange(len(table)), flatten_polygons(geometries)))
+    region = join.regions(lon, lat)
+    count = np.bincount(region[region >= 0], minlength=len(table)).astype(float)
+    area = join.index.area_km2
+    older = residents_65(table, area)
+    cols = indicator_columns(layer)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame({
+            cols["count"]: count,
+            cols["per_km2"]: np.where(area > 0, count / area, np.nan),
+            cols["per_65"]: np.where(older > 0, 1000 * count / older, np.nan),
+        }, index=table.index)
+
+
+def catalog_rows(layer: str, label: str, dimension: str, direction: int, source_file: str) -> pd.DataFrame:
+    cols = indicator_columns(layer)
+    return pd.DataFrame({
+        "dimension": dimension,
+        "label": [f"number of {label}", f"{label} per km2", f"{label} per 1,000 residents aged 65+"],
+        "column": [cols["count"], cols["per_km2"], cols["per_65"]],
+        "unit": ["count", "per km2", UNIT_PER_65],
+        "direction": direction,
+        "source": SOURCE,
+        "source_column": source_file,
+    })
+
+
+def point_layers(cat: pd.DataFrame, data_dir: Path = DATA_DIR) -> dict[str, Path]:
+    """Point layers declared in the catalog (source 'points') whose file exists, by layer name."""
+    if "source" not in cat.columns:
+        return {}
+    files = cat.loc[cat["source"] == SOURCE, "source_column"].dropna().astype(str).unique()
+    out = {}
+    for name in files:
+        p = Path(data_dir) / name
+        if p.exists():
+            out[p.stem.removesuffix("_veld")] = p
+    return out
+
+
+def load_layer_points(path: Path) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    """lon, lat and a display label (name, class or type) of every point of a layer file."""
+    df = read_points(path)
+    label = _column(df, LABEL_COLUMNS)
+    labels = df[label].fillna("").astype(str).tolist() if label else [""] * len(df)
+    return df["lon"].to_numpy(float), df["lat"].to_numpy(float), labels
+
+
+def attach(df: pd.DataFrame, cat: pd.DataFrame, data_dir: Path = DATA_DIR) -> pd.DataFrame:
+    """Add the indicator columns of every catalog point layer to a layer table with a `geometry` column."""
+    layers = point_layers(cat, data_dir)
+    if not layers or not len(df):
+        return df
+    join = PointJoin(build_index(np.arange(len(df)), flatten_polygons(df["geometry"])))
+    out = df.copy()
+    for layer, path in layers.items():
+        lon, lat, _ = load_layer_points(path)
+        out[list(indicator_columns(layer).values())] = region_indicators(layer, lon, lat, df, [], join).to_numpy()
+    return out
+
+
+# ---------- Ingestion ----------
+def ingest_points(path: Path, layer: str, data_dir: Path = DATA_DIR, label: str | None = None,
+                  dimension: str = DEFAULT_DIMENSION, direction: int = 1, lon: str | None = None,
+                  lat: str | None = None, log=print) -> dict:
+    """Normalize a point file into data_dir, join it to the region layers and extend the catalog."""
+    from .etl import read_layer, write_geojson
+
+    t0 = time.perf_counter()
+    data_dir = Path(data_dir)
+    pts, dropped = clean_points(read_points(path, lon, lat))
+    log(f"Read {len(pts):,} points from {Path(path).name}" + (f" ({dropped:,} without valid coordinates dropped)" if dropped else ""))
+    target = point_layer_path(layer, data_dir)
+
+    catalog_csv = data_dir / "variables_catalog.csv"
+    head = catalog_csv.open("rb").readline()
+    cat = read_catalog(catalog_csv)
+    rows = catalog_rows(layer, label or POINT_LAYERS.get(layer, layer.replace("_", " ")), dimension, direction, target.name)
+    cat = pd.concat([cat[~cat["column"].isin(rows["column"])], rows], ignore_index=True)
+
+    tables, timings = {}, {}
+    for level, fname in LAYER_FILES.items():
+        p = data_dir / fname
+        if not p.exists():
+            continue
+        df = read_layer(p)
+        t1 = time.perf_counter()
+        ind = region_indicators(layer, pts["lon"], pts["lat"], df, df["geometry"].tolist())
+        timings[level] = time.perf_counter() - t1
+        tables[level] = pd.concat([df.drop(columns=ind.columns, errors="ignore"), ind], axis=1)
+        code = KEY_COLUMNS[level][0]
+        log(f"  {level}: {int(ind.iloc[:, 0].sum()):,} points in {len(df)} regions "
+            f"({timings[level] * 1000:.0f} ms)" + (f", e.g. {df[code].iloc[0]}" if code in df.columns and len(df) else ""))
+
+    # Same gate as twin.etl: nothing is written when the extended layers fail validation
+    report = validate(cat, {k: v.drop(columns="geometry") for k, v in tables.items()},
+                      {k: v["geometry"].tolist() for k, v in tables.items()})
+    require(report)
+    write_points(pts, target, target.stem)
+    for level, df in tables.items():
+        write_geojson(df, data_dir / LAYER_FILES[level], Path(LAYER_FILES[level]).stem)
+    # Keep the catalog's byte-order mark and line endings, so the diff shows only the new rows
+    cat.to_csv(catalog_csv, index=False, encoding="utf-8-sig" if head.startswith(BOM) else "utf-8",
+               lineterminator="\r\n" if head.endswith(b"\r\n") else "\n")
+    log(f"Wrote {target.name}, {len(tables)} layers and {len(rows)} catalog indicators "
+        f"({report['warnings']} warnings, {time.perf_counter() - t0:.1f} s)")
+    return {"points": len(pts), "dropped": dropped, "layers": list(tables), "join_seconds": timings}
+
+
+# ---------- Clustering ----------
+def mercator(lon, lat) -> tuple[np.ndarray, np.ndarray]:
+    """Web Mercator pixel coordinates at zoom 0 (256 px world)."""
+    phi = np.radians(np.clip(np.asarray(lat, float), -85.05, 85.05))
+    return (np.asarray(lon, float) + 180) / 360 * 256, (1 - np.log(np.tan(phi) + 1 / np.cos(phi)) / np.pi) / 2 * 256
+
+
+def cluster(lon: np.ndarray, lat: np.ndarray, mx: np.ndarray, my: np.ndarray, zoom: float,
+            box=None, cell_px: int = CLUSTER_PX) -> pd.DataFrame:
+    """Points in `box` (min lon, min lat, max lon, max lat, with a margin) grouped per screen cell at `zoom`.
+
+    One row per cell: mean position, point count and one member point (its position in the inputs).
+    """
+    keep = np.arange(len(lon))
+    if box is not None:
+        mx_, my_ = (box[2] - box[0]) * 0.25, (box[3] - box[1]) * 0.25
+        keep = np.flatnonzero((lon >= box[0] - mx_) & (lon <= box[2] + mx_) & (lat >= box[1] - my_) & (lat <= box[3] + my_))
+    if not len(keep):
+        return pd.DataFrame({"lon": [], "lat": [], "count": [], "point": []})
+    scale = 2.0 ** zoom / cell_px
+    cx = np.floor(mx[keep] * scale).astype(np.int64)
+    cy = np.floor(my[keep] * scale).astype(np.int64)
+    cx -= cx.min()
+    cy -= cy.min()
+    width = int(cy.max()) + 1
+    key = cx * width + cy
+    if (int(cx.max()) + 1) * width <= DENSE_CELLS:
+        count = np.bincount(key)
+        cells = np.flatnonzero(count)
+        inv = np.searchsorted(cells, key)
+        count = count[cells]
+    else:
+        cells, inv, count = np.unique(key, return_inverse=True, return_counts=True)
+    member = np.empty(len(cells), np.int64)
+    member[inv[::-1]] = keep[::-1]
+    return pd.DataFrame({
+        "lon": np.bincount(inv, lon[keep]) / count,
+        "lat": np.bincount(inv, lat[keep]) / count,
+        "count": count,
+        "point": member,
+    })
+
+
+# ---------- Timing ----------
+def benchmark(points: int, regions: int = 14_000, vertices: int = 64, seed: int = 0) -> dict:
+    """Join and clustering time for random points over a synthetic national-scale layer (twin.areal)."""
+    rng = np.random.default_rng(seed)
+    flat = synthetic_layer(regions, vertices, seed)
+    t0 = time.perf_counter()
+    join = PointJoin(build_index(np.arange(len(flat.feat_ptr) - 1), flat))
+    build = time.perf_counter() - t0
+    lon, lat = rng.uniform(3.3, 7.3, points), rng.uniform(50.7, 53.6, points)
+    t0 = time.perf_counter()
+    region = join.regions(lon, lat)
+    joined = time.perf_counter() - t0
+    mx, my = mercator(lon, lat)
+    times = {}
+    for zoom, box in ((8, None), (12, (5.5, 51.9, 5.9, 52.1)), (16, (5.64, 52.02, 5.67, 52.04))):
+        t0 = time.perf_counter()
+        cl = cluster(lon, lat, mx, my, zoom, box)
+        times[zoom] = (time.perf_counter() - t0, len(cl))
+    return {"points": points, "regions": len(join.index.codes), "build_s": build, "join_s": joined,
+            "inside": int((region >= 0).sum()), "cluster": times}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ingest a point layer and join it to the region layers.")
+    ap.add_argument("path", nargs="?", type=Path, help="CSV or GeoJSON of points")
+    ap.add_argument("--layer", help=f"layer name, e.g. {', '.join(POINT_LAYERS)}")
+    ap.add_argument("--label", help="plural display name used in the indicator labels")
+    ap.add_argument("--dimension", default=DEFAULT_DIMENSION)
+    ap.add_argument("--direction", type=int, default=1, choices=(-1, 0, 1), help="1 = more is better")
+    ap.add_argument("--lon", help="longitude / RD x column (CSV)")
+    ap.add_argument("--lat", help="latitude / RD y column (CSV)")
+    ap.add_argument("--data", type=Path, default=DATA_DIR, help="folder with the catalog and layers to extend")
+    ap.add_argument("--benchmark", type=int, metavar="POINTS", help="time the join and clustering instead")
+    args = ap.parse_args(argv)
+    if args.benchmark:
+        r = benchmark(args.benchmark)
+        print(f"{r['points']:,} points x {r['regions']:,} regions: index {r['build_s'] * 1000:.0f} ms, "
+              f"join {r['join_s'] * 1000:.0f} ms ({r['inside']:,} inside a region)")
+        for zoom, (s, n) in r["cluster"].items():
+            print(f"  cluster at zoom {zoom}: {n:,} markers in {s * 1000:.1f} ms")
+        return
+    if not args.path or not args.layer:
+        ap.error("a point file and --layer are required")
+    ingest_points(args.path, args.layer, args.data, args.label, args.dimension, args.direction, args.lon, args.lat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# twin/qol_index.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .data import numeric_matrix
+
+# Catalog dimensions that make up the composite index ("general demographics" is context only)
+QOL_DIMENSIONS = [
+    "social relationships and community",
+    "physical health",
+    "psychological health",
+    "environment and living conditions",
+]
+
+
+@dataclass
+class IndexModel:
+    """Normalized indicator scores plus the indicator -> dimension assignment."""
+    columns: list[str]
+    dimensions: list[str]
+    scores: np.ndarray      # (regions, indicators), 0..1 or z-units, higher = better, NaN = missing
+    assign: np.ndarray      # (indicators, dimensions) 0/1
+
+
+def scored_catalog(cat: pd.DataFrame) -> pd.DataFrame:
+    """Catalog rows that enter the index: a QoL dimension and a non-zero direction."""
+    direction = pd.to_numeric(cat.get("direction", 1), errors="coerce").fillna(0)
+    keep = cat["dimension"].isin(QOL_DIMENSIONS) & (direction != 0)
+    out = cat.loc[keep].copy()
+    out["direction"] = direction[keep].astype(int)
+    return out
+
+
+def normalize(X: np.ndarray, direction: np.ndarray, method: str = "minmax") -> np.ndarray:
+    """Column-wise min-max (0..1) or z-score scaling, flipped where lower is better."""
+    with np.errstate(invalid="ignore"):
+        if method == "zscore":
+            mu, sd = np.nanmean(X, 0), np.nanstd(X, 0)
+            S = (X - mu) / np.where(sd > 0, sd, 1.0)
+            return S * direction
+        lo, hi = np.nanmin(X, 0), np.nanmax(X, 0)
+        S = (X - lo) / np.where(hi > lo, hi - lo, 1.0)
+    return np.where(direction < 0, 1.0 - S, S)
+
+
+def build_model(table: pd.DataFrame, cat: pd.DataFrame, method: str = "minmax") -> IndexModel:
+    sc = scored_catalog(cat)
+    sc = sc[sc["column"].isin(table.columns)]
+    cols = sc["column"].tolist()
+    X = numeric_matrix(table, cols)
+    dims = [d for d in QOL_DIMENSIONS if d in set(sc["dimension"])]
+    assign = (sc["dimension"].to_numpy()[:, None] == np.array(dims)[None, :]).astype(float)
+    return IndexModel(cols, dims, normalize(X, sc["direction"].to_numpy(float), method), assign)
+
+
+def _nan_weighted_mean(S: np.ndarray, W: np.ndarray) -> np.ndarray:
+    """S (n x a) @ W (a x b), renormalized per row by the weights of non-missing cells."""
+    M = np.isfinite(S).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (np.where(M > 0, S, 0.0) @ W) / (M @ W)
+
+
+def dimension_scores(model: IndexModel, indicator_weights: np.ndarray | None = None) -> np.ndarray:
+    """(regions, dimensions) weighted mean of the indicator scores within each dimension."""
+    w = np.ones(len(model.columns)) if indicator_weights is None else np.asarray(indicator_weights, float)
+    return _nan_weighted_mean(model.scores, model.assign * w[:, None])
+
+
+def total_scores(dim_scores: np.ndarray, dim_weights: np.ndarray) -> np.ndarray:
+    """Composite per region; `dim_weights` may be one vector (D,) or a batch (m, D) -> (n, m)."""
+    W = np.atleast_2d(np.asarray(dim_weights, float))
+    out = _nan_weighted_mean(dim_scores, W.T)
+    return out[:, 0] if np.ndim(dim_weights) == 1 else out
+
+
+def weight_sweep(dim_scores: np.ndarray, n: int = 5000, concentration: float = 1.0,
+                 seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Totals and ranks for `n` random weight vectors (Dirichlet) in one batched pass.
+
+    Returns (totals, ranks), both (regions, n); rank 1 = best.
+    """
+    rng = np.random.default_rng(seed)
+    W = rng.dirichlet(np.full(dim_scores.shape[1], concentration), size=n)
+    totals = total_scores(dim_scores, W)
+    filled = np.where(np.isfinite(totals), totals, -np.inf)
+    order = (-filled).argsort(0, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, len(order) + 1)[:, None], axis=0)
+    return totals, ranks
+
+
+def sweep_summary(names: list[str], totals: np.ndarray, ranks: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Region": names,
+        "Mean score": np.nanmean(totals, 1),
+        "P5": np.nanpercentile(totals, 5, axis=1),
+        "P95": np.nanpercentile(totals, 95, axis=1),
+        "Best rank": ranks.min(1),
+        "Worst rank": ranks.max(1),
+        "Modal rank": [np.bincount(r).argmax() for r in ranks],
+    })
@@ -0,0 +1,87 @@
+# twin/ranking.py
+"""Precomputed orderings and distributions for large region sets.
+
+`RankIndex` stores, for every indicator, the stable argsort of the region values
+(missing values last), binned counts and an ECDF sampled at fixed quantiles. Top /
+bottom-N selection, table pages and distribution charts are then slices of these
+arrays, so what is sent to the browser is bounded by N, the page size, the number
+of bins and the ECDF points, not by the number of regions.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .data import numeric_matrix
+
+
+class RankIndex:
+    def __init__(self, df: pd.DataFrame, columns: list[str], bins: int = 40, ecdf_points: int = 256):
+        self.columns = list(columns)
+        self._col = {c: j for j, c in enumerate(self.columns)}
+        X = numeric_matrix(df, self.columns)
+        self.values = X
+        m = X.shape[1]
+        finite = np.isfinite(X)
+        self.n_valid = finite.sum(axis=0)
+        # Ascending order per column with NaN sorted last (stable, so ties keep table order)
+        self.order = np.argsort(np.where(finite, X, np.inf), axis=0, kind="stable").astype(np.int32)
+        srt = np.take_along_axis(X, self.order, axis=0)
+
+        # Histogram of every column in one bincount (bin index offset by column)
+        lo = np.where(self.n_valid > 0, np.where(finite, X, np.inf).min(axis=0, initial=np.inf), 0.0)
+        hi = np.where(self.n_valid > 0, np.where(finite, X, -np.inf).max(axis=0, initial=-np.inf), 1.0)
+        hi = np.where(hi > lo, hi, lo + 1.0)
+        self.edges = lo + (hi - lo) * np.linspace(0.0, 1.0, bins + 1)[:, None]       # (bins+1, m)
+        with np.errstate(invalid="ignore"):
+            b = np.floor((X - lo) / (hi - lo) * bins)
+        b = np.clip(np.nan_to_num(b), 0, bins - 1).astype(np.int64)
+        flat = (b + np.arange(m) * bins)[finite]
+        self.counts = np.bincount(flat, minlength=m * bins).reshape(m, bins).T          # (bins, m)
+
+        # ECDF at evenly spaced ranks of the valid values
+        q = np.linspace(0.0, 1.0, ecdf_points)
+        pos = np.rint(q[:, None] * np.maximum(self.n_valid - 1, 0)).astype(np.int64)
+        self.ecdf_x = np.where(self.n_valid > 0, np.take_along_axis(srt, pos, axis=0), np.nan)
+        self.ecdf_p = np.where(self.n_valid > 0, (pos + 1) / np.maximum(self.n_valid, 1), np.nan)
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def _j(self, column: str) -> int:
+        if column not in self._col:
+            raise KeyError(f"column '{column}' is not indexed")
+        return self._col[column]
+
+    def top(self, column: str, n: int, ascending: bool = False) -> np.ndarray:
+        """Row positions of the n highest (or lowest) valid values, best first."""
+        j = self._j(column)
+        k = int(self.n_valid[j])
+        valid = self.order[:k, j]
+        return valid[:n] if ascending else valid[::-1][:n]
+
+    def page(self, column: str, page: int, size: int, ascending: bool = True) -> np.ndarray:
+        """Row positions of one table page sorted by `column`; missing values come last."""
+        j = self._j(column)
+        k = int(self.n_valid[j])
+        pos = np.arange(page * size, min((page + 1) * size, len(self)))
+        if not ascending:
+            pos = np.where(pos < k, k - 1 - pos, pos)
+        return self.order[pos, j]
+
+    def histogram(self, column: str) -> tuple[np.ndarray, np.ndarray]:
+        j = self._j(column)
+        return self.counts[:, j], self.edges[:, j]
+
+    def ecdf(self, column: str) -> tuple[np.ndarray, np.ndarray]:
+        j = self._j(column)
+        return self.ecdf_x[:, j], self.ecdf_p[:, j]
+
+    def share_below(self, column: str, value: float) -> float:
+        """Fraction of valid regions with a value below `value` (e.g. the Ede reference)."""
+        j = self._j(column)
+        k = int(self.n_valid[j])
+        if not k or not np.isfinite(value):
+            return np.nan
+        srt = self.values[self.order[:k, j], j]
+        return float(np.searchsorted(srt, value, side="left")) / k
@@ -0,0 +1,133 @@
+# twin/render_cache.py
+"""Content-addressed disk cache for rendered views (map HTML, Plotly figure JSON).
+
+Entries are keyed by the data content hash plus the render parameters, so a view
+rendered once is reused by every session, after restarts and by other replicas
+that point at the same directory (TWIN_RENDER_CACHE). Writes go to a temp file in
+the target directory followed by os.replace, so readers in other processes see
+either the old entry or the complete new one. A hit refreshes the file mtime;
+when the directory grows past its byte budget the oldest entries are removed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from .data import APP_ROOT
+
+RENDER_VERSION = "1"      # bump when page render code changes in a way that alters output
+DEFAULT_DIR = Path(os.environ.get("TWIN_RENDER_CACHE", APP_ROOT / ".render_cache"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("TWIN_RENDER_CACHE_MB", 256)) * 2**20)
+
+
+class RenderCache:
+    def __init__(self, root: Path = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._bytes = None          # estimate of the directory size, refreshed on eviction
+
+    @staticmethod
+    def key(snapshot: str, kind: str, **params) -> str:
+        blob = json.dumps([RENDER_VERSION, snapshot, kind, params], sort_keys=True, default=str)
+        return f"{kind}-{hashlib.sha256(blob.encode()).hexdigest()[:40]}"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[-2:] / key
+
+    def get(self, key: str) -> str | None:
+        p = self._path(key)
+        try:
+            text = p.read_text(encoding="utf-8")
+        except (FileNotFoundError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(p)                     # LRU: mtime is the last use
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        p = self._path(key)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, p)
+        except OSError:
+            return                          # a read-only or full disk only costs the cache
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan_bytes()
+            else:
+                self._bytes += len(text.encode("utf-8"))
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def get_or_render(self, key: str, render: Callable[[], str]) -> str:
+        text = self.get(key)
+        if text is None:
+            text = render()
+            self.put(key, text)
+        return text
+
+    # ---------- Eviction ----------
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        out = []
+        for p in self.root.glob("*/*"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            if p.name.startswith(".tmp-") and time.time() - st.st_mtime < 600:
+                continue                    # another process is still writing it
+            out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def _scan_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Remove least recently used entries down to 80% of the budget; returns the count."""
+        entries = sorted(self._entries(), key=lambda e: e[0])
+        total = sum(e[1] for e in entries)
+        target, removed = 0.8 * self.max_bytes, 0
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass                        # evicted concurrently by another process
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+        return removed
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {"hits": self.hits, "misses": self.misses, "entries": len(entries),
+                "bytes": sum(e[1] for e in entries), "max_bytes": self.max_bytes}
+
+
+RENDER_CACHE = RenderCache()
+
+
+if __name__ == "__main__":
+    # python -m twin.render_cache  -> size and entry count of the shared cache directory
+    print(json.dumps({"root": str(RENDER_CACHE.root), **RENDER_CACHE.stats()}, indent=1))
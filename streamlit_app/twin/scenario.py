@@ -0,0 +1,43 @@
+# twin/scenario.py
+"""Mock bench scenario model shared by the Scenarios page and the analysis tools."""
+from __future__ import annotations
+
+import numpy as np
+
+DIMENSIONS = ["social", "physical", "environmental", "psychological"]
+
+# Linear mock effect of one bench on each dimension (environmental = safety)
+BENCH_EFFECTS = {"social": 2, "physical": 1, "environmental": -1, "psychological": 1}
+# Simple composite QoL weights
+QOL_WEIGHTS = {"social": 2, "physical": 1, "environmental": 2, "psychological": 1}
+
+BASE_QOL = 350
+QOL_RANGE = (0, 500)
+
+PARAM_NAMES = [f"effect_{d}" for d in DIMENSIONS] + [f"W_{d}" for d in DIMENSIONS]
+
+
+def nominal_params() -> np.ndarray:
+    """Current mock coefficients followed by the weights, in PARAM_NAMES order."""
+    return np.array([BENCH_EFFECTS[d] for d in DIMENSIONS] + [QOL_WEIGHTS[d] for d in DIMENSIONS], dtype=float)
+
+
+def q_total(params: np.ndarray, b: float = 1.0) -> np.ndarray:
+    """Composite QoL change for a batch of parameter rows (n, 8) and `b` benches."""
+    P = np.atleast_2d(params)
+    return b * np.einsum("ij,ij->i", P[:, :4], P[:, 4:])
+
+
+def evaluate(b: int) -> dict:
+    """Dimension deltas, QoL contributions and gauge value for `b` added benches."""
+    deltas = {d: BENCH_EFFECTS[d] * b for d in DIMENSIONS}
+    contrib = {d: QOL_WEIGHTS[d] * deltas[d] for d in DIMENSIONS}
+    q = sum(contrib.values())
+    return {
+        "benches": b,
+        "dimension_deltas": deltas,
+        "qol_contributions": contrib,
+        "qol_delta": q,
+        "qol_after": float(np.clip(BASE_QOL + q, *QOL_RANGE)),
+        "qol_base": BASE_QOL,
+    }
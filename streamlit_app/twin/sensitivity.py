@@ -0,0 +1,109 @@
+# twin/sensitivity.py
+"""Global sensitivity analysis (Sobol/Saltelli and Morris) for vectorized models.
+
+`func` takes an (n, p) parameter matrix and returns (n,) outputs. It must be a
+module-level function (or functools.partial of one) so it can be sent to worker
+processes. Vectorized models are evaluated serially: the scenario model does 10^6
+rows in ~0.02 s, while starting a pool and pickling the design takes ~0.2 s. Pass
+`workers` > 1 only for models that loop in Python per row.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+
+def scale(U: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Map unit-cube samples to [low, high] per parameter (bounds: (p, 2))."""
+    return bounds[:, 0] + U * (bounds[:, 1] - bounds[:, 0])
+
+
+def evaluate(func: Callable, X: np.ndarray, batch_size: int = 100_000, workers: int = 1,
+             progress: Callable[[int, int], None] | None = None) -> np.ndarray:
+    """Evaluate `func` over the rows of X in batches; with `workers` > 1 the batches go to a process pool."""
+    n = len(X)
+    chunks = [X[s:s + batch_size] for s in range(0, n, batch_size)]
+    out, done = [], 0
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            for y in pool.map(func, chunks):
+                out.append(y); done += len(y)
+                if progress: progress(done, n)
+    else:
+        for c in chunks:
+            y = func(c)
+            out.append(y); done += len(y)
+            if progress: progress(done, n)
+    return np.concatenate(out) if out else np.empty(0)
+
+
+# ---------- Sobol (Saltelli design) ----------
+def saltelli_design(bounds: np.ndarray, n: int, seed: int = 0) -> np.ndarray:
+    """Stacked [A; B; AB_1..AB_p] with AB_i = A except column i taken from B. Shape (n*(p+2), p)."""
+    rng = np.random.default_rng(seed)
+    p = len(bounds)
+    A, B = rng.random((n, p)), rng.random((n, p))
+    AB = np.repeat(A[None, :, :], p, axis=0)
+    AB[np.arange(p), :, np.arange(p)] = B.T
+    return scale(np.concatenate([A, B, AB.reshape(p * n, p)]), bounds)
+
+
+def sobol_indices(y: np.ndarray, n: int, p: int, names: list[str]) -> pd.DataFrame:
+    """First-order (Saltelli 2010) and total-order (Jansen) indices from a Saltelli design."""
+    fA, fB, fAB = y[:n], y[n:2 * n], y[2 * n:].reshape(p, n)
+    var = np.var(np.concatenate([fA, fB]))
+    if var <= 0:
+        return pd.DataFrame({"parameter": names, "S1": 0.0, "ST": 0.0})
+    S1 = np.mean(fB[None, :] * (fAB - fA[None, :]), axis=1) / var
+    ST = 0.5 * np.mean((fA[None, :] - fAB) ** 2, axis=1) / var
+    return pd.DataFrame({"parameter": names, "S1": S1, "ST": ST})
+
+
+def run_sobol(func: Callable, bounds: np.ndarray, names: list[str], n: int, seed: int = 0,
+              workers: int = 1, progress=None) -> pd.DataFrame:
+    X = saltelli_design(bounds, n, seed)
+    y = evaluate(func, X, workers=workers, progress=progress)
+    return sobol_indices(y, n, len(bounds), names)
+
+
+# ---------- Morris (elementary effects) ----------
+def morris_design(bounds: np.ndarray, r: int, levels: int = 4, seed: int = 0) -> tuple[np.ndarray, np.ndarray, float]:
+    """r one-at-a-time trajectories of p+1 points each, built for all trajectories at once.
+
+    Returns (X (r*(p+1), p), order (r, p) parameter moved at each step, delta in unit space).
+    """
+    rng = np.random.default_rng(seed)
+    p = len(bounds)
+    delta = levels / (2.0 * (levels - 1))
+    base_levels = np.arange(levels // 2) / (levels - 1)          # leaves room for +delta
+    base = rng.choice(base_levels, size=(r, p))
+    order = np.argsort(rng.random((r, p)), axis=1)
+    steps = np.zeros((r, p + 1, p))
+    steps[np.arange(r)[:, None], np.arange(1, p + 1)[None, :], order] = delta
+    U = base[:, None, :] + np.cumsum(steps, axis=1)
+    return scale(U.reshape(r * (p + 1), p), bounds), order, delta
+
+
+def morris_indices(y: np.ndarray, order: np.ndarray, delta: float, bounds: np.ndarray,
+                   names: list[str]) -> pd.DataFrame:
+    r, p = order.shape
+    Y = y.reshape(r, p + 1)
+    ee = np.empty((r, p))
+    span = bounds[:, 1] - bounds[:, 0]
+    ee[np.arange(r)[:, None], order] = np.diff(Y, axis=1) / (delta * span[order])
+    return pd.DataFrame({
+        "parameter": names,
+        "mu_star": np.abs(ee).mean(0),
+        "mu": ee.mean(0),
+        "sigma": ee.std(0, ddof=1) if r > 1 else np.zeros(p),
+    })
+
+
+def run_morris(func: Callable, bounds: np.ndarray, names: list[str], r: int, levels: int = 4,
+               seed: int = 0, workers: int = 1, progress=None) -> pd.DataFrame:
+    X, order, delta = morris_design(bounds, r, levels, seed)
+    y = evaluate(func, X, workers=workers, progress=progress)
+    return morris_indices(y, order, delta, bounds, names)
@@ -0,0 +1,79 @@
+# twin/similarity.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .data import numeric_matrix
+
+
+def standardize(X: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Column-wise z-scores ignoring NaN. Returns (Z, mean, std); constant columns get std 1."""
+    with np.errstate(invalid="ignore"):
+        mu = np.nanmean(X, axis=0)
+        sd = np.nanstd(X, axis=0)
+    mu = np.where(np.isfinite(mu), mu, 0.0)
+    sd = np.where(np.isfinite(sd) & (sd > 0), sd, 1.0)
+    return (X - mu) / sd, mu, sd
+
+
+class SimilarityIndex:
+    """Nearest-neighbour index over standardized catalog indicators.
+
+    Distances are NaN-aware: only indicators observed in both regions are compared,
+    and the squared sum is rescaled by (requested / shared) so rows with gaps stay
+    comparable. Each query is three mat-vecs over the precomputed (N x d) arrays,
+    which keeps it in the low milliseconds for tens of thousands of regions.
+    """
+
+    def __init__(self, table: pd.DataFrame, columns: list[str], key_col: str, name_col: str):
+        self.columns = [c for c in columns if c in table.columns]
+        self.keys = table[key_col].astype(str).to_numpy()
+        self.names = table[name_col].astype(str).to_numpy()
+        self._pos = {k: i for i, k in enumerate(self.keys)}
+
+        Z, self.mean, self.std = standardize(numeric_matrix(table, self.columns))
+        self.mask = np.isfinite(Z).astype(float)
+        self.Z = np.where(self.mask > 0, Z, 0.0)
+        self.Zsq = self.Z ** 2
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def column_weights(self, columns: list[str] | None = None) -> np.ndarray:
+        """0/1 vector selecting the indicators to compare on (all by default)."""
+        if columns is None:
+            return np.ones(len(self.columns))
+        wanted = set(columns)
+        return np.array([1.0 if c in wanted else 0.0 for c in self.columns])
+
+    def distances(self, key: str, columns: list[str] | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Distances from `key` to every row, plus the number of shared indicators."""
+        i = self._pos[str(key)]
+        w = self.column_weights(columns) * self.mask[i]
+        zq = self.Z[i] * w
+        shared = self.mask @ w
+        sq = self.Zsq @ w - 2.0 * (self.Z @ zq) + self.mask @ (self.Z[i] ** 2 * w)
+        n_req = max(w.sum(), 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            d = np.sqrt(np.maximum(sq, 0.0) * n_req / shared)
+        d[shared == 0] = np.inf
+        return d, shared
+
+    def query(self, key: str, k: int = 10, columns: list[str] | None = None,
+              min_shared: int = 1) -> pd.DataFrame:
+        """The k regions most similar to `key` (itself excluded), closest first."""
+        d, shared = self.distances(key, columns)
+        d[self._pos[str(key)]] = np.inf
+        d[shared < min_shared] = np.inf
+        k = int(min(k, np.isfinite(d).sum()))
+        if k <= 0:
+            return pd.DataFrame(columns=["code", "name", "distance", "shared"])
+        idx = np.argpartition(d, k - 1)[:k]
+        idx = idx[np.argsort(d[idx], kind="mergesort")]
+        return pd.DataFrame({
+            "code": self.keys[idx],
+            "name": self.names[idx],
+            "distance": d[idx],
+            "shared": shared[idx].astype(int),
+        })
@@ -0,0 +1,402 @@
+# twin/static_export.py
+"""Static, CDN-cacheable export of the whole app.
+
+Every Dashboard combination (catalog indicator x sort order), every Map combination
+(indicator x colour mode / classification / number of classes), the Scenarios bench
+grid and the Drivers diagram are pre-rendered into plain files served with a small
+client-side switcher (index.html + site.js); serving costs nothing per visitor.
+
+- Dashboard, Scenarios and Drivers views are harvested from the pages themselves:
+  worker processes run a page headless (Streamlit AppTest), set its widgets and keep
+  the Plotly figure JSON, the diagram HTML and the KPI values, so the export shows
+  what the app shows.
+- Map views are colour and tooltip arrays over one geometry file per layer
+  (the same single-geometry scheme as twin.compare).
+- Files are named by their content hash: identical views and shared assets
+  (geometry, plotly.js, the site script) are stored once and can be served as
+  immutable. Only index.html, which carries the manifest, changes between exports.
+
+    python -m twin.static_export --out site --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .charts import PALETTE_RED
+from .compare import (
+    LEAFLET_CSS, LEAFLET_JS, MAP_CLASSES, MAP_CLASSIFICATIONS, MAP_COLOR_MODES, MISSING_COLOR, TILES,
+    geometry_payload, map_colormap, ramp_legend,
+)
+from .data import APP_ROOT, MUNI_GJSON, NEIGH_GJSON, geojson_to_table, numeric_matrix, read_catalog
+from .geometry import bbox
+
+PAGES = {
+    "dashboard": "pages/01_Dashboard.py",
+    "scenarios": "pages/04_Scenarios.py",
+    "drivers": "pages/03_Drivers diagram.py",
+}
+BENCHES = list(range(-10, 11))
+HEADERS = """/assets/*
+  Cache-Control: public, max-age=31536000, immutable
+/views/*
+  Cache-Control: public, max-age=31536000, immutable
+/index.html
+  Cache-Control: no-cache
+"""
+
+
+# ---------- Content-addressed output ----------
+class SiteWriter:
+    def __init__(self, root: Path):
+        self.root = root
+        self.written: set[str] = set()
+        self.reused = 0
+
+    def put(self, folder: str, content: str, ext: str, stem: str = "") -> str:
+        """Store `content` once under its hash; returns the site-relative path."""
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+        name = f"{folder}/{stem + '-' if stem else ''}{digest}.{ext}"
+        path = self.root / name
+        if name in self.written or path.exists():
+            self.reused += 1
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_text(content, encoding="utf-8")
+            os.replace(tmp, path)
+        self.written.add(name)
+        return name
+
+    def prune(self) -> int:
+        """Remove hashed files of earlier exports that nothing references any more."""
+        removed = 0
+        for folder in ("assets", "views"):
+            for p in (self.root / folder).glob("*"):
+                if f"{folder}/{p.name}" not in self.written:
+                    p.unlink()
+                    removed += 1
+        return removed
+
+
+# ---------- Page harvesting (worker processes) ----------
+def _init_worker() -> None:
+    import warnings
+    warnings.filterwarnings("ignore")
+    if str(APP_ROOT) not in sys.path:
+        sys.path.insert(0, str(APP_ROOT))
+
+
+def _run_page(page: str):
+    from streamlit.testing.v1 import AppTest
+    return _checked(AppTest.from_file(str(APP_ROOT / PAGES[page]), default_timeout=300).run())
+
+
+def _checked(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def _sidebar(at, kind: str, label: str):
+    return next(w for w in getattr(at.sidebar, kind) if w.label == label)
+
+
+def _figure(at, i: int = 0):
+    # Key order differs between fresh figures and ones replayed from the render cache;
+    # views are dumped with sorted keys so their content hashes are stable
+    charts = at.get("plotly_chart")
+    return json.loads(charts[i].proto.spec) if len(charts) > i else None
+
+
+def dashboard_views(dimension: str) -> dict:
+    """Figure JSON for every variable of `dimension` and every sort order."""
+    at = _run_page("dashboard")
+    _sidebar(at, "selectbox", "Dimension").set_value(dimension)
+    _checked(at.run())
+    views, sorts = {}, []
+    for label in _sidebar(at, "selectbox", "Variable").options:
+        _sidebar(at, "selectbox", "Variable").set_value(label)
+        sorts = _sidebar(at, "radio", "Sort by").options
+        for sort in sorts:
+            _sidebar(at, "radio", "Sort by").set_value(sort)
+            _checked(at.run())
+            views[f"{label}|{sort}"] = json.dumps({"figure": _figure(at)}, separators=(",", ":"), sort_keys=True)
+    return {"views": views, "sorts": list(sorts)}
+
+
+def scenario_views(benches: list[int]) -> dict:
+    """Diagram, KPI values and QoL gauge per bench count."""
+    at = _run_page("scenarios")
+    views = {}
+    for b in benches:
+        at.slider(key="b").set_value(b)
+        _checked(at.run())
+        views[str(b)] = json.dumps({
+            "diagram": at.get("iframe")[0].proto.srcdoc,
+            "metrics": [[m.label, m.value] for m in at.metric],
+            "gauge": _figure(at),
+        }, separators=(",", ":"), sort_keys=True)
+    return {"views": views}
+
+
+def drivers_view(_=None) -> dict:
+    return {"html": _run_page("drivers").get("iframe")[0].proto.srcdoc}
+
+
+def _job(args) -> tuple[str, dict]:
+    kind, arg = args
+    fn = {"dashboard": dashboard_views, "scenarios": scenario_views, "drivers": drivers_view}[kind]
+    return kind, fn(arg)
+
+
+# ---------- Map views (computed directly) ----------
+def _step_legend(title: str, bins: list[float], colors: list[str]) -> str:
+    cells = "".join(f"<div style='display:flex;align-items:center;gap:6px'><span style='width:14px;height:10px;"
+                    f"background:{c}'></span>{lo:,.4g} – {hi:,.4g}</div>"
+                    for c, lo, hi in zip(colors, bins[:-1], bins[1:]))
+    return f"<b>{html.escape(title)}</b>{cells}"
+
+
+def map_views(site: SiteWriter) -> dict:
+    cat = read_catalog()
+    neigh, muni = geojson_to_table(NEIGH_GJSON), geojson_to_table(MUNI_GJSON)
+    cols = cat["column"].tolist()
+    V = numeric_matrix(neigh, cols)
+    M = numeric_matrix(muni, cols)[0] if len(muni) else np.full(len(cols), np.nan)
+    names = neigh.get("buurtnaam", neigh.index.astype(str)).fillna("Unknown").astype(str).tolist()
+
+    options = [(MAP_COLOR_MODES[0], None, None)] + [
+        (MAP_COLOR_MODES[1], c, k) for c in MAP_CLASSIFICATIONS for k in MAP_CLASSES]
+    views, labels = {}, {}
+    for j, row in cat.reset_index(drop=True).iterrows():
+        label, unit = str(row["label"]), str(row.get("unit", "")).strip()
+        v, mv = V[:, j], float(M[j])
+        combined = [x if np.isfinite(x) else None for x in v] + ([mv] if np.isfinite(mv) else [])
+        finite = v[np.isfinite(v)]
+        dec = 0 if finite.size and finite.max() >= 100 else 2
+        title = label + (f" ({unit})" if unit and unit != "-" else "")
+        text = [f"{title}: {x:,.{dec}f}" if np.isfinite(x) else f"{title}: n/a" for x in np.append(v, mv)]
+        labels[label] = site.put("views", json.dumps({"names": names, "text": text[:-1], "muni": text[-1]},
+                                                     separators=(",", ":")), "json")
+        for mode, classes, k in options:
+            cmap = map_colormap(combined, mode, classes or MAP_CLASSIFICATIONS[0], k or 7)
+            colors = [str(cmap(x)) if np.isfinite(x) else MISSING_COLOR for x in v]
+            legend = (ramp_legend(title, cmap.vmin, cmap.vmax) if classes is None
+                      else _step_legend(title, list(cmap.index), PALETTE_RED[:k]))
+            view = {"colors": colors, "muni": str(cmap(mv)) if np.isfinite(mv) else MISSING_COLOR, "legend": legend}
+            key = "|".join([label, mode] + ([classes, str(k)] if classes else []))
+            views[key] = site.put("views", json.dumps(view, separators=(",", ":")), "json")
+    return {"views": views, "labels": labels, "modes": MAP_COLOR_MODES,
+            "classifications": MAP_CLASSIFICATIONS, "classes": MAP_CLASSES}
+
+
+def _layer(site: SiteWriter, path: Path) -> tuple[str, list]:
+    with path.open("r", encoding="utf-8") as f:
+        gj = json.load(f)
+    boxes = np.array([bbox(ft.get("geometry")) for ft in gj.get("features", [])], dtype=float).reshape(-1, 4)
+    bounds = [[float(np.nanmin(boxes[:, 1])), float(np.nanmin(boxes[:, 0]))],
+              [float(np.nanmax(boxes[:, 3])), float(np.nanmax(boxes[:, 2]))]]
+    return site.put("assets", geometry_payload(gj), "json", path.stem), bounds
+
+
+# ---------- Client ----------
+SITE_JS = r"""
+const M = window.MANIFEST, cache = {};
+const $ = id => document.getElementById(id);
+const get = p => cache[p] || (cache[p] = fetch(p).then(r => r.json()));
+function fill(sel, items, value) {
+  sel.innerHTML = items.map(v => `<option>${v}</option>`).join("");
+  if (value !== undefined && items.includes(value)) sel.value = value;
+}
+function tab(name) {
+  document.querySelectorAll("nav button").forEach(b => b.classList.toggle("on", b.dataset.tab === name));
+  document.querySelectorAll("section").forEach(s => s.hidden = s.id !== name);
+  if (name === "map" && window.leafletMap) window.leafletMap.invalidateSize();
+}
+// Dashboard
+function dashVars() { fill($("d-var"), M.dashboard.options[$("d-dim").value]); dash(); }
+async function dash() {
+  const v = await get(M.dashboard.views[`${$("d-var").value}|${$("d-sort").value}`]);
+  if (v.figure) Plotly.react("d-chart", v.figure.data, v.figure.layout, {displayModeBar: false, responsive: true});
+}
+// Map
+let neighLayer, muniLayer;
+function mapVars() { fill($("m-var"), M.dashboard.options[$("m-dim").value]); paint(); }
+async function paint() {
+  const discrete = $("m-mode").value !== M.map.modes[0];
+  $("m-classes").hidden = $("m-k").hidden = !discrete;
+  const label = $("m-var").value;
+  const key = discrete ? [label, $("m-mode").value, $("m-classes").value, $("m-k").value].join("|")
+                       : [label, $("m-mode").value].join("|");
+  const [view, text] = await Promise.all([get(M.map.views[key]), get(M.map.labels[label])]);
+  neighLayer.eachLayer(l => {
+    const i = l.feature.id;
+    l.setStyle({fillColor: view.colors[i]});
+    l.setTooltipContent(`<b>${text.names[i]}</b><br>Neighbourhood in Ede-Veldhuizen<br>${text.text[i]}`);
+  });
+  muniLayer.eachLayer(l => {
+    l.setStyle({fillColor: view.muni});
+    l.setTooltipContent(`<b>Ede (municipality)</b><br>${text.muni}`);
+  });
+  $("m-legend").innerHTML = view.legend;
+}
+async function initMap() {
+  const [neigh, muni] = await Promise.all([get(M.map.geometry.neighbourhoods), get(M.map.geometry.municipality)]);
+  const m = window.leafletMap = L.map("m-map", {zoomSnap: 0.25});
+  L.tileLayer(M.tiles, {attribution: "&copy; OpenStreetMap contributors &copy; CARTO", subdomains: "abcd", maxZoom: 19}).addTo(m);
+  muniLayer = L.geoJSON(muni, {style: {fillOpacity: 0.55, color: "#555", weight: 0.7},
+                               onEachFeature: (f, l) => l.bindTooltip("", {sticky: true})}).addTo(m);
+  neighLayer = L.geoJSON(neigh, {style: {fillOpacity: 0.85, color: "#333", weight: 0.6},
+                                 onEachFeature: (f, l) => l.bindTooltip("", {sticky: true})}).addTo(m);
+  m.fitBounds(M.map.bounds);
+  await paint();
+}
+// Scenarios
+async function scen() {
+  const b = +$("s-b").value;
+  $("s-val").textContent = (b > 0 ? "+" : "") + b;
+  const v = await get(M.scenarios.views[String(b)]);
+  $("s-diagram").srcdoc = v.diagram;
+  $("s-kpis").innerHTML = v.metrics.map(([l, x]) => `<div class="kpi"><span>${l}</span><b>${x}</b></div>`).join("");
+  if (v.gauge) Plotly.react("s-gauge", v.gauge.data, v.gauge.layout, {displayModeBar: false, responsive: true});
+}
+window.addEventListener("DOMContentLoaded", () => {
+  document.querySelectorAll("nav button").forEach(b => b.onclick = () => tab(b.dataset.tab));
+  const dims = Object.keys(M.dashboard.options);
+  fill($("d-dim"), dims); fill($("d-sort"), M.dashboard.sorts);
+  fill($("m-dim"), dims); fill($("m-mode"), M.map.modes);
+  fill($("m-classes"), M.map.classifications); fill($("m-k"), M.map.classes.map(String), "7");
+  $("d-dim").onchange = dashVars; $("d-var").onchange = $("d-sort").onchange = dash;
+  $("m-dim").onchange = mapVars;
+  $("m-var").onchange = $("m-mode").onchange = $("m-classes").onchange = $("m-k").onchange = paint;
+  $("s-b").oninput = scen;
+  $("drivers-frame").src = M.drivers;
+  fill($("d-var"), M.dashboard.options[dims[0]]); fill($("m-var"), M.dashboard.options[dims[0]]);
+  dash(); initMap(); scen(); tab("dashboard");
+});
+"""
+
+INDEX_HTML = """<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Digital twin – Ede-Veldhuizen</title>
+<link rel="stylesheet" href="{leaflet_css}"/>
+<style>
+body{{font-family:system-ui,sans-serif;margin:0 auto;max-width:1200px;padding:12px 20px}}
+nav{{display:flex;gap:6px;margin:8px 0 14px}} nav button{{border:1px solid #ccc;background:#fff;padding:6px 14px;border-radius:6px;cursor:pointer}}
+nav button.on{{background:#34495e;color:#fff;border-color:#34495e}}
+.controls{{display:flex;flex-wrap:wrap;gap:10px;align-items:center;margin-bottom:10px}}
+.kpis{{display:flex;gap:24px;margin:10px 0}} .kpi span{{display:block;font-size:13px;color:#555}} .kpi b{{font-size:24px}}
+#m-legend{{font:12px sans-serif;margin-top:6px}} footer{{font-size:12px;color:#777;margin-top:24px}}
+</style></head><body>
+<h2>Digital Twin Concept Prototype – Ede-Veldhuizen</h2>
+<nav><button data-tab="dashboard">Dashboard</button><button data-tab="map">Map</button>
+<button data-tab="scenarios">Scenarios</button><button data-tab="drivers">Drivers diagram</button></nav>
+<section id="dashboard"><div class="controls">
+<label>Dimension <select id="d-dim"></select></label><label>Variable <select id="d-var"></select></label>
+<label>Sort by <select id="d-sort"></select></label></div><div id="d-chart"></div></section>
+<section id="map" hidden><div class="controls">
+<label>Dimension <select id="m-dim"></select></label><label>Variable <select id="m-var"></select></label>
+<label>Color mode <select id="m-mode"></select></label><select id="m-classes"></select><select id="m-k"></select></div>
+<div id="m-map" style="height:600px"></div><div id="m-legend"></div></section>
+<section id="scenarios" hidden><div class="controls">
+<label>Benches (add/remove) <input id="s-b" type="range" min="{bmin}" max="{bmax}" step="1" value="0"></label>
+<b id="s-val">0</b></div>
+<iframe id="s-diagram" style="width:100%;height:520px;border:0"></iframe>
+<div id="s-kpis" class="kpis"></div><div id="s-gauge"></div></section>
+<section id="drivers" hidden><iframe id="drivers-frame" style="width:100%;height:860px;border:0"></iframe></section>
+<footer>Static export of the concept prototype ({generated}). Mock relationships on the Scenarios page;
+not predictive. Basemap: CARTO Positron • © OpenStreetMap contributors</footer>
+<script>window.MANIFEST = {manifest};</script>
+<script src="{plotly}"></script><script src="{leaflet_js}"></script><script src="{site_js}"></script>
+</body></html>
+"""
+
+
+# ---------- Driver ----------
+def export(out_dir: Path, workers: int = 0, prune: bool = True, log=print) -> dict:
+    t0 = time.perf_counter()
+    from plotly.offline import get_plotlyjs
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    site = SiteWriter(out_dir)
+    cat = read_catalog()
+    dims = sorted(cat["dimension"].dropna().unique().tolist())
+    options = {d: cat.loc[cat["dimension"] == d, "label"].tolist() for d in dims}
+
+    # Page harvesting: one job per Dashboard dimension and per slice of the bench grid
+    chunk = max(1, -(-len(BENCHES) // 4))
+    jobs = ([("dashboard", d) for d in dims]
+            + [("scenarios", BENCHES[i:i + chunk]) for i in range(0, len(BENCHES), chunk)]
+            + [("drivers", None)])
+    workers = workers or (os.cpu_count() or 1)
+    log(f"Rendering {len(jobs)} page jobs on {min(workers, len(jobs))} workers")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker) as pool:
+            results = list(pool.map(_job, jobs))
+    else:
+        _init_worker()
+        results = [_job(j) for j in jobs]
+
+    dashboard = {"options": options, "sorts": [], "views": {}}
+    scenarios = {"range": [BENCHES[0], BENCHES[-1]], "views": {}}
+    drivers = ""
+    for kind, res in results:
+        if kind == "dashboard":
+            dashboard["sorts"] = res["sorts"] or dashboard["sorts"]
+            dashboard["views"].update({k: site.put("views", v, "json") for k, v in res["views"].items()})
+        elif kind == "scenarios":
+            scenarios["views"].update({k: site.put("views", v, "json") for k, v in res["views"].items()})
+        else:
+            drivers = site.put("views", res["html"], "html", "drivers")
+
+    neigh_geo, bounds = _layer(site, NEIGH_GJSON)
+    muni_geo, _ = _layer(site, MUNI_GJSON)
+    map_ = map_views(site)
+    map_.update(geometry={"neighbourhoods": neigh_geo, "municipality": muni_geo}, bounds=bounds)
+
+    manifest = {"dashboard": dashboard, "map": map_, "scenarios": scenarios, "drivers": drivers, "tiles": TILES}
+    index = INDEX_HTML.format(
+        leaflet_css=LEAFLET_CSS, leaflet_js=LEAFLET_JS, bmin=BENCHES[0], bmax=BENCHES[-1],
+        generated=time.strftime("%Y-%m-%d"), manifest=json.dumps(manifest, separators=(",", ":")),
+        plotly=site.put("assets", get_plotlyjs(), "js", "plotly"),
+        site_js=site.put("assets", SITE_JS, "js", "site"),
+    )
+    (out_dir / "index.html").write_text(index, encoding="utf-8")
+    (out_dir / "_headers").write_text(HEADERS, encoding="utf-8")
+    removed = site.prune() if prune else 0
+
+    files = list((out_dir / "views").glob("*")) + list((out_dir / "assets").glob("*"))
+    stats = {
+        "dashboard_views": len(dashboard["views"]), "map_views": len(map_["views"]),
+        "scenario_views": len(scenarios["views"]), "files": len(files), "deduplicated": site.reused,
+        "removed": removed, "mb": round(sum(p.stat().st_size for p in files) / 2 ** 20, 1),
+        "seconds": round(time.perf_counter() - t0, 1),
+    }
+    log(f"Done: {stats}")
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pre-render the app into a static, CDN-cacheable site.")
+    ap.add_argument("--out", type=Path, default=Path("site"))
+    ap.add_argument("--workers", type=int, default=0, help="processes (default: all cores)")
+    ap.add_argument("--keep", action="store_true", help="keep files of earlier exports")
+    args = ap.parse_args(argv)
+    export(args.out, args.workers, prune=not args.keep)
+
+
+if __name__ == "__main__":
+    # Run through the imported module: AppTest replaces __main__ in the workers, so jobs must
+    # be pickled as twin.static_export functions
+    from .static_export import main
+    main()
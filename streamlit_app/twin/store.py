@@ -0,0 +1,75 @@
+# twin/store.py
+"""In-process indicator store: region tables per level, reloaded when the data files change."""
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .data import CATALOG_CSV, MUNI_GJSON, NEIGH_GJSON, WIJK_GJSON, geojson_to_table, read_catalog, snapshot_key
+from .dataplane import PLANE
+
+LEVELS = {
+    "buurt": (NEIGH_GJSON, "buurtcode", "buurtnaam"),
+    "wijk": (WIJK_GJSON, "wijkcode", "wijknaam"),
+    "gemeente": (MUNI_GJSON, "gemeentecode", "gemeentenaam"),
+}
+
+
+class IndicatorStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._catalog = None
+        self._tables: dict[str, pd.DataFrame] = {}
+
+    @property
+    def snapshot(self) -> str:
+        self._refresh()
+        return self._snapshot
+
+    def _refresh(self) -> None:
+        # A published data plane (twin.dataplane) takes precedence over parsing the files
+        plane = PLANE.refresh()
+        snap = f"plane-{plane}" if plane else snapshot_key(CATALOG_CSV, *(p for p, _, _ in LEVELS.values()))
+        if snap == self._snapshot:
+            return
+        with self._lock:
+            if snap != self._snapshot:
+                self._catalog = read_catalog()
+                if plane:
+                    self._tables = {lvl: PLANE.table(lvl) for lvl in PLANE.levels() if lvl in LEVELS}
+                else:
+                    self._tables = {lvl: geojson_to_table(p) for lvl, (p, _, _) in LEVELS.items() if p.exists()}
+                self._snapshot = snap
+
+    def catalog(self) -> pd.DataFrame:
+        self._refresh()
+        return self._catalog
+
+    def table(self, level: str) -> pd.DataFrame:
+        self._refresh()
+        if level not in self._tables:
+            raise KeyError(f"unknown level '{level}'")
+        return self._tables[level]
+
+    def values(self, column: str, level: str = "buurt") -> pd.DataFrame:
+        """code, name and numeric value of one indicator for every region of a level."""
+        df = self.table(level)
+        _, code_col, name_col = LEVELS[level]
+        if column not in df.columns:
+            raise KeyError(f"column '{column}' not available at level '{level}'")
+        return pd.DataFrame({
+            "code": df.get(code_col, pd.Series(index=df.index, dtype=object)).astype(str),
+            "name": df.get(name_col, pd.Series(index=df.index, dtype=object)).astype(str),
+            "value": pd.to_numeric(df[column], errors="coerce"),
+        })
+
+    def reference(self, column: str) -> float:
+        """Municipal reference value (NaN when missing)."""
+        v = self.values(column, "gemeente")["value"]
+        return float(v.iloc[0]) if len(v) else np.nan
+
+
+STORE = IndicatorStore()
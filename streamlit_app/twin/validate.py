@@ -0,0 +1,367 @@
+# twin/validate.py
+"""Data-quality gate: vectorized checks of the catalog and the region layers.
+
+Runs once per data version, when the layers are built (twin.etl), published
+(twin.dataplane) or first loaded by the app (cached.quality), instead of on every
+page rerun. The checks:
+
+- catalog: required fields, duplicate columns and labels, known units and
+  directions, a byte-order mark in the header, column names that misspell their
+  label (`prox_dist_large_supermaket_km`);
+- coverage: every catalog column present at buurt and gemeente level, and the
+  region code/name columns the pages key on;
+- values: numeric, within the range of their unit (%, km, per km², counts),
+  estimates inside their 95% interval;
+- missingness per indicator and per region;
+- duplicate or empty region codes;
+- geometry: a (Multi)Polygon per feature, finite lon/lat inside the Netherlands,
+  closed rings of at least four points, non-zero area.
+
+Value checks run on one (regions x indicators) matrix per layer and geometry
+checks on the flat coordinate arrays of twin.geometry. Every finding is an Issue;
+errors fail the gate, warnings are only reported. The report is plain JSON:
+
+    python -m twin.validate --out quality.json      (exit status 1 on errors)
+"""
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .data import CATALOG_CSV, CATALOG_REQUIRED, MUNI_GJSON, NEIGH_GJSON, VELD_GJSON, WIJK_GJSON, content_key, numeric_matrix
+from .geometry import flatten_polygons
+
+LAYERS = {"buurt": NEIGH_GJSON, "gemeente": MUNI_GJSON, "wijk": WIJK_GJSON, "veld": VELD_GJSON}
+REQUIRED_LAYERS = ("buurt", "gemeente")      # carry the catalog indicators
+KEY_COLUMNS = {"buurt": ("buurtcode", "buurtnaam"), "gemeente": ("gemeentecode", "gemeentenaam"),
+               "wijk": ("wijkcode", "wijknaam")}
+
+# Plausible range per catalog unit, inclusive (None = unbounded)
+UNIT_RANGES = {
+    "%": (0.0, 100.0),
+    "km": (0.0, 100.0),
+    "per km2": (0.0, 60_000.0),
+    "count": (0.0, None),         # Nabijheid counts are averages over addresses, not integers
+    "persons/household": (0.0, 10.0),
+    "per 1000 aged 65+": (0.0, None),      # point layers (twin.points)
+}
+DIRECTIONS = {-1, 0, 1}
+LON_LAT_BOX = (3.0, 50.6, 7.3, 53.7)     # the Netherlands with a margin
+REGION_MISSING_SHARE = 0.5               # regions missing more of the indicators are reported
+MAX_LISTED = 10                          # region codes listed per issue
+BOM = b"\xef\xbb\xbf"
+
+
+@dataclass
+class Issue:
+    check: str
+    severity: str            # "error" fails the gate, "warning" is only reported
+    layer: str
+    column: str
+    count: int
+    detail: str
+    regions: list[str] = field(default_factory=list)
+
+
+class DataQualityError(ValueError):
+    def __init__(self, report: dict):
+        self.report = report
+        super().__init__("data failed validation:\n  " + "\n  ".join(summary(report)))
+
+
+# ---------- Helpers ----------
+def _codes(df: pd.DataFrame | None, layer: str) -> np.ndarray:
+    if df is None:
+        return np.array([], dtype=object)
+    col = KEY_COLUMNS.get(layer, ("",))[0]
+    if col in df.columns:
+        return df[col].astype(str).to_numpy()
+    return np.array([f"#{i}" for i in range(len(df))], dtype=object)
+
+
+def _listed(codes: np.ndarray, mask: np.ndarray) -> list[str]:
+    return [str(c) for c in codes[np.asarray(mask, bool)][:MAX_LISTED]]
+
+
+def _per_column(check: str, severity: str, layer: str, columns: list[str], mask: np.ndarray,
+                codes: np.ndarray, detail: str) -> list[Issue]:
+    """One issue per column of a (regions x columns) mask with any hit."""
+    return [Issue(check, severity, layer, columns[j], int(mask[:, j].sum()), detail, _listed(codes, mask[:, j]))
+            for j in np.flatnonzero(mask.any(axis=0))]
+
+
+def misspellings(column: str, label: str) -> list[tuple[str, str]]:
+    """Column-name words that are near misses of a label word, e.g. ('supermaket', 'supermarket')."""
+    words = set(re.findall(r"[a-z]+", label.casefold()))
+    out = []
+    for tok in re.findall(r"[a-z]+", column.casefold()):
+        if len(tok) < 5 or tok in words or any(w.startswith(tok) or (len(w) > 3 and tok.startswith(w)) for w in words):
+            continue
+        near = difflib.get_close_matches(tok, words, n=1, cutoff=0.85)
+        if near:
+            out.append((tok, near[0]))
+    return out
+
+
+# ---------- Checks ----------
+def check_catalog(cat: pd.DataFrame, header: bytes = b"") -> list[Issue]:
+    out = []
+    if header.startswith(BOM):
+        out.append(Issue("catalog_bom", "warning", "catalog", "", 1,
+                         "UTF-8 byte-order mark before the header; read with encoding='utf-8-sig' (data.read_catalog)"))
+    missing = CATALOG_REQUIRED - set(cat.columns)
+    if missing:
+        out.append(Issue("catalog_fields", "error", "catalog", ", ".join(sorted(missing)), len(missing),
+                         "required catalog fields missing"))
+        return out
+    blank = cat[["dimension", "label", "column"]].astype("string").apply(lambda s: s.str.strip()).fillna("").eq("")
+    if blank.to_numpy().any():
+        out += _per_column("catalog_blank", "error", "catalog", list(blank.columns), blank.to_numpy(),
+                           cat.index.astype(str).to_numpy(), "empty catalog field (rows listed)")
+    for key, what in ((["column"], "column"), (["dimension", "label"], "label within a dimension")):
+        dup = cat.duplicated(key, keep=False).to_numpy()
+        if dup.any():
+            out.append(Issue("catalog_duplicates", "error", "catalog", ", ".join(sorted(set(cat.loc[dup, key[-1]].astype(str)))),
+                             int(dup.sum()), f"duplicate {what}"))
+    units = cat["unit"].astype(str).str.strip()
+    unknown = ~units.isin(list(UNIT_RANGES))
+    if unknown.any():
+        out.append(Issue("catalog_units", "warning", "catalog", ", ".join(cat.loc[unknown, "column"].astype(str)),
+                         int(unknown.sum()), f"no value range for unit(s) {sorted(set(units[unknown]))}"))
+    if "direction" in cat.columns:
+        bad = ~pd.to_numeric(cat["direction"], errors="coerce").isin(list(DIRECTIONS))
+        if bad.any():
+            out.append(Issue("catalog_direction", "error", "catalog", ", ".join(cat.loc[bad, "column"].astype(str)),
+                             int(bad.sum()), "direction must be -1, 0 or 1"))
+    for col, label in zip(cat["column"].astype(str), cat["label"].astype(str)):
+        for tok, word in misspellings(col, label):
+            out.append(Issue("catalog_spelling", "warning", "catalog", col, 1,
+                             f"'{tok}' in the column name looks like a misspelling of '{word}' in its label"))
+    return out
+
+
+def check_coverage(cat: pd.DataFrame, tables: dict[str, pd.DataFrame]) -> list[Issue]:
+    out = []
+    cols = cat["column"].astype(str)
+    for layer in REQUIRED_LAYERS:
+        if layer not in tables:
+            continue
+        absent = ~cols.isin(tables[layer].columns)
+        if absent.any():
+            out.append(Issue("coverage", "error", layer, ", ".join(cols[absent]), int(absent.sum()),
+                             "catalog columns missing from the layer"))
+    for layer, df in tables.items():
+        absent = [c for c in KEY_COLUMNS.get(layer, ()) if c not in df.columns]
+        if absent:
+            out.append(Issue("key_columns", "error", layer, ", ".join(absent), len(absent), "region code/name column missing"))
+    return out
+
+
+def check_values(cat: pd.DataFrame, tables: dict[str, pd.DataFrame]) -> list[Issue]:
+    out = []
+    units = cat["unit"].astype(str).str.strip()
+    bounds = np.array([[np.nan if b is None else b for b in UNIT_RANGES.get(u, (None, None))] for u in units],
+                      dtype=float).reshape(-1, 2)
+    for layer in REQUIRED_LAYERS:
+        df = tables.get(layer)
+        if df is None or not len(df):
+            continue
+        present = cat["column"].isin(df.columns).to_numpy()
+        cols = cat["column"][present].astype(str).tolist()
+        codes = _codes(df, layer)
+        X = numeric_matrix(df, cols)
+        missing = np.isnan(X)
+        lo, hi = bounds[present, 0], bounds[present, 1]
+
+        text = missing & df[cols].notna().to_numpy()
+        out += _per_column("numeric", "error", layer, cols, text, codes, "non-numeric values")
+        with np.errstate(invalid="ignore"):
+            outside = (X < lo) | (X > hi)
+        for j in np.flatnonzero(outside.any(axis=0)):
+            out.append(Issue("range", "error", layer, cols[j], int(outside[:, j].sum()),
+                             f"values outside [{lo[j]:g}, {hi[j]:g}] for unit '{units[present].iloc[j]}' "
+                             f"(found {np.nanmin(X[:, j]):g} to {np.nanmax(X[:, j]):g})",
+                             _listed(codes, outside[:, j])))
+
+        # Estimates and their 95% interval bounds (<column>_lower / <column>_upper)
+        ci = [c for c in cols if f"{c}_lower" in df.columns and f"{c}_upper" in df.columns]
+        if ci:
+            V = numeric_matrix(df, ci)
+            L, U = numeric_matrix(df, [f"{c}_lower" for c in ci]), numeric_matrix(df, [f"{c}_upper" for c in ci])
+            with np.errstate(invalid="ignore"):
+                outside_ci = (L > U) | (V < L) | (V > U)
+            out += _per_column("interval", "warning", layer, ci, outside_ci, codes, "estimate outside its 95% interval")
+
+        empty = missing.all(axis=0)
+        partial = missing & ~empty
+        severity = "error" if layer == "buurt" else "warning"
+        out += [Issue("missing", severity, layer, cols[j], len(df), "no values for this indicator")
+                for j in np.flatnonzero(empty)]
+        out += _per_column("missing", "warning", layer, cols, partial, codes, "missing values")
+        if layer == "buurt" and cols:
+            share = missing.mean(axis=1)
+            sparse = share > REGION_MISSING_SHARE
+            if sparse.any():
+                out.append(Issue("missing_regions", "warning", layer, "", int(sparse.sum()),
+                                 f"regions missing more than {REGION_MISSING_SHARE:.0%} of the indicators",
+                                 _listed(codes, sparse)))
+    return out
+
+
+def check_codes(tables: dict[str, pd.DataFrame]) -> list[Issue]:
+    out = []
+    for layer, df in tables.items():
+        col = KEY_COLUMNS.get(layer, ("",))[0]
+        if col not in df.columns:
+            continue
+        codes = df[col].astype("string").str.strip()
+        empty = (codes.isna() | codes.eq("")).to_numpy()
+        dup = codes.duplicated(keep=False).to_numpy() & ~empty
+        if empty.any():
+            out.append(Issue("codes", "error", layer, col, int(empty.sum()), "empty region codes",
+                             [f"#{i}" for i in np.flatnonzero(empty)[:MAX_LISTED]]))
+        if dup.any():
+            out.append(Issue("codes", "error", layer, col, int(dup.sum()), "duplicate region codes",
+                             sorted(set(codes[dup]))[:MAX_LISTED]))
+    return out
+
+
+def check_geometry(layer: str, geoms: list, codes: np.ndarray) -> list[Issue]:
+    """(Multi)Polygon per feature; coordinates, ring closure, ring length and area on the flat arrays."""
+    n = len(geoms)
+    if len(codes) != n:
+        codes = np.array([f"#{i}" for i in range(n)], dtype=object)
+    flat = flatten_polygons(geoms)
+    xy, ring_ptr = flat.coords, flat.ring_ptr
+    n_rings = len(ring_ptr) - 1
+    ring_len = np.diff(ring_ptr)
+    poly_feat = np.repeat(np.arange(n), np.diff(flat.feat_ptr))
+    ring_feat = poly_feat[np.repeat(np.arange(len(flat.poly_ptr) - 1), np.diff(flat.poly_ptr))]
+
+    def features(ring_mask: np.ndarray) -> np.ndarray:
+        return np.bincount(ring_feat[ring_mask], minlength=n) > 0
+
+    types = pd.Series([(g or {}).get("type") for g in geoms], dtype=object)
+    no_polygon = (~types.isin(["Polygon", "MultiPolygon"])).to_numpy() | (np.diff(flat.feat_ptr) == 0)
+
+    x0, y0, x1, y1 = LON_LAT_BOX
+    with np.errstate(invalid="ignore"):
+        bad_pt = ~np.isfinite(xy).all(axis=1) | (xy[:, 0] < x0) | (xy[:, 0] > x1) | (xy[:, 1] < y0) | (xy[:, 1] > y1)
+    bad_ring = np.bincount(np.repeat(np.arange(n_rings), ring_len)[bad_pt], minlength=n_rings) > 0
+
+    unclosed = (xy[ring_ptr[:-1]] != xy[ring_ptr[1:] - 1]).any(axis=1) if n_rings else np.zeros(0, bool)
+    short = ring_len < 4
+    # Shoelace area per ring: each point paired with the next one of its own ring
+    nxt = np.arange(len(xy)) + 1
+    nxt[ring_ptr[1:] - 1] = ring_ptr[:-1]
+    cross = xy[:, 0] * xy[nxt, 1] - xy[nxt, 0] * xy[:, 1] if len(xy) else np.zeros(0)
+    area = 0.5 * np.add.reduceat(cross, ring_ptr[:-1]) if n_rings else np.zeros(0)
+    flat_ring = ~bad_ring & (np.abs(area) < 1e-12)
+
+    checks = [
+        ("error", no_polygon, "no Polygon/MultiPolygon geometry"),
+        ("error", features(bad_ring), f"coordinates not finite or outside lon/lat box {LON_LAT_BOX}"),
+        ("error", features(short), "rings with fewer than four points"),
+        ("warning", features(unclosed), "rings not closed (first point differs from the last)"),
+        ("warning", features(flat_ring), "rings with zero area"),
+    ]
+    return [Issue("geometry", sev, layer, "geometry", int(mask.sum()), detail, _listed(codes, mask))
+            for sev, mask, detail in checks if mask.any()]
+
+
+# ---------- Report ----------
+def validate(cat: pd.DataFrame, tables: dict[str, pd.DataFrame], geometries: dict[str, list] | None = None,
+             header: bytes = b"", issues: list[Issue] | None = None) -> dict:
+    """Run every check; `tables` maps a layer to its attribute table, `geometries` to its GeoJSON geometries."""
+    t0 = time.perf_counter()
+    issues = list(issues or [])
+    issues += check_catalog(cat, header)
+    if not any(i.check == "catalog_fields" for i in issues):
+        issues += check_coverage(cat, tables) + check_values(cat, tables)
+    issues += check_codes(tables)
+    for layer, geoms in (geometries or {}).items():
+        issues += check_geometry(layer, geoms, _codes(tables.get(layer), layer))
+    errors = sum(i.severity == "error" for i in issues)
+    return {
+        "ok": errors == 0,
+        "errors": errors,
+        "warnings": len(issues) - errors,
+        "layers": {layer: len(df) for layer, df in tables.items()},
+        "indicators": len(cat),
+        "seconds": round(time.perf_counter() - t0, 4),
+        "issues": [asdict(i) for i in sorted(issues, key=lambda i: (i.severity != "error", i.layer, i.check))],
+    }
+
+
+def validate_files(catalog: Path = CATALOG_CSV, layers: dict[str, Path] = LAYERS) -> dict:
+    """Validate the catalog and layer files as shipped (or as rebuilt into data/)."""
+    missing = [p for layer, p in [("catalog", catalog), *layers.items()]
+               if not p.exists() and layer in ("catalog", *REQUIRED_LAYERS)]
+    issues = [Issue("files", "error", "", p.name, 1, "required file missing") for p in missing]
+    cat = pd.read_csv(catalog, encoding="utf-8-sig") if catalog.exists() else pd.DataFrame(columns=sorted(CATALOG_REQUIRED))
+    tables, geometries = {}, {}
+    for layer, path in layers.items():
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                features = json.load(f).get("features", [])
+            tables[layer] = pd.DataFrame([ft.get("properties") or {} for ft in features])
+            geometries[layer] = [ft.get("geometry") for ft in features]
+    header = catalog.open("rb").read(len(BOM)) if catalog.exists() else b""
+    report = validate(cat, tables, geometries, header, issues)
+    report["version"] = content_key(catalog, *layers.values())
+    return report
+
+
+def summary(report: dict, severity: str = "error") -> list[str]:
+    """One line per issue of `severity`."""
+    return [f"[{i['check']}] {i['layer'] + ': ' if i['layer'] else ''}{i['column'] + ': ' if i['column'] else ''}"
+            f"{i['detail']} ({i['count']})" + (f" e.g. {', '.join(i['regions'][:3])}" if i["regions"] else "")
+            for i in report["issues"] if i["severity"] == severity]
+
+
+def require(report: dict) -> dict:
+    """Fail fast: raise DataQualityError when the report has errors."""
+    if not report["ok"]:
+        raise DataQualityError(report)
+    return report
+
+
+def page_gate(report: dict) -> None:
+    """Stop a page on data that failed validation; pages that pass need no checks of their own."""
+    if report["ok"]:
+        return
+    import streamlit as st
+    st.error("The data files failed validation (`python -m twin.validate` for the full report):\n\n"
+             + "\n".join(f"- {line}" for line in summary(report)))
+    st.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Validate the variables catalog and the region layers.")
+    ap.add_argument("--catalog", type=Path, default=CATALOG_CSV)
+    ap.add_argument("--data", type=Path, help="folder with the layer files (default: the app's data/)")
+    ap.add_argument("--out", type=Path, help="write the report as JSON")
+    args = ap.parse_args(argv)
+    layers = {k: args.data / p.name for k, p in LAYERS.items()} if args.data else LAYERS
+    report = validate_files(args.catalog, layers)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=1), encoding="utf-8")
+    for severity in ("error", "warning"):
+        for line in summary(report, severity):
+            print(f"{severity.upper():8}{line}")
+    print(f"{'OK' if report['ok'] else 'FAILED'}: {report['errors']} errors, {report['warnings']} warnings "
+          f"({report['indicators']} indicators, {report['seconds'] * 1000:.0f} ms)")
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# twin/walking.py
+"""Agent-based walking simulation for older residents and bench placement.
+
+Synthetic 65+ residents live in the Veldhuizen buurten and walk on a local street
+graph. Each agent has a maximum distance it can walk without resting (`leg`) and a
+total trip budget. A destination is reachable when the network distance fits the
+budget and a route exists with no stretch longer than `leg` between rest points
+(benches). Agents are plain NumPy arrays: reachability is computed with one
+multi-source search per (amenity class, leg level) and then gathered per agent.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .geometry import area_km2, sample_points
+from .graph import StreetGraph
+
+# Amenity classes behind the prox_dist_* catalog columns, and the QoL dimension they feed
+AMENITY_COLUMNS = {
+    "gp_practice": "prox_dist_gp_practice_km",
+    "pharmacy": "prox_dist_pharmacy_km",
+    "hospital": "prox_dist_hospital_km",
+    "large_supermarket": "prox_dist_large_supermaket_km",
+    "cafe": "prox_dist_cafe_km",
+    "swimming_pool": "prox_dist_swimming_pool_km",
+    "library": "prox_dist_library_km",
+    "cinema": "prox_dist_cinema_km",
+}
+AMENITY_DIMENSION = {
+    "gp_practice": "physical", "pharmacy": "physical", "hospital": "physical",
+    "swimming_pool": "physical", "large_supermarket": "environmental",
+    "cafe": "social", "library": "social", "cinema": "social",
+}
+
+LEG_LEVELS_M = np.array([100.0, 150.0, 200.0, 300.0, 400.0, 600.0, 800.0])
+LEG_MEDIAN_M, LEG_SIGMA = 250.0, 0.5          # distance walked without resting
+BUDGET_MEDIAN_M, BUDGET_SIGMA = 1200.0, 0.4    # one-way trip budget
+
+
+@dataclass
+class Agents:
+    home: np.ndarray      # (n,) graph node
+    buurt: np.ndarray     # (n,) buurt name
+    leg: np.ndarray       # (n,) index into LEG_LEVELS_M
+    budget: np.ndarray    # (n,) metres
+
+    def __len__(self) -> int:
+        return len(self.home)
+
+
+def residents_65(neigh_gj: dict) -> pd.DataFrame:
+    """Estimated 65+ residents per buurt: density x polygon area x perc_65y_plus."""
+    rows = []
+    for f in neigh_gj.get("features", []):
+        p = f.get("properties") or {}
+        try:
+            pop = float(p.get("pop_dens_inhab_km2")) * area_km2(f.get("geometry"))
+            n65 = pop * float(p.get("perc_65y_plus")) / 100.0
+        except (TypeError, ValueError):
+            n65 = 0.0
+        rows.append({"buurtnaam": p.get("buurtnaam", "Unknown"), "residents_65": max(n65, 0.0)})
+    return pd.DataFrame(rows)
+
+
+def synth_agents(neigh_gj: dict, graph: StreetGraph, n: int, seed: int = 0) -> Agents:
+    """`n` agents spread over the buurten in proportion to their 65+ residents."""
+    rng = np.random.default_rng(seed)
+    res = residents_65(neigh_gj)
+    share = res["residents_65"].to_numpy()
+    share = share / share.sum() if share.sum() > 0 else np.full(len(share), 1.0 / max(len(share), 1))
+    counts = np.floor(share * n).astype(int)
+    counts[np.argsort(-(share * n - counts))[: n - counts.sum()]] += 1   # largest remainder
+
+    lons, lats, names = [], [], []
+    for f, c, name in zip(neigh_gj.get("features", []), counts, res["buurtnaam"]):
+        lo, la = sample_points(f.get("geometry"), int(c), rng)
+        lons.append(lo); lats.append(la); names.append(np.full(len(lo), name, dtype=object))
+    lon, lat = np.concatenate(lons), np.concatenate(lats)
+
+    leg_m = rng.lognormal(np.log(LEG_MEDIAN_M), LEG_SIGMA, len(lon))
+    leg = np.clip(np.searchsorted(LEG_LEVELS_M, leg_m, side="right") - 1, 0, len(LEG_LEVELS_M) - 1)
+    budget = rng.lognormal(np.log(BUDGET_MEDIAN_M), BUDGET_SIGMA, len(lon))
+    return Agents(graph.nearest_node(lon, lat), np.concatenate(names), leg, budget)
+
+
+class WalkSimulation:
+    """Reachability of amenity classes for a population of agents, with and without extra benches."""
+
+    def __init__(self, graph: StreetGraph, amenity_nodes: dict[str, np.ndarray],
+                 bench_nodes: np.ndarray | None = None):
+        self.graph = graph
+        self.classes = [c for c in AMENITY_COLUMNS if len(amenity_nodes.get(c, ())) > 0]
+        self.amenity_nodes = {c: np.asarray(amenity_nodes[c]) for c in self.classes}
+        self.bench_nodes = np.asarray(bench_nodes if bench_nodes is not None else [], dtype=np.int64)
+        # Plain network distances do not depend on benches: one search per class, kept
+        self.network_m = {c: graph.dijkstra(self.amenity_nodes[c]) for c in self.classes}
+
+    def reach(self, agents: Agents, add: np.ndarray = (), remove: np.ndarray = ()) -> np.ndarray:
+        """(agents, classes) bool matrix for the bench set existing + `add` - `remove`."""
+        rest = np.zeros(self.graph.n_nodes, dtype=bool)
+        rest[self.bench_nodes] = True
+        rest[np.asarray(remove, dtype=np.int64)] = False
+        rest[np.asarray(add, dtype=np.int64)] = True
+        levels = np.unique(agents.leg)
+
+        R = np.zeros((len(agents), len(self.classes)), dtype=bool)
+        for j, c in enumerate(self.classes):
+            table = np.empty((len(LEG_LEVELS_M), self.graph.n_nodes))
+            for lv in levels:
+                table[lv] = self.graph.dijkstra(self.amenity_nodes[c], rest=rest, max_leg=LEG_LEVELS_M[lv])
+            rested = np.isfinite(table[agents.leg, agents.home])
+            R[:, j] = rested & (self.network_m[c][agents.home] <= agents.budget)
+        return R
+
+    def summary(self, agents: Agents, R: np.ndarray) -> pd.DataFrame:
+        """Share (%) of agents per buurt that can reach each amenity class."""
+        df = pd.DataFrame(R * 100.0, columns=self.classes)
+        df["buurtnaam"] = agents.buurt
+        return df.groupby("buurtnaam", sort=True).mean()
+
+
+def dimension_deltas(classes: list[str], before: np.ndarray, after: np.ndarray) -> dict[str, float]:
+    """Change in reachable share of agents (percentage points) per QoL dimension.
+
+    Psychological gets the change averaged over all classes (independence of movement).
+    """
+    diff = (after.mean(0) - before.mean(0)) * 100.0 if len(before) else np.zeros(len(classes))
+    dims = np.array([AMENITY_DIMENSION.get(c, "") for c in classes])
+    out = {d: float(diff[dims == d].mean()) if (dims == d).any() else 0.0
+           for d in ("social", "physical", "environmental")}
+    out["psychological"] = float(diff.mean()) if len(diff) else 0.0
+    return out